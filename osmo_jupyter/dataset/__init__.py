@@ -1 +1,10 @@
-from . import parse, combine, source_files  # noqa: F401 # ignore unused import warning
+from . import (  # noqa: F401 # ignore unused import warning
+    parse,
+    combine,
+    source_files,
+    cache,
+    export,
+    store,
+    aggregate,
+    pipeline,
+)
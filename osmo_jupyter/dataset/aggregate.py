@@ -0,0 +1,145 @@
+""" Summarize combined datasets (e.g. from osmo_jupyter.dataset.combine) per setpoint or equilibration range, by
+    computing every statistic for every column in one pass over rows sorted by group.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .combine import EQUILIBRATION_RANGE_ID_LABEL, get_equilibration_range_ids
+
+DEFAULT_STATISTICS = ["mean", "std", "count", "min", "max"]
+
+SUPPORTED_STATISTICS = ["mean", "std", "count", "min", "max", "sum"]
+
+
+def _get_segment_statistics(
+    sorted_values: np.ndarray, segment_starts: np.ndarray, statistics: List[str]
+) -> dict:
+    """ Compute statistics of each segment of rows of a 2D array, ignoring NaNs, using ufunc.reduceat so that every
+        segment is reduced in a single vectorized call per statistic.
+    """
+    is_present = ~np.isnan(sorted_values)
+    counts = np.add.reduceat(is_present, segment_starts, axis=0)
+    sums = np.add.reduceat(
+        np.where(is_present, sorted_values, 0), segment_starts, axis=0
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+        segment_statistics = {"count": counts, "sum": sums, "mean": means}
+        if "std" in statistics:
+            # Sum squared deviations from each segment's mean, rather than using sums of squares, for precision
+            segment_lengths = np.diff(np.append(segment_starts, len(sorted_values)))
+            deviations = sorted_values - np.repeat(means, segment_lengths, axis=0)
+            squared_deviations = np.add.reduceat(
+                np.where(is_present, deviations ** 2, 0), segment_starts, axis=0
+            )
+            # Sample standard deviation, to match pandas
+            segment_statistics["std"] = np.sqrt(
+                np.where(counts > 1, squared_deviations / (counts - 1), np.nan)
+            )
+
+    # fmin and fmax ignore NaNs unless every value in a segment is NaN
+    if "min" in statistics:
+        segment_statistics["min"] = np.fmin.reduceat(
+            sorted_values, segment_starts, axis=0
+        )
+    if "max" in statistics:
+        segment_statistics["max"] = np.fmax.reduceat(
+            sorted_values, segment_starts, axis=0
+        )
+
+    return segment_statistics
+
+
+def aggregate_by_group(
+    data: pd.DataFrame,
+    group_ids,
+    statistics: List[str] = DEFAULT_STATISTICS,
+    columns: List[str] = None,
+) -> pd.DataFrame:
+    """ Summarize each column of a DataFrame for each group of rows, e.g. each setpoint.
+
+        Args:
+            data: DataFrame to summarize.
+            group_ids: Array-like of integer group IDs (e.g. setpoint IDs), one per row of data. Rows with a negative
+                group ID (e.g. -1 for rows outside every setpoint) are left out.
+            statistics: Optional. Statistics to compute, from "mean", "std", "count", "min", "max" and "sum".
+                Defaults to mean, std, count, min and max.
+            columns: Optional. Names of the columns to summarize. Defaults to all numeric columns.
+        Returns:
+            DataFrame indexed by group ID, with (column, statistic) MultiIndex columns, matching
+            data.groupby(group_ids)[columns].agg(statistics). NaNs are ignored, as in pandas.
+    """
+    unsupported_statistics = set(statistics) - set(SUPPORTED_STATISTICS)
+    if unsupported_statistics:
+        raise ValueError(
+            f"Unsupported statistics: {sorted(unsupported_statistics)}. Expected any of: {SUPPORTED_STATISTICS}"
+        )
+
+    if columns is None:
+        columns = list(data.select_dtypes("number").columns)
+
+    group_name = getattr(group_ids, "name", None)
+    group_ids = np.asarray(group_ids)
+    is_grouped = group_ids >= 0
+    values = data[columns].values.astype(float)[is_grouped]
+    group_ids = group_ids[is_grouped]
+
+    # Rows are often already in group order, e.g. setpoint IDs of time-sorted data
+    if np.any(group_ids[1:] < group_ids[:-1]):
+        group_order = np.argsort(group_ids, kind="mergesort")
+        group_ids = group_ids[group_order]
+        values = values[group_order]
+
+    segment_starts = np.flatnonzero(
+        np.concatenate([[True], group_ids[1:] != group_ids[:-1]])
+    )[: len(group_ids)]
+    segment_statistics = _get_segment_statistics(values, segment_starts, statistics)
+
+    summary_columns = {
+        (column_name, statistic): (
+            segment_statistics[statistic][:, column_position].astype(np.int64)
+            if statistic == "count"
+            else segment_statistics[statistic][:, column_position]
+        )
+        for column_position, column_name in enumerate(columns)
+        for statistic in statistics
+    }
+    return pd.DataFrame(
+        summary_columns,
+        index=pd.Index(group_ids[segment_starts], name=group_name),
+        columns=pd.MultiIndex.from_tuples(summary_columns.keys()),
+    )
+
+
+def aggregate_by_equilibration_range(
+    data: pd.DataFrame,
+    equilibration_boundaries: pd.DataFrame,
+    statistics: List[str] = DEFAULT_STATISTICS,
+    columns: List[str] = None,
+) -> pd.DataFrame:
+    """ Summarize each column of a datetime indexed DataFrame for each equilibration range.
+
+        Args:
+            data: A datetime indexed DataFrame, e.g. from open_and_combine_picolog_and_calibration_data().
+            equilibration_boundaries: DataFrame of non-overlapping ranges, with start_time and end_time columns,
+                as returned by get_equilibration_boundaries(). Rows exactly at a range boundary are left out.
+            statistics: Optional. Statistics to compute, from "mean", "std", "count", "min", "max" and "sum".
+                Defaults to mean, std, count, min and max.
+            columns: Optional. Names of the columns to summarize. Defaults to all numeric columns.
+        Returns:
+            DataFrame indexed by equilibration range ID (the position of each range in equilibration_boundaries)
+            with start_time and end_time columns, followed by (column, statistic) MultiIndex columns.
+            Ranges without any rows are left out.
+    """
+    range_ids = get_equilibration_range_ids(equilibration_boundaries, data.index)
+    summary = aggregate_by_group(data, range_ids, statistics, columns)
+    summary.index.name = EQUILIBRATION_RANGE_ID_LABEL
+
+    range_times = equilibration_boundaries.iloc[summary.index]
+    summary.insert(0, ("start_time", ""), range_times["start_time"].values)
+    summary.insert(1, ("end_time", ""), range_times["end_time"].values)
+    return summary
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import osmo_jupyter.dataset.aggregate as module
+
+
+@pytest.fixture
+def combined_data():
+    random_state = np.random.RandomState(0)
+    combined_data = pd.DataFrame(
+        {
+            "YSI DO (mmHg)": random_state.normal(100, 10, size=50),
+            "PicoLog temperature (C)": random_state.normal(25, 1, size=50),
+            "equilibration status": "equilibrated",
+        },
+        index=pd.date_range("2019-01-01", periods=50, freq="s", name="timestamp"),
+    )
+    combined_data.iloc[[3, 4, 20], 0] = np.nan
+    return combined_data
+
+
+class TestAggregateByGroup:
+    def test_matches_pandas_groupby(self, combined_data):
+        setpoint_ids = pd.Series(
+            np.random.RandomState(1).randint(0, 5, size=50), name="setpoint ID"
+        )
+        # A group with only one row, which has no standard deviation
+        setpoint_ids[0] = 7
+
+        summary = module.aggregate_by_group(combined_data, setpoint_ids)
+
+        expected_summary = (
+            combined_data.reset_index(drop=True)
+            .groupby(setpoint_ids)[["YSI DO (mmHg)", "PicoLog temperature (C)"]]
+            .agg(module.DEFAULT_STATISTICS)
+        )
+        pd.testing.assert_frame_equal(summary, expected_summary)
+
+    def test_leaves_out_ungrouped_rows(self, combined_data):
+        setpoint_ids = np.repeat([-1, 0, 1, -1, 2], 10)
+
+        summary = module.aggregate_by_group(
+            combined_data,
+            setpoint_ids,
+            statistics=["count", "sum"],
+            columns=["PicoLog temperature (C)"],
+        )
+
+        assert list(summary.index) == [0, 1, 2]
+        assert list(summary[("PicoLog temperature (C)", "count")]) == [10, 10, 10]
+        np.testing.assert_allclose(
+            summary[("PicoLog temperature (C)", "sum")],
+            combined_data["PicoLog temperature (C)"]
+            .values.reshape(5, 10)
+            .sum(axis=1)[[1, 2, 4]],
+        )
+
+    def test_raises_on_unsupported_statistic(self, combined_data):
+        with pytest.raises(ValueError):
+            module.aggregate_by_group(
+                combined_data, np.zeros(50), statistics=["median"]
+            )
+
+
+def test_aggregate_by_equilibration_range(combined_data):
+    equilibration_boundaries = pd.DataFrame(
+        {
+            "start_time": pd.to_datetime(
+                ["2019-01-01 00:00:30", "2019-01-01 00:00:00"]
+            ),
+            "end_time": pd.to_datetime(["2019-01-01 00:00:40", "2019-01-01 00:00:10"]),
+        }
+    )
+
+    summary = module.aggregate_by_equilibration_range(
+        combined_data, equilibration_boundaries, statistics=["mean"]
+    )
+
+    assert list(summary.index) == [0, 1]
+    assert summary.index.name == "equilibration range ID"
+    assert list(summary[("start_time", "")]) == list(
+        equilibration_boundaries["start_time"]
+    )
+    np.testing.assert_allclose(
+        summary[("PicoLog temperature (C)", "mean")],
+        [
+            combined_data["PicoLog temperature (C)"].iloc[31:40].mean(),
+            combined_data["PicoLog temperature (C)"].iloc[1:10].mean(),
+        ],
+    )
@@ -0,0 +1,223 @@
+""" Time and memory-profile the source file parsers over synthetic files of increasing length, so that changes in how
+    they scale are visible. Results are written as JSON, so that runs can be compared over time.
+
+    Like osmo_jupyter.dataset.synthetic, this module isn't imported by osmo_jupyter.dataset. Import it explicitly:
+        from osmo_jupyter.dataset import benchmark
+        benchmark.run_parse_benchmarks("benchmark_results.json")
+
+    The process_*_files batch functions are benchmarked on a batch of one file, processed in the current process,
+    so that their results are comparable to the single-file functions and don't depend on the number of CPUs.
+    parse_data_collection_log() isn't benchmarked: its size grows with the number of data collection attempts
+    rather than rows of sensor data, there is no synthetic data collection log, and it keeps its parsed output in
+    memory, so repeated runs wouldn't measure parsing.
+"""
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from osmo_jupyter import spectrometer
+from . import cache, parse, synthetic
+
+BENCHMARK_ROW_COUNTS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+# Spectrometer files have about 500 bytes per row, many times more than the other files, so they are benchmarked up to
+# fewer rows to keep the largest file around 50 MB
+BENCHMARK_ROW_COUNTS_BY_FILE_TYPE = {
+    "spectrometer": [10 ** 3, 10 ** 4, 10 ** 5],
+}
+
+
+def _process_as_batch(process_files_function: Callable) -> Callable:
+    def process_file_as_batch(filepath):
+        return process_files_function([filepath], max_workers=1)
+
+    return process_file_as_batch
+
+
+def _process_in_chunks(iter_file_chunks_function: Callable) -> Callable:
+    def process_file_in_chunks(filepath):
+        # Only one processed chunk is held at a time, as when streaming a long log
+        for _ in parse.process_ysi_chunks(iter_file_chunks_function(filepath)):
+            pass
+
+    return process_file_in_chunks
+
+
+# (benchmark name, synthetic file type, function that parses a filepath)
+BENCHMARKS = [
+    ("parse_ysi_prosolo_file", "ysi_prosolo", parse.parse_ysi_prosolo_file),
+    ("parse_ysi_proodo_file", "ysi_proodo", parse.parse_ysi_proodo_file),
+    ("parse_picolog_file", "pico", parse.parse_picolog_file),
+    ("parse_calibration_log_file", "calibration_log", parse.parse_calibration_log_file),
+    ("process_ysi_prosolo_file", "ysi_prosolo", parse.process_ysi_prosolo_file),
+    ("process_ysi_proodo_file", "ysi_proodo", parse.process_ysi_proodo_file),
+    (
+        "process_calibration_log_file",
+        "calibration_log",
+        parse.process_calibration_log_file,
+    ),
+    (
+        "process_ysi_prosolo_files",
+        "ysi_prosolo",
+        _process_as_batch(parse.process_ysi_prosolo_files),
+    ),
+    (
+        "process_ysi_proodo_files",
+        "ysi_proodo",
+        _process_as_batch(parse.process_ysi_proodo_files),
+    ),
+    (
+        "process_calibration_log_files",
+        "calibration_log",
+        _process_as_batch(parse.process_calibration_log_files),
+    ),
+    (
+        "process_ysi_chunks (ProSolo)",
+        "ysi_prosolo",
+        _process_in_chunks(parse.iter_ysi_prosolo_file_chunks),
+    ),
+    (
+        "process_ysi_chunks (ProODO)",
+        "ysi_proodo",
+        _process_in_chunks(parse.iter_ysi_proodo_file_chunks),
+    ),
+    (
+        "import_and_format_spectrometer_data",
+        "spectrometer",
+        spectrometer.import_and_format_spectrometer_data,
+    ),
+]
+
+
+def _time_function(function: Callable, filepath: str, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function(filepath)
+        durations.append(time.perf_counter() - start_time)
+
+    # The fastest run is the least affected by other activity on the machine
+    return min(durations)
+
+
+def _measure_peak_memory(function: Callable, filepath: str) -> int:
+    # Measured in a separate run, since tracing allocations slows the function down
+    tracemalloc.start()
+    try:
+        function(filepath)
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak_memory_bytes
+
+
+def _get_environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def _get_row_counts_by_file_type(
+    row_counts: Union[List[int], Dict[str, List[int]], None], file_types
+) -> Dict[str, List[int]]:
+    if row_counts is None:
+        row_counts = BENCHMARK_ROW_COUNTS_BY_FILE_TYPE
+    if not isinstance(row_counts, dict):
+        return {file_type: row_counts for file_type in file_types}
+
+    return {
+        file_type: row_counts.get(file_type, BENCHMARK_ROW_COUNTS)
+        for file_type in file_types
+    }
+
+
+def run_parse_benchmarks(
+    output_filepath: str,
+    row_counts: Union[List[int], Dict[str, List[int]]] = None,
+    benchmark_names: List[str] = None,
+    repeat: int = 3,
+) -> List[Dict]:
+    """ Time and measure the peak memory use of each parser over synthetic files with each number of rows.
+        The parse cache is bypassed, so that only parsing is measured.
+
+        Args:
+            output_filepath: Filepath to write JSON results to.
+            row_counts: Optional. Numbers of rows to benchmark, either one list for every file type or a dictionary
+                of lists by synthetic file type (types that are left out use BENCHMARK_ROW_COUNTS). Defaults to
+                BENCHMARK_ROW_COUNTS_BY_FILE_TYPE: 1e3 through 1e6 rows, or 1e5 rows for spectrometer files.
+            benchmark_names: Optional. Names of the benchmarks (from BENCHMARKS) to run. Defaults to all.
+            repeat: Optional. Number of timed runs of each benchmark; the fastest is reported. Defaults to 3.
+        Returns:
+            List of results, each a dictionary with benchmark, row_count, file_size_bytes, seconds,
+            rows_per_second and peak_memory_bytes.
+    """
+    benchmarks = [
+        benchmark
+        for benchmark in BENCHMARKS
+        if benchmark_names is None or benchmark[0] in benchmark_names
+    ]
+    row_counts_by_file_type = _get_row_counts_by_file_type(
+        row_counts, {file_type for _, file_type, _ in benchmarks}
+    )
+    all_row_counts = sorted(
+        {
+            row_count
+            for file_row_counts in row_counts_by_file_type.values()
+            for row_count in file_row_counts
+        }
+    )
+
+    results = []
+    for row_count in all_row_counts:
+        # Only the files needed at this row count are written, one row count at a time
+        with tempfile.TemporaryDirectory() as synthetic_files_directory:
+            filepaths = {}
+            for file_type, file_row_counts in row_counts_by_file_type.items():
+                if row_count in file_row_counts:
+                    write_function, filename = synthetic.SYNTHETIC_FILE_WRITERS[
+                        file_type
+                    ]
+                    filepaths[file_type] = os.path.join(
+                        synthetic_files_directory, filename
+                    )
+                    write_function(filepaths[file_type], row_count)
+
+            for benchmark_name, file_type, function in benchmarks:
+                if file_type not in filepaths:
+                    continue
+                filepath = filepaths[file_type]
+
+                with cache.parse_cache_disabled():
+                    seconds = _time_function(function, filepath, repeat)
+                    peak_memory_bytes = _measure_peak_memory(function, filepath)
+
+                results.append(
+                    {
+                        "benchmark": benchmark_name,
+                        "row_count": row_count,
+                        "file_size_bytes": os.path.getsize(filepath),
+                        "seconds": seconds,
+                        "rows_per_second": row_count / seconds,
+                        "peak_memory_bytes": peak_memory_bytes,
+                    }
+                )
+
+    with open(output_filepath, "w") as output_file:
+        json.dump(
+            {"environment": _get_environment(), "results": results},
+            output_file,
+            indent=2,
+        )
+
+    return results
@@ -0,0 +1,55 @@
+import json
+
+import osmo_jupyter.dataset.benchmark as module
+
+
+def test_run_parse_benchmarks_writes_results(tmp_path):
+    output_filepath = tmp_path / "benchmarks.json"
+
+    module.run_parse_benchmarks(
+        str(output_filepath),
+        row_counts=[10, 20],
+        benchmark_names=["parse_picolog_file", "process_calibration_log_file"],
+        repeat=1,
+    )
+
+    benchmarks = json.loads(output_filepath.read_text())
+    assert set(benchmarks["environment"]) == {"python", "pandas", "numpy", "platform"}
+    assert [
+        (result["benchmark"], result["row_count"]) for result in benchmarks["results"]
+    ] == [
+        ("parse_picolog_file", 10),
+        ("process_calibration_log_file", 10),
+        ("parse_picolog_file", 20),
+        ("process_calibration_log_file", 20),
+    ]
+    assert all(
+        result["seconds"] > 0 and result["peak_memory_bytes"] > 0
+        for result in benchmarks["results"]
+    )
+
+
+def test_run_parse_benchmarks_uses_row_counts_by_file_type(tmp_path):
+    results = module.run_parse_benchmarks(
+        str(tmp_path / "benchmarks.json"),
+        row_counts={"spectrometer": [10], "ysi_proodo": [10, 20]},
+        benchmark_names=[
+            "import_and_format_spectrometer_data",
+            "process_ysi_proodo_files",
+            "process_ysi_chunks (ProODO)",
+        ],
+        repeat=1,
+    )
+
+    assert [(result["benchmark"], result["row_count"]) for result in results] == [
+        ("process_ysi_proodo_files", 10),
+        ("process_ysi_chunks (ProODO)", 10),
+        ("import_and_format_spectrometer_data", 10),
+        ("process_ysi_proodo_files", 20),
+        ("process_ysi_chunks (ProODO)", 20),
+    ]
+
+
+def test_default_row_counts_are_capped():
+    assert max(module.BENCHMARK_ROW_COUNTS) <= 10 ** 6
+    assert max(module.BENCHMARK_ROW_COUNTS_BY_FILE_TYPE["spectrometer"]) <= 10 ** 5
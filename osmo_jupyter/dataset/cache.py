@@ -0,0 +1,339 @@
+""" An opt-in, on-disk cache of parsed source data files, so that re-opening an unchanged file is fast.
+"""
+import contextlib
+import functools
+import hashlib
+import inspect
+import os
+import tempfile
+import threading
+from typing import Callable, Dict
+
+import pandas as pd
+
+DEFAULT_MAX_CACHE_SIZE_BYTES = 2 ** 30  # 1 GiB
+
+# Bump this if the on-disk format of cache entries changes
+CACHE_FORMAT_VERSION = 1
+
+_CACHE_ENTRY_SUFFIX = ".pkl"
+
+_cache_configuration = {
+    "directory": None,
+    "max_size_bytes": DEFAULT_MAX_CACHE_SIZE_BYTES,
+}
+_cache_statistics = {"hits": 0, "misses": 0}
+# Cached values may be loaded from many threads at once, e.g. by pipeline stages running in parallel
+_cache_statistics_lock = threading.Lock()
+
+# Set while a cached parser computes its output, so that cached parsers it calls (e.g. the parse_* function used by a
+# process_* function) skip the cache instead of storing a second entry for the same file
+_parsing_state = threading.local()
+
+
+def enable_parse_cache(
+    cache_directory: str, max_size_bytes: int = DEFAULT_MAX_CACHE_SIZE_BYTES
+) -> None:
+    """ Turn on caching of parsed files for every cached parser (e.g. the parse_* and process_* functions in
+        osmo_jupyter.dataset.parse).
+
+        Args:
+            cache_directory: Local directory to store cache entries in. Created if it doesn't exist.
+            max_size_bytes: Optional. Once the cache grows beyond this size, the least recently used entries
+                are removed. Defaults to 1 GiB.
+    """
+    os.makedirs(cache_directory, exist_ok=True)
+    _cache_configuration["directory"] = cache_directory
+    _cache_configuration["max_size_bytes"] = max_size_bytes
+
+
+def disable_parse_cache() -> None:
+    """ Turn off caching of parsed files. Existing cache entries are left on disk.
+    """
+    _cache_configuration["directory"] = None
+
+
+@contextlib.contextmanager
+def parse_cache_disabled():
+    """ Context manager that turns off caching of parsed files within its block, then restores the previous cache
+        configuration.
+    """
+    cache_directory = _cache_configuration["directory"]
+    disable_parse_cache()
+    try:
+        yield
+    finally:
+        _cache_configuration["directory"] = cache_directory
+
+
+def get_parse_cache_statistics() -> Dict[str, int]:
+    """ Get the number of cache hits and misses since the cache statistics were last reset.
+
+        Returns:
+            dictionary with "hits" and "misses" counts.
+    """
+    with _cache_statistics_lock:
+        return dict(_cache_statistics)
+
+
+def reset_parse_cache_statistics() -> None:
+    """ Reset the cache hit and miss counters to zero.
+    """
+    with _cache_statistics_lock:
+        _cache_statistics["hits"] = 0
+        _cache_statistics["misses"] = 0
+
+
+def _count_cache_lookup(is_hit: bool) -> None:
+    with _cache_statistics_lock:
+        _cache_statistics["hits" if is_hit else "misses"] += 1
+
+
+def clear_parse_cache() -> None:
+    """ Remove every entry from the currently enabled cache directory.
+    """
+    for entry_path in _get_cache_entry_paths():
+        os.remove(entry_path)
+
+
+def _get_cache_entry_paths():
+    cache_directory = _cache_configuration["directory"]
+    if cache_directory is None:
+        return []
+
+    return [
+        os.path.join(cache_directory, filename)
+        for filename in os.listdir(cache_directory)
+        if filename.endswith(_CACHE_ENTRY_SUFFIX)
+    ]
+
+
+def _get_cache_entry_path(key: str) -> str:
+    return os.path.join(_cache_configuration["directory"], key + _CACHE_ENTRY_SUFFIX)
+
+
+def get_cache_key(*key_components) -> str:
+    """ Build a cache key for a value that isn't parsed from a single file, e.g. a pipeline stage's output.
+
+        Args:
+            *key_components: Values that together identify the cached value. Their repr() is hashed, so they should
+                have a complete, stable repr (e.g. strings, numbers and nested lists or tuples of them).
+        Returns:
+            Cache key to use with load_cached_value() and store_cached_value().
+    """
+    return hashlib.sha1(
+        repr([CACHE_FORMAT_VERSION] + list(key_components)).encode()
+    ).hexdigest()
+
+
+def _get_file_cache_key(filepath, function_name, version, arguments) -> str:
+    absolute_path = os.path.abspath(filepath)
+    file_stat = os.stat(absolute_path)
+
+    return get_cache_key(
+        function_name,
+        version,
+        absolute_path,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+        arguments,
+    )
+
+
+_CONTENT_HASH_CHUNK_SIZE_BYTES = 2 ** 20
+
+
+def _get_file_content_hash(filepath) -> str:
+    content_hash = hashlib.sha1()
+    with open(filepath, "rb") as source_file:
+        for chunk in iter(
+            lambda: source_file.read(_CONTENT_HASH_CHUNK_SIZE_BYTES), b""
+        ):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def _get_file_content_cache_key(filepath, function_name, version, arguments) -> str:
+    return get_cache_key(
+        function_name, version, _get_file_content_hash(filepath), arguments
+    )
+
+
+def _get_call_arguments(signature: inspect.Signature, args, kwargs):
+    """ Get the arguments of a call after the filepath as (name, value) pairs, with defaults filled in, so that
+        equivalent calls (e.g. with a default passed explicitly, or positionally rather than by keyword) have the
+        same cache key.
+    """
+    bound_arguments = signature.bind(*args, **kwargs)
+    bound_arguments.apply_defaults()
+    _, *arguments = bound_arguments.arguments.items()
+    return [
+        (name, sorted(value.items()) if isinstance(value, dict) else value)
+        for name, value in arguments
+    ]
+
+
+def _load_cache_entry(key: str):
+    """ Load a cached value by key, raising KeyError if there is no entry for this key.
+        Loading an entry marks it as recently used.
+    """
+    entry_path = _get_cache_entry_path(key)
+    try:
+        value = pd.read_pickle(entry_path)
+    except FileNotFoundError:
+        raise KeyError(key)
+
+    # Cache entry modification times are used to track how recently each entry was used
+    try:
+        os.utime(entry_path)
+    except FileNotFoundError:  # Evicted by another thread or process since it was read, but the value is intact
+        pass
+    return value
+
+
+def _store_cache_entry(key: str, value) -> None:
+    cache_directory = _cache_configuration["directory"]
+
+    # Write to a temporary file first so that other processes never see a partially-written entry
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=cache_directory, suffix=".tmp"
+    )
+    os.close(file_descriptor)
+    pd.to_pickle(value, temporary_path)
+    os.replace(temporary_path, _get_cache_entry_path(key))
+
+    _evict_least_recently_used_entries()
+
+
+def _evict_least_recently_used_entries():
+    entries = []
+    for entry_path in _get_cache_entry_paths():
+        try:
+            entry_stat = os.stat(entry_path)
+        except FileNotFoundError:  # Removed by another process
+            continue
+        entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry_path))
+
+    cache_size_bytes = sum(entry_size for _, entry_size, _ in entries)
+
+    for _, entry_size, entry_path in sorted(entries):
+        if cache_size_bytes <= _cache_configuration["max_size_bytes"]:
+            break
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
+        cache_size_bytes -= entry_size
+
+
+def load_cached_value(key: str):
+    """ Load a value stored with store_cached_value(), counting the cache hit or miss.
+
+        Args:
+            key: Cache key from get_cache_key().
+        Returns:
+            The cached value.
+        Raises:
+            KeyError: if caching is turned off or there is no entry for this key.
+    """
+    if _cache_configuration["directory"] is None:
+        raise KeyError(key)
+
+    try:
+        value = _load_cache_entry(key)
+    except KeyError:
+        _count_cache_lookup(is_hit=False)
+        raise
+
+    _count_cache_lookup(is_hit=True)
+    return value
+
+
+def store_cached_value(key: str, value) -> None:
+    """ Store a value in the cache, if caching has been turned on with enable_parse_cache().
+
+        Args:
+            key: Cache key from get_cache_key().
+            value: Any picklable value.
+    """
+    if _cache_configuration["directory"] is None:
+        return
+
+    _store_cache_entry(key, value)
+
+
+def _get_source_filepath(filepath_or_buffer):
+    """ Get the path of the file to be parsed, or None if it isn't an existing file. Open file objects are
+        identified by the path they were opened with.
+    """
+    if isinstance(filepath_or_buffer, (str, os.PathLike)):
+        filepath = filepath_or_buffer
+    else:
+        filepath = getattr(filepath_or_buffer, "name", None)
+        if not isinstance(filepath, (str, os.PathLike)):
+            return None
+
+    return filepath if os.path.isfile(filepath) else None
+
+
+def cached_parser(version, key_by_content: bool = False) -> Callable:
+    """ Decorator to cache the output of a function that parses a file, given its filepath (or a file object opened
+        from a filepath) as the first argument.
+        Cache entries are keyed by the absolute path, size and modification time of the file, the decorated
+        function and its other arguments (with defaults filled in), and the provided version. Caching is skipped
+        entirely unless it has been turned on with enable_parse_cache(), or if the first argument isn't an existing
+        file. Cached parsers called by the decorated function don't store entries of their own.
+
+        Args:
+            version: Parser version. Change this whenever the decorated function's output changes, to invalidate
+                any entries produced by older versions.
+            key_by_content: Optional. If True, key entries by a hash of the file's contents instead of its path, size
+                and modification time, so that copied or re-written files with unchanged contents are cache hits.
+                Hashing reads the whole file, so this is best for files that are slow to parse relative to their size.
+        Returns:
+            A decorator that wraps a parsing function with the cache.
+    """
+
+    def decorator(parse_function):
+        function_name = f"{parse_function.__module__}.{parse_function.__qualname__}"
+        signature = inspect.signature(parse_function)
+
+        @functools.wraps(parse_function)
+        def cached_parse_function(filepath, *args, **kwargs):
+            if _cache_configuration["directory"] is None or getattr(
+                _parsing_state, "is_parsing", False
+            ):
+                return parse_function(filepath, *args, **kwargs)
+
+            source_filepath = _get_source_filepath(filepath)
+            if source_filepath is None:
+                return parse_function(filepath, *args, **kwargs)
+
+            get_cache_key = (
+                _get_file_content_cache_key if key_by_content else _get_file_cache_key
+            )
+            key = get_cache_key(
+                source_filepath,
+                function_name,
+                version,
+                _get_call_arguments(signature, (filepath,) + args, kwargs),
+            )
+            try:
+                parsed = _load_cache_entry(key)
+            except KeyError:
+                _count_cache_lookup(is_hit=False)
+            else:
+                _count_cache_lookup(is_hit=True)
+                return parsed
+
+            _parsing_state.is_parsing = True
+            try:
+                parsed = parse_function(filepath, *args, **kwargs)
+            finally:
+                _parsing_state.is_parsing = False
+            _store_cache_entry(key, parsed)
+            return parsed
+
+        return cached_parse_function
+
+    return decorator
@@ -0,0 +1,244 @@
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, sentinel
+
+import pandas as pd
+import pytest
+
+import osmo_jupyter.dataset.cache as module
+
+
+@pytest.fixture
+def cache_directory(tmp_path):
+    cache_directory = tmp_path / "cache"
+    module.enable_parse_cache(str(cache_directory))
+    module.reset_parse_cache_statistics()
+    yield cache_directory
+    module.disable_parse_cache()
+    module.reset_parse_cache_statistics()
+
+
+@pytest.fixture
+def source_file_path(tmp_path):
+    source_file_path = tmp_path / "source.csv"
+    source_file_path.write_text("a,b\n1,2\n")
+    return str(source_file_path)
+
+
+def _mock_parser(return_value=None):
+    if return_value is None:
+        return_value = pd.DataFrame({"a": [1.0, 2.0]})
+    mock_parser = Mock(return_value=return_value)
+    mock_parser.__name__ = "mock_parser"
+    mock_parser.__qualname__ = "mock_parser"
+    return mock_parser
+
+
+class TestCachedParser:
+    def test_calls_through_when_cache_disabled(self, source_file_path):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        cached_mock_parser(source_file_path)
+        cached_mock_parser(source_file_path)
+
+        assert mock_parser.call_count == 2
+        assert module.get_parse_cache_statistics() == {"hits": 0, "misses": 0}
+
+    def test_second_call_is_a_cache_hit(self, cache_directory, source_file_path):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        first_result = cached_mock_parser(source_file_path)
+        second_result = cached_mock_parser(source_file_path)
+
+        mock_parser.assert_called_once_with(source_file_path)
+        pd.testing.assert_frame_equal(first_result, second_result)
+        assert module.get_parse_cache_statistics() == {"hits": 1, "misses": 1}
+
+    def test_modified_file_is_a_cache_miss(self, cache_directory, source_file_path):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        cached_mock_parser(source_file_path)
+        with open(source_file_path, "a") as source_file:
+            source_file.write("3,4\n")
+        cached_mock_parser(source_file_path)
+
+        assert mock_parser.call_count == 2
+        assert module.get_parse_cache_statistics() == {"hits": 0, "misses": 2}
+
+    def test_version_and_arguments_are_part_of_key(
+        self, cache_directory, source_file_path
+    ):
+        mock_parser = _mock_parser()
+
+        module.cached_parser(version=1)(mock_parser)(source_file_path)
+        module.cached_parser(version=2)(mock_parser)(source_file_path)
+        module.cached_parser(version=2)(mock_parser)(source_file_path, chunk_size=5)
+
+        assert mock_parser.call_count == 3
+
+    def test_skips_cache_for_non_filepaths(self, cache_directory):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        cached_mock_parser(sentinel.filepath)
+        cached_mock_parser(sentinel.filepath)
+
+        assert mock_parser.call_count == 2
+        assert module.get_parse_cache_statistics() == {"hits": 0, "misses": 0}
+
+    def test_evicts_least_recently_used_entries(self, cache_directory, tmp_path):
+        mock_parser = _mock_parser(pd.DataFrame({"a": range(1000)}))
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        source_file_paths = []
+        for i in range(3):
+            source_file_path = tmp_path / f"source_{i}.csv"
+            source_file_path.write_text(str(i))
+            source_file_paths.append(str(source_file_path))
+
+        cached_mock_parser(source_file_paths[0])
+        entry_size_bytes = sum(
+            os.path.getsize(entry_path)
+            for entry_path in module._get_cache_entry_paths()
+        )
+        module.enable_parse_cache(
+            str(cache_directory), max_size_bytes=2 * entry_size_bytes
+        )
+
+        cached_mock_parser(source_file_paths[1])
+        # Age both entries, then make the first one the most recently used before pushing the cache over its limit
+        for entry_path in module._get_cache_entry_paths():
+            os.utime(entry_path, (0, 0))
+        cached_mock_parser(source_file_paths[0])
+        cached_mock_parser(source_file_paths[2])
+
+        assert len(module._get_cache_entry_paths()) == 2
+
+        mock_parser.reset_mock()
+        cached_mock_parser(source_file_paths[0])
+        cached_mock_parser(source_file_paths[2])
+        mock_parser.assert_not_called()
+
+    def test_clear_removes_entries(self, cache_directory, source_file_path):
+        module.cached_parser(version=1)(_mock_parser())(source_file_path)
+
+        module.clear_parse_cache()
+
+        assert module._get_cache_entry_paths() == []
+
+    def test_caches_open_files_by_name(self, cache_directory, source_file_path):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+        with open(source_file_path, "rb") as source_file:
+            cached_mock_parser(source_file)
+        cached_mock_parser(source_file_path)
+
+        assert mock_parser.call_count == 1
+        assert module.get_parse_cache_statistics() == {"hits": 1, "misses": 1}
+
+    def test_key_by_content_ignores_path_and_modification_time(
+        self, cache_directory, source_file_path, tmp_path
+    ):
+        mock_parser = _mock_parser()
+        cached_mock_parser = module.cached_parser(version=1, key_by_content=True)(
+            mock_parser
+        )
+        copied_file_path = tmp_path / "copy.csv"
+        copied_file_path.write_text("a,b\n1,2\n")
+
+        cached_mock_parser(source_file_path)
+        cached_mock_parser(str(copied_file_path))
+        with open(source_file_path, "a") as source_file:
+            source_file.write("3,4\n")
+        cached_mock_parser(source_file_path)
+
+        assert mock_parser.call_count == 2
+        assert module.get_parse_cache_statistics() == {"hits": 1, "misses": 2}
+
+    def test_equivalent_calls_share_an_entry(self, cache_directory, source_file_path):
+        mock_parser = _mock_parser()
+
+        @module.cached_parser(version=1)
+        def parser(filepath, compact=False, max_gap=None):
+            return mock_parser(filepath, compact, max_gap)
+
+        parser(source_file_path)
+        parser(source_file_path, compact=False)
+        parser(source_file_path, False, max_gap=None)
+        functools.partial(parser, max_gap=None, compact=False)(source_file_path)
+
+        assert mock_parser.call_count == 1
+        assert len(module._get_cache_entry_paths()) == 1
+
+    def test_nested_cached_parsers_store_one_entry(
+        self, cache_directory, source_file_path
+    ):
+        mock_parser = _mock_parser()
+        inner_parser = module.cached_parser(version=1)(mock_parser)
+
+        @module.cached_parser(version=1)
+        def outer_parser(filepath):
+            return inner_parser(filepath) * 2
+
+        outer_parser(source_file_path)
+        outer_parser(source_file_path)
+
+        assert mock_parser.call_count == 1
+        assert len(module._get_cache_entry_paths()) == 1
+
+
+def test_parse_cache_disabled_restores_cache(cache_directory, source_file_path):
+    mock_parser = _mock_parser()
+    cached_mock_parser = module.cached_parser(version=1)(mock_parser)
+
+    with module.parse_cache_disabled():
+        cached_mock_parser(source_file_path)
+    cached_mock_parser(source_file_path)
+
+    assert mock_parser.call_count == 2
+    assert module.get_parse_cache_statistics() == {"hits": 0, "misses": 1}
+
+
+class TestCachedValues:
+    def test_stored_value_is_a_cache_hit(self, cache_directory):
+        key = module.get_cache_key("stage", 1, ["parameter"])
+
+        with pytest.raises(KeyError):
+            module.load_cached_value(key)
+        module.store_cached_value(key, pd.DataFrame({"a": [1.0]}))
+        cached_value = module.load_cached_value(key)
+
+        pd.testing.assert_frame_equal(cached_value, pd.DataFrame({"a": [1.0]}))
+        assert module.get_parse_cache_statistics() == {"hits": 1, "misses": 1}
+
+    def test_nothing_is_cached_when_cache_disabled(self):
+        key = module.get_cache_key("stage", 1)
+
+        module.store_cached_value(key, sentinel.value)
+
+        with pytest.raises(KeyError):
+            module.load_cached_value(key)
+        assert module.get_parse_cache_statistics() == {"hits": 0, "misses": 0}
+
+    def test_entry_evicted_while_loading_is_a_cache_hit(self, cache_directory, mocker):
+        key = module.get_cache_key("stage", 1)
+        module.store_cached_value(key, "value")
+        # Another thread or process removes the entry after it has been read
+        mocker.patch.object(module.os, "utime", side_effect=FileNotFoundError)
+
+        assert module.load_cached_value(key) == "value"
+        assert module.get_parse_cache_statistics() == {"hits": 1, "misses": 0}
+
+    def test_counts_every_lookup_from_many_threads(self, cache_directory):
+        key = module.get_cache_key("stage", 1)
+        module.store_cached_value(key, "value")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: module.load_cached_value(key), range(200)))
+
+        assert module.get_parse_cache_statistics() == {"hits": 200, "misses": 0}
@@ -1,17 +1,152 @@
-from typing import List
+import functools
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from .source_files import get_all_experiment_image_filenames
+from .cache import cached_parser
+from .source_files import (
+    get_all_experiment_image_filenames,
+    get_experiment_data_files_by_type,
+    select_latest_generation_filepaths,
+)
 from .parse import (
     parse_picolog_file,
     parse_calibration_log_file,
-    datetime_from_filename,
+    parse_ysi_proodo_file,
+    parse_ysi_prosolo_file,
+    datetimes_from_filenames,
+    get_interval_ids,
 )
 
 
+# Bump this whenever the output of pivot_process_experiment_results_on_ROI() changes,
+# so that previously cached pivoted results are not reused
+PROCESS_EXPERIMENT_RESULTS_VERSION = 1
+
+JOIN_METHODS = ["resample", "linear", "nearest"]
+
+
+def _interpolate_at_timestamps(
+    data: pd.DataFrame, timestamps: pd.DatetimeIndex, method: str, tolerance
+) -> Tuple[np.ndarray, np.ndarray]:
+    """ Interpolate sorted, numeric time series data at arbitrary timestamps with a binary search for the data
+        points on either side of each timestamp, rather than by resampling the data.
+
+        Args:
+            data: Datetime-indexed DataFrame of numeric columns, sorted by timestamp.
+            timestamps: Timestamps to interpolate at, in any order.
+            method: "linear" to interpolate between the data points on either side, or "nearest" to use the closest.
+            tolerance: Largest time between a timestamp and the data point(s) used for it, or None for no limit.
+        Returns:
+            Tuple of:
+                boolean mask of the timestamps that could be interpolated within tolerance
+                2D array of interpolated values for those timestamps, one column per data column
+    """
+    source_ns = pd.DatetimeIndex(data.index).asi8
+    target_ns = pd.DatetimeIndex(timestamps).asi8
+    source_values = data.values.astype(float)
+    tolerance_ns = np.inf if tolerance is None else pd.Timedelta(tolerance).value
+
+    if len(source_ns) == 0:
+        return np.zeros(len(target_ns), dtype=bool), source_values
+
+    # Positions of the last data point at or before, and the first data point at or after, each timestamp
+    after_positions = np.searchsorted(source_ns, target_ns, side="left")
+    is_exact_match = (after_positions < len(source_ns)) & (
+        source_ns[np.clip(after_positions, 0, len(source_ns) - 1)] == target_ns
+    )
+    before_positions = np.where(is_exact_match, after_positions, after_positions - 1)
+
+    has_before = before_positions >= 0
+    has_after = after_positions < len(source_ns)
+    clipped_before_positions = np.clip(before_positions, 0, len(source_ns) - 1)
+    clipped_after_positions = np.clip(after_positions, 0, len(source_ns) - 1)
+    time_since_before = target_ns - source_ns[clipped_before_positions]
+    time_until_after = source_ns[clipped_after_positions] - target_ns
+
+    if method == "nearest":
+        use_after = has_after & (~has_before | (time_until_after < time_since_before))
+        nearest_positions = np.where(
+            use_after, clipped_after_positions, clipped_before_positions
+        )
+        distances = np.where(use_after, time_until_after, time_since_before)
+        is_matched = (has_before | has_after) & (distances <= tolerance_ns)
+        return is_matched, source_values[nearest_positions[is_matched]]
+
+    is_matched = (
+        has_before
+        & has_after
+        & (time_since_before <= tolerance_ns)
+        & (time_until_after <= tolerance_ns)
+    )
+    before_ns = source_ns[clipped_before_positions[is_matched]]
+    interval_ns = source_ns[clipped_after_positions[is_matched]] - before_ns
+    # Exact matches have a zero-length interval, and take the value of the matching data point
+    weights = np.divide(
+        target_ns[is_matched] - before_ns,
+        interval_ns,
+        out=np.zeros(len(interval_ns)),
+        where=interval_ns != 0,
+    )[:, np.newaxis]
+    before_values = source_values[clipped_before_positions[is_matched]]
+    after_values = source_values[clipped_after_positions[is_matched]]
+    return is_matched, before_values + weights * (after_values - before_values)
+
+
+def _interpolate_files_at_timestamps(
+    file_data: List[pd.DataFrame], timestamps: pd.DatetimeIndex, method: str, tolerance
+) -> Tuple[np.ndarray, pd.DataFrame]:
+    """ Interpolate the data from each of several files at the timestamps within (or, given a tolerance, near) that
+        file's time span, so that no value is interpolated across a gap between files.
+
+        Args:
+            file_data: Datetime-indexed DataFrames of numeric columns, one per file.
+            timestamps: Timestamps to interpolate at, in any order.
+            method: "linear" or "nearest". See _interpolate_at_timestamps().
+            tolerance: Largest time between a timestamp and the data point(s) used for it, or None for no limit.
+        Returns:
+            Tuple of:
+                boolean mask of the timestamps that could be interpolated from some file. Where files overlap,
+                    the first file (in order of file_data) that a timestamp can be interpolated from is used.
+                DataFrame of interpolated values for those timestamps, with the columns of all the files.
+    """
+    columns = sorted(set().union(*(data.columns for data in file_data)))
+    timestamps_ns = pd.DatetimeIndex(timestamps).asi8
+    padding_ns = 0 if tolerance is None else pd.Timedelta(tolerance).value
+
+    is_matched = np.zeros(len(timestamps_ns), dtype=bool)
+    values = np.full((len(timestamps_ns), len(columns)), np.nan)
+    for data in file_data:
+        if data.empty:
+            continue
+
+        sorted_data = data.sort_index(kind="mergesort").reindex(columns=columns)
+        data_ns = pd.DatetimeIndex(sorted_data.index).asi8
+        candidate_positions = np.flatnonzero(
+            ~is_matched
+            & (timestamps_ns >= data_ns[0] - padding_ns)
+            & (timestamps_ns <= data_ns[-1] + padding_ns)
+        )
+
+        is_file_matched, file_values = _interpolate_at_timestamps(
+            sorted_data, timestamps[candidate_positions], method, tolerance
+        )
+        matched_positions = candidate_positions[is_file_matched]
+        is_matched[matched_positions] = True
+        values[matched_positions] = file_values
+
+    return is_matched, pd.DataFrame(values[is_matched], columns=columns)
+
+
 def open_and_combine_picolog_and_calibration_data(
-    calibration_log_filepaths: List[str], picolog_log_filepaths: List[str]
+    calibration_log_filepaths: List[str],
+    picolog_log_filepaths: List[str],
+    join_method: str = "resample",
+    tolerance: pd.Timedelta = None,
 ) -> pd.DataFrame:
     """
         Open and join a collection of PicoLog and calibration environment data files.
@@ -19,19 +154,29 @@ def open_and_combine_picolog_and_calibration_data(
         Args:
             calibration_log_filepaths: A list of filepaths to calibration environment csv data log files.
             picolog_log_filepaths: A list of filepaths to PicoLog csv data files.
+            join_method: Optional. How PicoLog data is matched to calibration log timestamps:
+                "resample" (default): PicoLog data is upsampled to 1 second increments and linearly interpolated,
+                    then joined on exact timestamps.
+                "linear": PicoLog data is linearly interpolated directly at each calibration log timestamp,
+                    without building the 1 second intermediate.
+                "nearest": The closest PicoLog data point to each calibration log timestamp is used.
+            tolerance: Optional. For the "linear" and "nearest" join methods, the largest time between a calibration
+                log timestamp and the PicoLog data point(s) used for it. Defaults to None (no limit). With any join
+                method, each PicoLog file is only used for the calibration log timestamps within its time span
+                (widened by tolerance), so values are never interpolated across gaps between files.
         Returns:
             DataFrame of PicoLog data joined with matching calibration environment data.
-            PicoLog data is upsampled to 1 second increments and linearly interpolated
+            Calibration log rows without matching PicoLog data are dropped.
     """
-    picolog_data = pd.concat(
-        [
-            parse_picolog_file(picolog_filepath)
-            .resample("s")
-            .interpolate(method="slinear")
-            for picolog_filepath in picolog_log_filepaths
-        ],
-        sort=True,
-    )
+    if join_method not in JOIN_METHODS:
+        raise ValueError(
+            f"Unknown join_method {join_method}. Expected one of: {JOIN_METHODS}"
+        )
+
+    picolog_data = [
+        parse_picolog_file(picolog_filepath)
+        for picolog_filepath in picolog_log_filepaths
+    ]
 
     calibration_data = pd.concat(
         [
@@ -41,11 +186,335 @@ def open_and_combine_picolog_and_calibration_data(
         sort=True,
     )
 
-    return calibration_data.join(  # By default join happens on index values
-        picolog_data, how="inner"  # Drop any rows without a match in both DataFrames
+    if join_method == "resample":
+        resampled_picolog_data = pd.concat(
+            [
+                picolog_file_data.resample("s").interpolate(method="slinear")
+                for picolog_file_data in picolog_data
+            ],
+            sort=True,
+        )
+        return calibration_data.join(  # By default join happens on index values
+            resampled_picolog_data,
+            how="inner",  # Drop any rows without a match in both DataFrames
+        )
+
+    # Each file is interpolated separately, as it is resampled separately above, so that calibration log rows in
+    # a gap between PicoLog files are dropped rather than interpolated across the gap
+    is_matched, picolog_values = _interpolate_files_at_timestamps(
+        picolog_data, calibration_data.index, join_method, tolerance
+    )
+
+    combined_data = calibration_data[is_matched].copy()
+    for column_name in picolog_values.columns:
+        combined_data[column_name] = picolog_values[column_name].values
+
+    return combined_data
+
+
+# Sources that AttemptDataset can read, with the number of lines before the first data row of their files
+_ATTEMPT_SOURCES = {
+    "calibration_log": {
+        "parse_function": parse_calibration_log_file,
+        "header_line_count": 1,
+    },
+    "pico": {"parse_function": parse_picolog_file, "header_line_count": 1},
+    "ysi_proodo": {"parse_function": parse_ysi_proodo_file, "header_line_count": 1},
+    "ysi_prosolo": {"parse_function": parse_ysi_prosolo_file, "header_line_count": 6},
+}
+
+# Enough to contain the final row of any source file
+_FILE_TAIL_SIZE_BYTES = 4096
+
+DEFAULT_JOIN_TOLERANCE = pd.Timedelta(minutes=1)
+
+
+def _read_file_time_range(
+    filepath, source: str
+) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """ Get the first and last timestamps in a source data file by parsing only its header, first row and last row.
+
+        Returns:
+            Tuple of first and last timestamps, or None if the file has no data rows.
+    """
+    source_configuration = _ATTEMPT_SOURCES[source]
+
+    with open(filepath, "rb") as source_file:
+        header_and_first_row = [
+            source_file.readline()
+            for _ in range(source_configuration["header_line_count"] + 1)
+        ]
+        source_file.seek(0, os.SEEK_END)
+        source_file.seek(max(0, source_file.tell() - _FILE_TAIL_SIZE_BYTES))
+        file_tail = source_file.read()
+
+    if not header_and_first_row[-1].strip():
+        return None
+
+    last_row = file_tail.rstrip().rsplit(b"\n", 1)[-1] + b"\n"
+    first_and_last_rows = source_configuration["parse_function"](
+        io.BytesIO(b"".join(header_and_first_row) + last_row)
+    )
+    return first_and_last_rows.index[0], first_and_last_rows.index[-1]
+
+
+def _slice_time_range(data: pd.DataFrame, start, end) -> pd.DataFrame:
+    if data.index.is_monotonic_increasing:
+        # Slicing a sorted index by label is a binary search
+        return data.loc[start:end]
+
+    in_range = np.ones(len(data), dtype=bool)
+    if start is not None:
+        in_range &= data.index >= start
+    if end is not None:
+        in_range &= data.index <= end
+    return data[in_range]
+
+
+class AttemptDataset:
+    """ A lazy description of the data wanted from a data collection attempt: which sources (e.g. calibration_log or
+        pico) and which of their columns. No files are read until collect() is called, and then only the files,
+        columns and rows needed for the requested time range: each file's header, first row and last row are read
+        first to find its time range, and only files that overlap the requested range are then parsed, reading
+        only the selected columns.
+
+        Args:
+            files_by_type: pandas Series of lists of filepaths, indexed by source, as returned by
+                source_files.get_experiment_data_files_by_type().
+            selections: Optional. Tuple of (source, columns) pairs selected so far. Prefer select().
+    """
+
+    def __init__(self, files_by_type: pd.Series, selections: Tuple = ()):
+        self.files_by_type = files_by_type
+        self.selections = selections
+
+    @classmethod
+    def from_project_directory(cls, project_directory: str) -> "AttemptDataset":
+        """ Create an AttemptDataset from the data files in a standard Google Drive experiment directory.
+        """
+        return cls(get_experiment_data_files_by_type(project_directory))
+
+    def select(self, source: str, columns: List[str] = None) -> "AttemptDataset":
+        """ Add a source to read, optionally limited to some of its columns.
+            The first selected source provides the timestamps that the other sources are interpolated at.
+
+            Args:
+                source: One of "calibration_log", "pico", "ysi_proodo" or "ysi_prosolo".
+                columns: Optional. Names of the (parsed) columns to read. Defaults to all columns.
+            Returns:
+                A new AttemptDataset that also reads the selected source.
+        """
+        if source not in _ATTEMPT_SOURCES:
+            raise ValueError(
+                f"Unknown source {source}. Expected one of: {list(_ATTEMPT_SOURCES)}"
+            )
+
+        return AttemptDataset(
+            self.files_by_type, self.selections + ((source, columns),)
+        )
+
+    def _read_source(self, source: str, columns: List[str], start, end) -> pd.DataFrame:
+        parse_function = _ATTEMPT_SOURCES[source]["parse_function"]
+
+        source_data = []
+        for filepath in self.files_by_type.get(source, []):
+            time_range = _read_file_time_range(filepath, source)
+            if time_range is None:
+                continue
+
+            first_timestamp, last_timestamp = time_range
+            if (start is not None and last_timestamp < start) or (
+                end is not None and first_timestamp > end
+            ):
+                continue
+
+            file_data = parse_function(filepath, columns=columns)
+            if columns is not None:
+                file_data = file_data[columns]
+            source_data.append(_slice_time_range(file_data, start, end))
+
+        if not source_data:
+            return pd.DataFrame(
+                columns=columns, index=pd.DatetimeIndex([], name="timestamp")
+            )
+
+        return pd.concat(source_data, sort=False).sort_index(kind="mergesort")
+
+    def collect(
+        self,
+        start: pd.Timestamp = None,
+        end: pd.Timestamp = None,
+        join_method: str = "linear",
+        tolerance: pd.Timedelta = DEFAULT_JOIN_TOLERANCE,
+    ) -> pd.DataFrame:
+        """ Read the selected sources within a time range and join them.
+
+            Args:
+                start: Optional. Earliest timestamp to include. Defaults to the start of the data.
+                end: Optional. Latest timestamp to include. Defaults to the end of the data.
+                join_method: Optional. "linear" (default) to interpolate the numeric columns of the other sources
+                    linearly at the first source's timestamps, or "nearest" to use the closest data point.
+                tolerance: Optional. Largest time between a timestamp of the first source and the data point(s)
+                    used for it from the other sources. Defaults to 1 minute.
+            Returns:
+                DataFrame of the first source's rows from start to end (inclusive) that have matching data in every
+                other source, with the other sources' numeric columns added. Non-numeric columns of the other
+                sources are dropped, and columns with the same name as an existing column are suffixed with
+                " (<source>)".
+        """
+        if not self.selections:
+            raise ValueError("No sources selected. Call select() before collect().")
+        if join_method not in ["linear", "nearest"]:
+            raise ValueError(
+                f'Unknown join_method {join_method}. Expected "linear" or "nearest"'
+            )
+
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        (base_source, base_columns), *other_selections = self.selections
+        combined_data = self._read_source(base_source, base_columns, start, end)
+
+        # Data just outside the range is needed to interpolate at its edges
+        padded_start = None if start is None else start - tolerance
+        padded_end = None if end is None else end + tolerance
+
+        for source, columns in other_selections:
+            source_data = self._read_source(
+                source, columns, padded_start, padded_end
+            ).select_dtypes("number")
+
+            is_matched, source_values = _interpolate_at_timestamps(
+                source_data, combined_data.index, join_method, tolerance
+            )
+            combined_data = combined_data[is_matched].copy()
+            for column_position, column_name in enumerate(source_data.columns):
+                if column_name in combined_data.columns:
+                    column_name = f"{column_name} ({source})"
+                combined_data[column_name] = source_values[:, column_position]
+
+        return combined_data
+
+
+STATUS_RUN_COLUMNS = ["status", "start_time", "end_time", "duration", "row_count"]
+
+
+def _get_status_runs_without_filter(status: pd.Series) -> pd.DataFrame:
+    """ Run-length encode a timestamp-indexed series of statuses in one pass, without filtering by duration.
+    """
+    # Compare integer codes rather than status values, so that runs of missing values (code -1) are found too
+    status_codes, unique_statuses = pd.factorize(status.values)
+    is_run_start = np.ones(len(status_codes), dtype=bool)
+    is_run_start[1:] = status_codes[1:] != status_codes[:-1]
+
+    run_start_positions = np.flatnonzero(is_run_start)
+    run_end_positions = np.append(run_start_positions[1:], len(status_codes)) - 1
+
+    # Append a missing value so that the -1 code of missing values looks it up
+    statuses_by_code = np.append(np.asarray(unique_statuses, dtype=object), None)
+
+    timestamps = pd.DatetimeIndex(status.index)
+    start_times = timestamps[run_start_positions]
+    end_times = timestamps[run_end_positions]
+    return pd.DataFrame(
+        {
+            "status": statuses_by_code[status_codes[run_start_positions]],
+            "start_time": start_times,
+            "end_time": end_times,
+            "duration": end_times - start_times,
+            "row_count": run_end_positions - run_start_positions + 1,
+        },
+        columns=STATUS_RUN_COLUMNS,
     )
 
 
+def _filter_status_runs(
+    status_runs: pd.DataFrame, min_duration: pd.Timedelta
+) -> pd.DataFrame:
+    if min_duration is None:
+        return status_runs
+    return status_runs[
+        status_runs["duration"] >= pd.Timedelta(min_duration)
+    ].reset_index(drop=True)
+
+
+def get_status_runs(
+    status: pd.Series, min_duration: pd.Timedelta = None
+) -> pd.DataFrame:
+    """ Find every run of consecutive identical values (e.g. equilibration statuses) in a timestamped series.
+
+        Args:
+            status: A timestamp-indexed Series of status values, in time order.
+            min_duration: Optional. Runs shorter than this (from first to last timestamp) are dropped.
+                Defaults to None, which keeps every run.
+        Returns:
+            DataFrame with one row per run, in time order, and columns:
+                * status
+                * start_time: timestamp of the first value in the run
+                * end_time: timestamp of the last value in the run
+                * duration: end_time - start_time
+                * row_count: number of values in the run
+    """
+    return _filter_status_runs(_get_status_runs_without_filter(status), min_duration)
+
+
+def _join_status_runs(
+    previous_runs: pd.DataFrame, next_runs: pd.DataFrame
+) -> pd.DataFrame:
+    """ Concatenate runs from consecutive chunks, joining the last previous run and the first next run if they're
+        runs of the same status.
+    """
+    status_runs = pd.concat([previous_runs, next_runs], ignore_index=True)
+    boundary = len(previous_runs) - 1
+    boundary_statuses = status_runs["status"].iloc[boundary : boundary + 2]
+
+    if boundary_statuses.nunique(dropna=False) == 1:
+        status_runs.loc[boundary, "end_time"] = status_runs.loc[
+            boundary + 1, "end_time"
+        ]
+        status_runs.loc[boundary, "row_count"] += status_runs.loc[
+            boundary + 1, "row_count"
+        ]
+        status_runs.loc[boundary, "duration"] = (
+            status_runs.loc[boundary, "end_time"]
+            - status_runs.loc[boundary, "start_time"]
+        )
+        status_runs = status_runs.drop(index=boundary + 1).reset_index(drop=True)
+
+    return status_runs
+
+
+def iter_status_runs(
+    status_chunks: Iterable[pd.Series], min_duration: pd.Timedelta = None
+) -> Iterator[pd.DataFrame]:
+    """ Find every run of consecutive identical values in a stream of timestamped series chunks, e.g. the
+        equilibration status column of calibration logs read in chunks. Runs spanning chunk boundaries are joined, so
+        the concatenated output matches get_status_runs() on all of the chunks at once.
+
+        Args:
+            status_chunks: Timestamp-indexed Series of status values, in time order.
+            min_duration: Optional. Runs shorter than this (from first to last timestamp) are dropped.
+                Defaults to None, which keeps every run.
+        Returns:
+            Iterator of DataFrames of completed runs, with the same columns as get_status_runs().
+    """
+    open_run = None
+    for status_chunk in status_chunks:
+        if status_chunk.empty:
+            continue
+
+        status_runs = _get_status_runs_without_filter(status_chunk)
+        if open_run is not None:
+            status_runs = _join_status_runs(open_run, status_runs)
+
+        # The final run of a chunk may continue into the next chunk
+        open_run = status_runs.iloc[-1:]
+        yield _filter_status_runs(status_runs.iloc[:-1], min_duration)
+
+    if open_run is not None:
+        yield _filter_status_runs(open_run.reset_index(drop=True), min_duration)
+
+
 def get_equilibration_boundaries(equilibration_status: pd.Series) -> pd.DataFrame:
     """
         Parse a list of timestamped equilibration statuses into a DataFrame of start
@@ -57,30 +526,31 @@ def get_equilibration_boundaries(equilibration_status: pd.Series) -> pd.DataFram
         Returns:
             DataFrame of start and end times of equilibrated states.
     """
-    # Get a boolean series with timestamped index of equilbrated data points
-    equilibrated_mask = equilibration_status == "equilibrated"
-    leading_edges = equilibrated_mask[equilibrated_mask.astype(int).diff() == 1].index
-    trailing_edges = equilibrated_mask[
-        equilibrated_mask.astype(int).diff(periods=-1) == 1
-    ].index
-
-    # Correct single point ranges to have leading and falling edges
-    if (
-        len(trailing_edges)
-        and len(leading_edges)
-        and trailing_edges[0] < leading_edges[0]
-    ):
-        # Prepend a trailing edge at the start of the dataset as its own leading edge
-        leading_edges = trailing_edges[:1].append(leading_edges)
+    status_runs = get_status_runs(equilibration_status)
+    equilibrated_runs = status_runs[status_runs["status"] == "equilibrated"]
+
+    return equilibrated_runs[["start_time", "end_time"]].reset_index(drop=True)
 
-    if len(trailing_edges) > len(leading_edges):
-        # use the first trailing edge as its own leading edge
-        leading_edges = leading_edges.append(trailing_edges[:1])
-    if len(leading_edges) > len(trailing_edges):
-        # use the final leading edge as its own trailing edge
-        trailing_edges = trailing_edges.append(leading_edges[-1:])
 
-    return pd.DataFrame({"start_time": leading_edges, "end_time": trailing_edges})
+DEFAULT_PIVOT_COLUMN_NAMES = ["r_msorm", "g_msorm", "b_msorm"]
+
+
+def _factorize_sorted(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """ Encode values as integer codes into their sorted unique values, as DataFrame.pivot orders them.
+    """
+    if pd.api.types.is_categorical_dtype(values):
+        # Categories may be unused, or not in sorted order
+        categorical_values = values.cat.remove_unused_categories()
+        categories = categorical_values.cat.categories
+        category_order = np.argsort(categories.values, kind="mergesort")
+        code_lookup = np.empty(len(categories), dtype=np.int64)
+        code_lookup[category_order] = np.arange(len(categories))
+        return (
+            code_lookup[categorical_values.cat.codes.values],
+            categories[category_order],
+        )
+
+    return pd.factorize(values, sort=True)
 
 
 def pivot_process_experiment_results_on_ROI(
@@ -92,7 +562,7 @@ def pivot_process_experiment_results_on_ROI(
         Flatten a DataFrame of process experiment results down to one row per image.
 
         Args:
-            experiment_df: A DataFrame of process experiment summary statistics.
+            experiment_df: A DataFrame of process experiment summary statistics. The ROI column may be categorical.
             ROI_names: Optional. A list of ROI names to select. Defaults to all ROIs present.
             pivot_column_names: Optional. A list of column names to select for each ROI in the pivot.
                 Defaults to all RGB channel MSORMs.
@@ -101,7 +571,7 @@ def pivot_process_experiment_results_on_ROI(
             for every unique ROI in the dataset. NaN values are used when an image is missing an ROI.
     """
     if pivot_column_names is None:
-        pivot_column_names = ["r_msorm", "g_msorm", "b_msorm"]
+        pivot_column_names = DEFAULT_PIVOT_COLUMN_NAMES
 
     if ROI_names:
         experiment_df = experiment_df[experiment_df["ROI"].isin(ROI_names)]
@@ -111,63 +581,152 @@ def pivot_process_experiment_results_on_ROI(
     #     1     DO patch             .4     2019-01-01
     #     1     Reference Patch      .5     2019-01-01
 
-    # Pivot creates a heirachical multiindex data frame with an index for each 'values' column
-    pivot = experiment_df.pivot(
-        index="timestamp", columns="ROI", values=pivot_column_names + ["image"]
-    )
+    # Encode timestamps and ROIs as integer codes, in sorted order, so that every value's position in the pivot is
+    # known without building a MultiIndex
+    timestamp_codes, timestamps = _factorize_sorted(experiment_df["timestamp"])
+    ROI_codes, ROIs = _factorize_sorted(experiment_df["ROI"])
 
-    # After pivot -> Multi-level index
-    #              DO Patch                 Reference Patch
-    # timestamp    image     r_msorm...     image   r_msorm...
-    # 2019-01-01       1          .4            1        .5
+    pivot_positions = timestamp_codes * len(ROIs) + ROI_codes
+    if np.any(np.bincount(pivot_positions, minlength=len(timestamps) * len(ROIs)) > 1):
+        raise ValueError("Index contains duplicate entries, cannot reshape")
 
-    # There's one copy of the image name for each ROI due to the pivot, so pull out the top level index
-    images = pivot["image"][experiment_df["ROI"].values[0]]
-    pivot.drop("image", axis=1, inplace=True)
-    # Flatten the pivot table index, and add images back in
-    pivot.columns = [
+    # Scatter every pivot column's values into one preallocated (timestamp, pivot column, ROI) array, so that it
+    # can be viewed as a (timestamp, pivot column x ROI) table without copying
+    pivot_values = np.full(
+        (len(timestamps), len(pivot_column_names), len(ROIs)), np.nan
+    )
+    pivot_values[timestamp_codes, :, ROI_codes] = experiment_df[
+        pivot_column_names
+    ].values
+
+    pivot = pd.DataFrame(
+        pivot_values.reshape(len(timestamps), -1),
+        index=pd.DatetimeIndex(timestamps, name="timestamp"),
         # ("r_msorm", "some ROI name") -> "some ROI name r_msorm"
-        " ".join(col[::-1]).strip()
-        for col in pivot.columns.values
-    ]
+        columns=[
+            f"{ROI_name} {pivot_column_name}"
+            for pivot_column_name in pivot_column_names
+            for ROI_name in ROIs
+        ],
+    )
+
+    # There's one copy of the image name for each ROI, so use the images of the first row's ROI
+    images = np.full(len(timestamps), np.nan, dtype=object)
+    is_first_ROI = ROI_codes == ROI_codes[0]
+    images[timestamp_codes[is_first_ROI]] = experiment_df["image"].values[is_first_ROI]
     pivot["image"] = images
 
-    # After flattening
+    # After pivot
     # timestamp    image     DO Patch r_msorm   Reference Patch r_msorm...
     # 2019-01-01       1                   .4                        .5
 
     return pivot
 
 
+@cached_parser(PROCESS_EXPERIMENT_RESULTS_VERSION, key_by_content=True)
+def _open_and_pivot_process_experiment_results(
+    results_filepath: str, ROI_names: Optional[List[str]], pivot_column_names: List[str]
+) -> pd.DataFrame:
+    return pivot_process_experiment_results_on_ROI(
+        pd.read_csv(
+            results_filepath,
+            usecols=["timestamp", "ROI", "image"] + pivot_column_names,
+            dtype={"ROI": "category"},
+            parse_dates=["timestamp"],
+        ),
+        ROI_names,
+        pivot_column_names,
+    )
+
+
+def _concat_pivoted_process_experiment_results(
+    pivoted_results: List[pd.DataFrame],
+) -> pd.DataFrame:
+    """ Concatenate pivoted results into arrays allocated once for all rows. Results that don't all have the same
+        columns (e.g. from experiments with different ROIs) are left to pd.concat to align.
+    """
+    if not pivoted_results or not all(
+        results.columns.equals(pivoted_results[0].columns)
+        for results in pivoted_results[1:]
+    ):
+        return pd.concat(pivoted_results)
+
+    columns = pivoted_results[0].columns
+    value_columns = columns.drop("image")
+    row_ends = np.cumsum([len(results) for results in pivoted_results])
+    row_count = row_ends[-1] if len(row_ends) else 0
+
+    timestamps = np.empty(row_count, dtype="datetime64[ns]")
+    values = np.empty((row_count, len(value_columns)))
+    images = np.empty(row_count, dtype=object)
+    for results, row_end in zip(pivoted_results, row_ends):
+        row_start = row_end - len(results)
+        timestamps[row_start:row_end] = results.index.values
+        values[row_start:row_end] = results[value_columns].values
+        images[row_start:row_end] = results["image"].values
+
+    all_roi_data = pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(timestamps, name=pivoted_results[0].index.name),
+        columns=value_columns,
+    )
+    all_roi_data["image"] = images
+    return all_roi_data[columns]
+
+
 def open_and_combine_process_experiment_results(
     process_experiment_result_filepaths: List[str],
     ROI_names: List[str] = None,
     pivot_column_names: List[str] = None,
+    max_workers: int = 1,
+    latest_generation_only: bool = True,
 ) -> pd.DataFrame:
     """
         Open multiple process experiment result files and combine into a single DataFrame with one row per image.
+        Only the columns needed for the pivot are read, and by default only the latest generation of each re-run
+        summary is opened. If the parse cache has been turned on with
+        osmo_jupyter.dataset.cache.enable_parse_cache(), each file's pivoted results are cached by the file's contents,
+        so only new or changed files are re-processed.
 
         Args:
             process_experiment_result_filepaths: A list of filepaths to process experiment summary statistics files.
             ROI_names: Optional. A list of ROI names to select. Defaults to all ROIs present.
             pivot_column_names: Optional. A list of column names to select for each ROI in the pivot.
                 Defaults to all RGB channel MSORMs.
+            max_workers: Optional. Number of worker processes to pivot files in. Defaults to 1, which pivots files
+                one at a time in the current process. Use None for the number of CPUs.
+            latest_generation_only: Optional. If True (the default), of the files that differ only in their
+                "(generated ...)" suffix, only open the most recently generated one. See
+                source_files.select_latest_generation_filepaths().
         Returns:
             DataFrame of all summary statistics flattened to one row per image with all selected ROIs.
     """
+    if pivot_column_names is None:
+        pivot_column_names = DEFAULT_PIVOT_COLUMN_NAMES
 
-    all_roi_data = pd.concat(
-        [
-            pivot_process_experiment_results_on_ROI(
-                pd.read_csv(results_filepath, parse_dates=["timestamp"]),
-                ROI_names,
-                pivot_column_names,
-            )
+    if latest_generation_only:
+        process_experiment_result_filepaths = select_latest_generation_filepaths(
+            process_experiment_result_filepaths
+        )
+
+    open_and_pivot = functools.partial(
+        _open_and_pivot_process_experiment_results,
+        ROI_names=ROI_names,
+        pivot_column_names=pivot_column_names,
+    )
+
+    if max_workers == 1:
+        pivoted_results = [
+            open_and_pivot(results_filepath)
             for results_filepath in process_experiment_result_filepaths
         ]
-    )
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pivoted_results = list(
+                executor.map(open_and_pivot, process_experiment_result_filepaths)
+            )
 
-    return all_roi_data
+    return _concat_pivoted_process_experiment_results(pivoted_results)
 
 
 def filter_equilibrated_images(equilibration_range: pd.Series, df: pd.DataFrame):
@@ -185,6 +744,58 @@ def filter_equilibrated_images(equilibration_range: pd.Series, df: pd.DataFrame)
     return df[leading_edge_mask & trailing_edge_mask]
 
 
+EQUILIBRATION_RANGE_ID_LABEL = "equilibration range ID"
+
+
+def get_equilibration_range_ids(
+    equilibration_boundaries: pd.DataFrame, timestamps
+) -> np.ndarray:
+    """ Find the equilibration range that each timestamp is within, with a binary search over the sorted ranges.
+        As in filter_equilibrated_images(), timestamps exactly at the start or end of a range are not within it.
+
+        Args:
+            equilibration_boundaries: DataFrame of non-overlapping ranges, with start_time and end_time columns,
+                as returned by get_equilibration_boundaries().
+            timestamps: Array-like of datetimes, in any order.
+        Returns:
+            Array of range IDs: the position of each timestamp's range in equilibration_boundaries,
+            or -1 for timestamps outside every range.
+    """
+    return get_interval_ids(
+        equilibration_boundaries["start_time"].values,
+        equilibration_boundaries["end_time"].values,
+        timestamps,
+        inclusive=False,
+    )
+
+
+def label_equilibrated_images(
+    equilibration_boundaries: pd.DataFrame,
+    df: pd.DataFrame,
+    drop_unlabelled: bool = True,
+) -> pd.DataFrame:
+    """
+        Label every row of a datetime indexed DataFrame with the equilibration range it's within, in one pass.
+        Equivalent to calling filter_equilibrated_images() for every range, without rescanning df for each range.
+
+        Args:
+            equilibration_boundaries: DataFrame of non-overlapping ranges, with start_time and end_time columns,
+                as returned by get_equilibration_boundaries().
+            df: A datetime indexed DataFrame
+            drop_unlabelled: Optional. If True (default), rows outside every range are dropped. Otherwise they are
+                kept, with a range ID of -1.
+        Returns:
+            A copy of df with an "equilibration range ID" column: the position of each row's range in
+            equilibration_boundaries.
+    """
+    range_ids = get_equilibration_range_ids(equilibration_boundaries, df.index)
+
+    labelled_df = df.assign(**{EQUILIBRATION_RANGE_ID_LABEL: range_ids})
+    if drop_unlabelled:
+        return labelled_df[range_ids >= 0]
+    return labelled_df
+
+
 def get_all_attempt_image_filenames(attempt_metadata: pd.Series) -> pd.DataFrame:
     """ Get a DataFrame of all images for an attempt with associated attempt metadata.
 
@@ -207,8 +818,8 @@ def get_all_attempt_image_filenames(attempt_metadata: pd.Series) -> pd.DataFrame
 
     images_by_experiment = get_all_experiment_image_filenames(experiment_names)
 
-    images_by_experiment["timestamp"] = images_by_experiment["image_filename"].apply(
-        datetime_from_filename
+    images_by_experiment["timestamp"] = datetimes_from_filenames(
+        images_by_experiment["image_filename"]
     )
 
     images_by_experiment["cartridge_id"] = attempt_metadata["cartridge_id"]
@@ -216,3 +827,182 @@ def get_all_attempt_image_filenames(attempt_metadata: pd.Series) -> pd.DataFrame
     images_by_experiment["pond"] = attempt_metadata["pond"]
 
     return images_by_experiment.set_index("timestamp")
+
+
+# Listing an experiment's images is a slow S3 request, so many are made at once
+DEFAULT_IMAGE_LISTING_WORKERS = 16
+
+ATTEMPT_METADATA_COLUMNS = ["cartridge_id", "cosmobot_id", "pond"]
+
+
+def _list_experiment_image_filenames(experiment_name: str) -> np.ndarray:
+    return get_all_experiment_image_filenames([experiment_name])[
+        "image_filename"
+    ].values
+
+
+class AttemptImageIndex:
+    """ Timestamp-sorted index of the images from many data collection attempts, with compact categorical attempt
+        metadata, for fast time range and attempt lookups.
+
+        Args:
+            timestamps: Array-like of datetimes of each image, in any order.
+            images: DataFrame with one row per image, in the same order as timestamps, with columns image_filename,
+                experiment_name, cartridge_id, cosmobot_id, pond and attempt.
+    """
+
+    def __init__(self, timestamps, images: pd.DataFrame):
+        timestamps_ns = np.asarray(timestamps, dtype="datetime64[ns]").view(np.int64)
+        timestamp_order = np.argsort(timestamps_ns, kind="mergesort")
+
+        self.timestamps_ns = timestamps_ns[timestamp_order]
+        self.images = images.iloc[timestamp_order].reset_index(drop=True)
+
+        # Sort positions by attempt once, so that each attempt's images are a contiguous, timestamp-ordered slice
+        attempts = self.images["attempt"].values
+        self._attempt_order = np.argsort(attempts, kind="mergesort")
+        self._sorted_attempts = attempts[self._attempt_order]
+
+    @classmethod
+    def from_data_collection_log(
+        cls,
+        data_collection_log: pd.DataFrame,
+        max_workers: int = DEFAULT_IMAGE_LISTING_WORKERS,
+    ) -> "AttemptImageIndex":
+        """ Build an index of all images in all attempts, listing the images of every experiment concurrently.
+
+            Args:
+                data_collection_log: DataFrame with one row per attempt, as returned by parse_data_collection_log().
+                    Should include experiment_names, cartridge_id, cosmobot_id and pond columns.
+                max_workers: Optional. Number of experiments to list images of at once. Defaults to 16.
+            Returns:
+                AttemptImageIndex of every image whose filename starts with a valid datetime. The attempt of each
+                image is the index label of its row in data_collection_log.
+        """
+        # Attempts without any S3 bucket names have NaN instead of a list
+        experiment_names_by_attempt = [
+            experiment_names if isinstance(experiment_names, list) else []
+            for experiment_names in data_collection_log["experiment_names"]
+        ]
+        unique_experiment_names = pd.unique(
+            np.array(
+                [
+                    experiment_name
+                    for experiment_names in experiment_names_by_attempt
+                    for experiment_name in experiment_names
+                ],
+                dtype=object,
+            )
+        )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            filenames_by_experiment = dict(
+                zip(
+                    unique_experiment_names,
+                    executor.map(
+                        _list_experiment_image_filenames, unique_experiment_names
+                    ),
+                )
+            )
+        experiment_codes_by_name = {
+            experiment_name: code
+            for code, experiment_name in enumerate(unique_experiment_names)
+        }
+
+        image_filenames = [np.array([], dtype=object)]
+        experiment_codes = [np.array([], dtype=np.int64)]
+        attempt_positions = [np.array([], dtype=np.int64)]
+        for attempt_position, experiment_names in enumerate(
+            experiment_names_by_attempt
+        ):
+            for experiment_name in experiment_names:
+                experiment_filenames = filenames_by_experiment[experiment_name]
+                image_filenames.append(experiment_filenames)
+                experiment_codes.append(
+                    np.full(
+                        len(experiment_filenames),
+                        experiment_codes_by_name[experiment_name],
+                    )
+                )
+                attempt_positions.append(
+                    np.full(len(experiment_filenames), attempt_position)
+                )
+
+        image_filenames = np.concatenate(image_filenames)
+        experiment_codes = np.concatenate(experiment_codes)
+        attempt_positions = np.concatenate(attempt_positions)
+
+        timestamps = datetimes_from_filenames(image_filenames)
+        has_timestamp = ~np.isnat(timestamps)
+
+        # Metadata is repeated for every image in an attempt, so store it as codes into each attempt's values
+        images = pd.DataFrame(
+            {
+                "image_filename": image_filenames,
+                "experiment_name": pd.Categorical.from_codes(
+                    experiment_codes, unique_experiment_names
+                ),
+            }
+        )
+        for column in ATTEMPT_METADATA_COLUMNS:
+            attempt_codes, attempt_values = pd.factorize(data_collection_log[column])
+            images[column] = pd.Categorical.from_codes(
+                attempt_codes[attempt_positions], attempt_values
+            )
+        images["attempt"] = data_collection_log.index.values[attempt_positions]
+
+        return cls(timestamps[has_timestamp], images[has_timestamp])
+
+    def __len__(self):
+        return len(self.timestamps_ns)
+
+    def _get_images(self, positions) -> pd.DataFrame:
+        images = self.images.iloc[positions]
+        images.index = pd.DatetimeIndex(
+            self.timestamps_ns[positions].view("datetime64[ns]"), name="timestamp"
+        )
+        return images
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """ Get every image in the index.
+
+            Returns:
+                Timestamp-indexed DataFrame, sorted by timestamp, with columns image_filename, experiment_name,
+                cartridge_id, cosmobot_id, pond (all categorical except image_filename) and attempt.
+        """
+        return self._get_images(slice(None))
+
+    def get_time_range(
+        self, start: pd.Timestamp = None, end: pd.Timestamp = None
+    ) -> pd.DataFrame:
+        """ Get the images taken within a time range, with a binary search of the sorted timestamps.
+
+            Args:
+                start: Optional. Earliest timestamp to include. Defaults to the first image.
+                end: Optional. Latest timestamp to include. Defaults to the last image.
+            Returns:
+                DataFrame of images from start to end (inclusive), in the format of to_dataframe().
+        """
+        start_position = (
+            0
+            if start is None
+            else np.searchsorted(self.timestamps_ns, pd.Timestamp(start).value, "left")
+        )
+        end_position = (
+            len(self)
+            if end is None
+            else np.searchsorted(self.timestamps_ns, pd.Timestamp(end).value, "right")
+        )
+        return self._get_images(slice(start_position, end_position))
+
+    def get_attempt(self, attempt) -> pd.DataFrame:
+        """ Get the images from one attempt.
+
+            Args:
+                attempt: Index label of the attempt in the data collection log the index was built from.
+            Returns:
+                DataFrame of the attempt's images, in the format of to_dataframe().
+        """
+        start_position = np.searchsorted(self._sorted_attempts, attempt, side="left")
+        end_position = np.searchsorted(self._sorted_attempts, attempt, side="right")
+        return self._get_images(self._attempt_order[start_position:end_position])
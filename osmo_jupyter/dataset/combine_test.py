@@ -1,10 +1,12 @@
 import pkg_resources
 from unittest.mock import sentinel
 
+import numpy as np
 import pandas as pd
 import pytest
 
 import osmo_jupyter.dataset.combine as module
+from osmo_jupyter.dataset import cache
 
 
 @pytest.fixture
@@ -75,6 +77,214 @@ class TestOpenAndCombineSensorData:
             subset_combined_data_to_compare, expected_interpolation
         )
 
+    def test_linear_join_matches_resampled_join(
+        self, test_calibration_file_path, test_picolog_file_path
+    ):
+        resampled_combined_data = module.open_and_combine_picolog_and_calibration_data(
+            calibration_log_filepaths=[test_calibration_file_path],
+            picolog_log_filepaths=[test_picolog_file_path],
+        )
+        linear_combined_data = module.open_and_combine_picolog_and_calibration_data(
+            calibration_log_filepaths=[test_calibration_file_path],
+            picolog_log_filepaths=[test_picolog_file_path],
+            join_method="linear",
+        )
+
+        pd.testing.assert_frame_equal(linear_combined_data, resampled_combined_data)
+
+    @pytest.mark.parametrize(
+        "join_method, expected_temperatures",
+        [
+            ("resample", [39, 39.5, 41]),
+            ("linear", [39, 39.5, 41]),
+            ("nearest", [39, 39, 41]),
+        ],
+    )
+    def test_drops_calibration_rows_between_picolog_files(
+        self, test_calibration_file_path, tmp_path, join_method, expected_temperatures
+    ):
+        header = '"","Temperature Ave. (C)","Pressure Ave. (mmHg)","Pressure (Voltage) Ave. (nV)"\n'
+        first_picolog_file_path = tmp_path / "first_picolog.csv"
+        first_picolog_file_path.write_text(
+            header
+            + '"2019-01-01T00:00:00-07:00","39","750","10"\n'
+            + '"2019-01-01T00:00:02-07:00","40","750","10"\n'
+        )
+        # The calibration log row at 00:00:03 falls in the gap between the two PicoLog files
+        second_picolog_file_path = tmp_path / "second_picolog.csv"
+        second_picolog_file_path.write_text(
+            header
+            + '"2019-01-01T00:00:04-07:00","41","750","10"\n'
+            + '"2019-01-01T00:00:06-07:00","41","750","10"\n'
+        )
+
+        combined_data = module.open_and_combine_picolog_and_calibration_data(
+            calibration_log_filepaths=[test_calibration_file_path],
+            picolog_log_filepaths=[
+                str(second_picolog_file_path),
+                str(first_picolog_file_path),
+            ],
+            join_method=join_method,
+        )
+
+        assert list(combined_data.index) == list(
+            pd.to_datetime(
+                ["2019-01-01 00:00:00", "2019-01-01 00:00:01", "2019-01-01 00:00:04"]
+            )
+        )
+        assert list(combined_data["PicoLog temperature (C)"]) == expected_temperatures
+
+    def test_raises_on_unknown_join_method(
+        self, test_calibration_file_path, test_picolog_file_path
+    ):
+        with pytest.raises(ValueError):
+            module.open_and_combine_picolog_and_calibration_data(
+                calibration_log_filepaths=[test_calibration_file_path],
+                picolog_log_filepaths=[test_picolog_file_path],
+                join_method="cubic",
+            )
+
+
+class TestAttemptDataset:
+    @pytest.fixture
+    def files_by_type(self, test_calibration_file_path, test_picolog_file_path):
+        return pd.Series(
+            {
+                "calibration_log": [test_calibration_file_path],
+                "pico": [test_picolog_file_path],
+            }
+        )
+
+    def test_reads_nothing_until_collected(self, mocker):
+        read_spy = mocker.spy(module, "_read_file_time_range")
+
+        module.AttemptDataset(
+            pd.Series({"calibration_log": ["does_not_exist.csv"]})
+        ).select("calibration_log")
+
+        read_spy.assert_not_called()
+
+    def test_collect_matches_eager_combine(
+        self, files_by_type, test_calibration_file_path, test_picolog_file_path
+    ):
+        columns = ["equilibration status", "setpoint temperature (C)"]
+        attempt_dataset = (
+            module.AttemptDataset(files_by_type)
+            .select("calibration_log", columns=columns)
+            .select("pico")
+        )
+
+        combined_data = attempt_dataset.collect(tolerance=None)
+
+        expected_combined_data = module.open_and_combine_picolog_and_calibration_data(
+            calibration_log_filepaths=[test_calibration_file_path],
+            picolog_log_filepaths=[test_picolog_file_path],
+            join_method="linear",
+        )[columns + ["PicoLog temperature (C)", "PicoLog barometric pressure (mmHg)"]]
+        pd.testing.assert_frame_equal(combined_data, expected_combined_data)
+
+    def test_collect_time_range(self, files_by_type):
+        attempt_dataset = (
+            module.AttemptDataset(files_by_type)
+            .select("calibration_log", columns=["setpoint temperature (C)"])
+            .select("pico", columns=["PicoLog temperature (C)"])
+        )
+
+        combined_data = attempt_dataset.collect(
+            start="2019-01-01 00:00:01", end="2019-01-01 00:00:03"
+        )
+
+        expected_combined_data = pd.DataFrame(
+            {
+                "setpoint temperature (C)": [40, 40],
+                "PicoLog temperature (C)": [39.5, 40.0],
+            },
+            index=pd.to_datetime(["2019-01-01 00:00:01", "2019-01-01 00:00:03"]).rename(
+                "timestamp"
+            ),
+        )
+        pd.testing.assert_frame_equal(combined_data, expected_combined_data)
+
+    def test_skips_files_outside_time_range(self, files_by_type, mocker):
+        parse_spy = mocker.spy(module, "parse_calibration_log_file")
+        mocker.patch.dict(
+            module._ATTEMPT_SOURCES["calibration_log"],
+            {"parse_function": module.parse_calibration_log_file},
+        )
+
+        combined_data = (
+            module.AttemptDataset(files_by_type)
+            .select("calibration_log")
+            .collect(start="2019-02-01")
+        )
+
+        assert combined_data.empty
+        # Only called to read the first and last rows of the file
+        assert parse_spy.call_count == 1
+
+    def test_reads_only_selected_columns_of_every_source(
+        self, files_by_type, test_picolog_file_path, mocker
+    ):
+        parse_spy = mocker.spy(module, "parse_picolog_file")
+        mocker.patch.dict(
+            module._ATTEMPT_SOURCES["pico"],
+            {"parse_function": module.parse_picolog_file},
+        )
+
+        module.AttemptDataset(files_by_type).select("calibration_log").select(
+            "pico", columns=["PicoLog temperature (C)"]
+        ).collect()
+
+        parse_spy.assert_called_with(
+            test_picolog_file_path, columns=["PicoLog temperature (C)"]
+        )
+
+    def test_raises_without_selections(self, files_by_type):
+        with pytest.raises(ValueError):
+            module.AttemptDataset(files_by_type).collect()
+
+
+class TestInterpolateAtTimestamps:
+    data = pd.DataFrame(
+        {"temperature": [10.0, 20.0, 40.0]},
+        index=pd.to_datetime(
+            ["2019-01-01 00:00:00", "2019-01-01 00:00:10", "2019-01-01 00:01:00"]
+        ),
+    )
+    timestamps = pd.to_datetime(
+        [
+            "2019-01-01 00:00:05",
+            "2018-12-31 23:59:59",  # Before the data
+            "2019-01-01 00:00:10",  # Exact match
+            "2019-01-01 00:00:50",  # 10 seconds from the nearest data point
+            "2019-01-01 00:01:01",  # After the data
+        ]
+    )
+
+    def test_linear(self):
+        is_matched, values = module._interpolate_at_timestamps(
+            self.data, self.timestamps, "linear", tolerance=None
+        )
+
+        np.testing.assert_array_equal(is_matched, [True, False, True, True, False])
+        np.testing.assert_array_equal(values, [[15.0], [20.0], [36.0]])
+
+    def test_linear_with_tolerance(self):
+        is_matched, values = module._interpolate_at_timestamps(
+            self.data, self.timestamps, "linear", tolerance=pd.Timedelta(seconds=10)
+        )
+
+        np.testing.assert_array_equal(is_matched, [True, False, True, False, False])
+        np.testing.assert_array_equal(values, [[15.0], [20.0]])
+
+    def test_nearest_with_tolerance(self):
+        is_matched, values = module._interpolate_at_timestamps(
+            self.data, self.timestamps, "nearest", tolerance=pd.Timedelta(seconds=1)
+        )
+
+        np.testing.assert_array_equal(is_matched, [False, True, True, False, True])
+        np.testing.assert_array_equal(values, [[10.0], [20.0], [40.0]])
+
 
 class TestGetEquilibrationBoundaries:
     @pytest.mark.parametrize(
@@ -224,6 +434,83 @@ class TestGetEquilibrationBoundaries:
         )
 
 
+class TestStatusRuns:
+    status = pd.Series(
+        [
+            "waiting",
+            "waiting",
+            "equilibrated",
+            "equilibrated",
+            "equilibrated",
+            None,
+            "waiting",
+        ],
+        index=pd.to_datetime(
+            [
+                "2019-01-01 00:00:00",
+                "2019-01-01 00:00:01",
+                "2019-01-01 00:00:02",
+                "2019-01-01 00:00:03",
+                "2019-01-01 00:00:05",
+                "2019-01-01 00:00:06",
+                "2019-01-01 00:00:07",
+            ]
+        ),
+    )
+
+    def test_finds_runs_of_every_status(self):
+        status_runs = module.get_status_runs(self.status)
+
+        expected_status_runs = pd.DataFrame(
+            {
+                "status": ["waiting", "equilibrated", None, "waiting"],
+                "start_time": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:00",
+                        "2019-01-01 00:00:02",
+                        "2019-01-01 00:00:06",
+                        "2019-01-01 00:00:07",
+                    ]
+                ),
+                "end_time": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:01",
+                        "2019-01-01 00:00:05",
+                        "2019-01-01 00:00:06",
+                        "2019-01-01 00:00:07",
+                    ]
+                ),
+                "duration": pd.to_timedelta([1, 3, 0, 0], unit="s"),
+                "row_count": [2, 3, 1, 1],
+            }
+        )
+        pd.testing.assert_frame_equal(status_runs, expected_status_runs)
+
+    def test_filters_by_min_duration(self):
+        status_runs = module.get_status_runs(
+            self.status, min_duration=pd.Timedelta(seconds=2)
+        )
+
+        assert list(status_runs["status"]) == ["equilibrated"]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+    def test_chunked_runs_match_all_at_once(self, chunk_size):
+        chunks = [
+            self.status.iloc[start : start + chunk_size]
+            for start in range(0, len(self.status), chunk_size)
+        ]
+
+        chunked_status_runs = pd.concat(
+            module.iter_status_runs(chunks, min_duration=pd.Timedelta(seconds=1)),
+            ignore_index=True,
+        )
+
+        pd.testing.assert_frame_equal(
+            chunked_status_runs,
+            module.get_status_runs(self.status, min_duration=pd.Timedelta(seconds=1)),
+        )
+
+
 class TestPivotProcessExperimentResults:
     def test_combines_image_rows_by_ROI(self):
         test_process_experiment_file_path = pkg_resources.resource_filename(
@@ -265,6 +552,53 @@ class TestPivotProcessExperimentResults:
 
         pd.testing.assert_frame_equal(pivot_results, expected_results_data)
 
+    def test_matches_dataframe_pivot_for_unsorted_rows_and_missing_ROIs(self):
+        experiment_df = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:02",
+                        "2019-01-01 00:00:00",
+                        "2019-01-01 00:00:00",
+                    ]
+                ),
+                "ROI": pd.Categorical(["ROI 1", "ROI 1", "ROI 0"]),
+                "image": ["image-1.jpeg", "image-0.jpeg", "image-0.jpeg"],
+                "r_msorm": [0.6, 0.4, 0.5],
+            }
+        )
+
+        pivot_results = module.pivot_process_experiment_results_on_ROI(
+            experiment_df, pivot_column_names=["r_msorm"]
+        )
+
+        expected_results_data = pd.DataFrame(
+            {
+                "ROI 0 r_msorm": [0.5, np.nan],
+                "ROI 1 r_msorm": [0.4, 0.6],
+                "image": ["image-0.jpeg", "image-1.jpeg"],
+            },
+            index=pd.DatetimeIndex(
+                ["2019-01-01 00:00:00", "2019-01-01 00:00:02"], name="timestamp"
+            ),
+        )
+        pd.testing.assert_frame_equal(pivot_results, expected_results_data)
+
+    def test_raises_on_duplicate_ROIs_for_a_timestamp(self):
+        experiment_df = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2019-01-01", "2019-01-01"]),
+                "ROI": ["ROI 0", "ROI 0"],
+                "image": ["image-0.jpeg", "image-0.jpeg"],
+                "r_msorm": [0.5, 0.6],
+            }
+        )
+
+        with pytest.raises(ValueError):
+            module.pivot_process_experiment_results_on_ROI(
+                experiment_df, pivot_column_names=["r_msorm"]
+            )
+
 
 class TestOpenAndCombineProcessExperimentResults:
     def test_keeps_distinct_rows_for_images_with_same_timestamp(self):
@@ -283,6 +617,123 @@ class TestOpenAndCombineProcessExperimentResults:
         unique_timestamps = pivot_results.index.unique()
         assert len(unique_timestamps) == len(pivot_results) / 2
 
+    def test_reads_only_pivot_columns(self, mocker):
+        test_process_experiment_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_process_experiment_result.csv"
+        )
+        read_csv_spy = mocker.spy(module.pd, "read_csv")
+
+        pivot_results = module.open_and_combine_process_experiment_results(
+            process_experiment_result_filepaths=[test_process_experiment_file_path],
+            pivot_column_names=["r_msorm"],
+        )
+
+        assert read_csv_spy.call_args[1]["usecols"] == [
+            "timestamp",
+            "ROI",
+            "image",
+            "r_msorm",
+        ]
+        assert list(pivot_results.columns) == [
+            "ROI 0 r_msorm",
+            "ROI 1 r_msorm",
+            "image",
+        ]
+
+    def test_pivots_files_in_worker_processes(self):
+        test_process_experiment_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_process_experiment_result.csv"
+        )
+        filepaths = [test_process_experiment_file_path] * 3
+
+        parallel_pivot_results = module.open_and_combine_process_experiment_results(
+            filepaths, max_workers=2
+        )
+
+        pd.testing.assert_frame_equal(
+            parallel_pivot_results,
+            module.open_and_combine_process_experiment_results(filepaths),
+        )
+
+    def test_reprocesses_only_new_and_changed_files_when_cached(self, tmp_path, mocker):
+        test_process_experiment_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_process_experiment_result.csv"
+        )
+        with open(test_process_experiment_file_path) as test_file:
+            test_file_contents = test_file.read()
+        filepaths = []
+        for i in range(2):
+            filepath = tmp_path / f"summary_statistics_{i}.csv"
+            filepath.write_text(test_file_contents)
+            filepaths.append(str(filepath))
+
+        cache.enable_parse_cache(str(tmp_path / "cache"))
+        try:
+            module.open_and_combine_process_experiment_results(filepaths)
+
+            pivot_spy = mocker.spy(module, "pivot_process_experiment_results_on_ROI")
+            # Add an image at a new timestamp to one file, and add a new file
+            with open(filepaths[1], "a") as changed_file:
+                changed_file.write(
+                    test_file_contents.splitlines()[-1].replace(
+                        "2019-01-01 00:00:02", "2019-01-01 00:00:04"
+                    )
+                    + "\n"
+                )
+            new_filepath = tmp_path / "summary_statistics_2.csv"
+            new_filepath.write_text(
+                test_file_contents.replace("2019-01-01", "2019-01-02")
+            )
+
+            pivot_results = module.open_and_combine_process_experiment_results(
+                filepaths + [str(new_filepath)]
+            )
+        finally:
+            cache.disable_parse_cache()
+
+        assert pivot_spy.call_count == 2
+        assert len(pivot_results) == 7
+
+    def test_opens_only_latest_generation_of_each_summary(self, tmp_path, mocker):
+        test_process_experiment_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_process_experiment_result.csv"
+        )
+        with open(test_process_experiment_file_path) as test_file:
+            test_file_contents = test_file.read()
+        filepaths = []
+        for generated_at in ["2019-08-27--10-34-46", "2019-08-28--10-34-46"]:
+            filepath = (
+                tmp_path / f"run - summary statistics (generated {generated_at}).csv"
+            )
+            filepath.write_text(test_file_contents)
+            filepaths.append(str(filepath))
+        read_csv_spy = mocker.spy(module.pd, "read_csv")
+
+        pivot_results = module.open_and_combine_process_experiment_results(filepaths)
+
+        assert len(pivot_results) == 2
+        assert read_csv_spy.call_count == 1
+        assert read_csv_spy.call_args[0][0] == filepaths[1]
+
+
+class TestConcatPivotedProcessExperimentResults:
+    def test_matches_pd_concat(self):
+        pivoted_results = [
+            pd.DataFrame(
+                {"ROI 0 r_msorm": [0.5, np.nan], "image": ["image-0.jpeg", np.nan]},
+                index=pd.to_datetime(["2019-01-01", "2019-01-02"]).rename("timestamp"),
+            ),
+            pd.DataFrame(
+                {"ROI 0 r_msorm": [0.4], "image": ["image-2.jpeg"]},
+                index=pd.to_datetime(["2019-01-01"]).rename("timestamp"),
+            ),
+        ]
+
+        pd.testing.assert_frame_equal(
+            module._concat_pivoted_process_experiment_results(pivoted_results),
+            pd.concat(pivoted_results),
+        )
+
 
 class TestFilterEquilibratedImages:
     def test_returns_only_equilibrated_images(self):
@@ -311,6 +762,59 @@ class TestFilterEquilibratedImages:
         )
 
 
+class TestLabelEquilibratedImages:
+    equilibration_boundaries = pd.DataFrame(
+        {
+            # Out of order, to check that ranges are sorted
+            "start_time": pd.to_datetime(["2019-01-05", "2019-01-01"]),
+            "end_time": pd.to_datetime(["2019-01-07", "2019-01-03"]),
+        }
+    )
+    image_data = pd.DataFrame(
+        {"image": ["a", "b", "c", "d", "e", "f", "g"]},
+        index=pd.to_datetime(
+            [
+                "2018-12-31",  # Before every range
+                "2019-01-01",  # At the start of a range
+                "2019-01-02",
+                "2019-01-03",  # At the end of a range
+                "2019-01-04",  # Between ranges
+                "2019-01-06",
+                "2019-01-08",  # After every range
+            ]
+        ),
+    )
+
+    def test_labels_every_row(self):
+        labelled_image_data = module.label_equilibrated_images(
+            self.equilibration_boundaries, self.image_data, drop_unlabelled=False
+        )
+
+        np.testing.assert_array_equal(
+            labelled_image_data["equilibration range ID"], [-1, -1, 1, -1, -1, 0, -1]
+        )
+
+    def test_matches_filtering_each_range(self):
+        labelled_image_data = module.label_equilibrated_images(
+            self.equilibration_boundaries, self.image_data
+        )
+
+        for range_id, equilibration_range in self.equilibration_boundaries.iterrows():
+            pd.testing.assert_frame_equal(
+                labelled_image_data[
+                    labelled_image_data["equilibration range ID"] == range_id
+                ].drop(columns="equilibration range ID"),
+                module.filter_equilibrated_images(equilibration_range, self.image_data),
+            )
+
+    def test_handles_no_ranges(self):
+        labelled_image_data = module.label_equilibrated_images(
+            self.equilibration_boundaries.iloc[:0], self.image_data
+        )
+
+        assert labelled_image_data.empty
+
+
 class TestGetImagesByExperiment:
     def test_combines_experiment_metadata_correctly(self, mocker):
         mock_image_data = pd.DataFrame(
@@ -333,12 +837,10 @@ class TestGetImagesByExperiment:
         )
         mocker.patch.object(
             module,
-            "datetime_from_filename",
-            side_effect=[
-                pd.to_datetime("2019-01-01 00:00:01"),
-                pd.to_datetime("2019-01-01 00:00:02"),
-                pd.to_datetime("2019-01-01 00:00:03"),
-            ],
+            "datetimes_from_filenames",
+            return_value=pd.to_datetime(
+                ["2019-01-01 00:00:01", "2019-01-01 00:00:02", "2019-01-01 00:00:03"]
+            ).values,
         )
 
         test_experiment_metadata = pd.Series(
@@ -380,3 +882,101 @@ class TestGetImagesByExperiment:
         pd.testing.assert_frame_equal(
             actual_images_with_metadata, expected_images_with_metadata
         )
+
+
+class TestAttemptImageIndex:
+    @pytest.fixture
+    def image_index(self, mocker):
+        image_filenames_by_experiment = {
+            "experiment-1": [
+                "2019-01-01--00-00-03_a.jpeg",
+                "2019-01-01--00-00-01_a.jpeg",
+            ],
+            "experiment-2": [
+                "2019-01-01--00-00-02_b.jpeg",
+                "not-an-image-timestamp.jpeg",
+            ],
+            "experiment-3": ["2019-01-02--00-00-00_c.jpeg"],
+        }
+        mocker.patch.object(
+            module,
+            "get_all_experiment_image_filenames",
+            side_effect=lambda experiment_names: pd.DataFrame(
+                {
+                    "experiment_name": experiment_names[0],
+                    "image_filename": image_filenames_by_experiment[
+                        experiment_names[0]
+                    ],
+                }
+            ),
+        )
+        data_collection_log = pd.DataFrame(
+            {
+                "experiment_names": [
+                    ["experiment-1", "experiment-2"],
+                    ["experiment-3"],
+                    np.nan,
+                ],
+                "cartridge_id": ["C1", "C2", "C3"],
+                "cosmobot_id": ["A", "A", "B"],
+                "pond": ["calibration", "scum tank 1", "calibration"],
+            },
+            index=[10, 11, 12],
+        )
+
+        return module.AttemptImageIndex.from_data_collection_log(data_collection_log)
+
+    def test_builds_sorted_index_with_categorical_metadata(self, image_index):
+        images = image_index.to_dataframe()
+
+        assert len(image_index) == 4
+        assert list(images.index) == list(
+            pd.to_datetime(
+                [
+                    "2019-01-01 00:00:01",
+                    "2019-01-01 00:00:02",
+                    "2019-01-01 00:00:03",
+                    "2019-01-02 00:00:00",
+                ]
+            )
+        )
+        assert list(images["image_filename"]) == [
+            "2019-01-01--00-00-01_a.jpeg",
+            "2019-01-01--00-00-02_b.jpeg",
+            "2019-01-01--00-00-03_a.jpeg",
+            "2019-01-02--00-00-00_c.jpeg",
+        ]
+        assert list(images["experiment_name"]) == [
+            "experiment-1",
+            "experiment-2",
+            "experiment-1",
+            "experiment-3",
+        ]
+        assert list(images["cartridge_id"]) == ["C1", "C1", "C1", "C2"]
+        assert list(images["pond"]) == [
+            "calibration",
+            "calibration",
+            "calibration",
+            "scum tank 1",
+        ]
+        assert list(images["attempt"]) == [10, 10, 10, 11]
+        for column in ["experiment_name", "cartridge_id", "cosmobot_id", "pond"]:
+            assert images[column].dtype.name == "category"
+
+    def test_get_time_range(self, image_index):
+        images = image_index.get_time_range(
+            start="2019-01-01 00:00:02", end="2019-01-01 00:00:03"
+        )
+
+        assert list(images["image_filename"]) == [
+            "2019-01-01--00-00-02_b.jpeg",
+            "2019-01-01--00-00-03_a.jpeg",
+        ]
+
+    def test_get_attempt(self, image_index):
+        assert list(image_index.get_attempt(10)["image_filename"]) == [
+            "2019-01-01--00-00-01_a.jpeg",
+            "2019-01-01--00-00-02_b.jpeg",
+            "2019-01-01--00-00-03_a.jpeg",
+        ]
+        assert image_index.get_attempt(12).empty
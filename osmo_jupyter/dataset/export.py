@@ -0,0 +1,204 @@
+""" Export processed datasets (e.g. from the process_* functions in osmo_jupyter.dataset.parse) as a directory of
+    fixed-dtype, memory-mappable column arrays, so that training jobs don't need to re-parse source files and several
+    data loader processes can share one copy of the data through the OS page cache.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .parse import TIMESTAMP_LABEL
+
+# Bump this if the exported directory layout changes
+EXPORT_FORMAT_VERSION = 1
+
+SCHEMA_FILENAME = "schema.json"
+
+TIMESTAMP_DTYPE = "int64"  # Nanoseconds since the epoch
+INTEGER_DTYPE = "int64"
+BOOLEAN_DTYPE = "bool"
+VALUE_DTYPE = "float32"
+
+# Non-numeric columns are stored as integer codes into a list of categories kept in the schema
+CATEGORY_DTYPE = "category"
+CATEGORY_CODE_DTYPE = "int32"
+
+
+def _get_export_dtype(column: pd.Series, value_dtype: str) -> str:
+    if pd.api.types.is_bool_dtype(column):
+        return BOOLEAN_DTYPE
+    if pd.api.types.is_integer_dtype(column):
+        return INTEGER_DTYPE
+    if pd.api.types.is_numeric_dtype(column):
+        return value_dtype
+    if pd.api.types.is_categorical_dtype(column) or pd.api.types.is_object_dtype(
+        column
+    ):
+        return CATEGORY_DTYPE
+
+    raise ValueError(
+        f'Column "{column.name}" has dtype {column.dtype}, which can\'t be exported'
+    )
+
+
+def _get_column_filename(column_position: int) -> str:
+    # Column names (e.g. "YSI DO (mg/L)") aren't safe to use as filenames, so files are named by position
+    return f"column_{column_position:03d}.npy"
+
+
+def _get_category_codes_and_schema(column: pd.Series) -> Tuple[np.ndarray, Dict]:
+    categorical = pd.Categorical(column)
+    category_schema = {
+        "categories": [str(category) for category in categorical.categories]
+    }
+    # Missing values have a code of -1
+    return categorical.codes.astype(CATEGORY_CODE_DTYPE), category_schema
+
+
+def export_processed_dataset(
+    dataset: pd.DataFrame, directory: str, value_dtype: str = VALUE_DTYPE
+) -> None:
+    """ Write a timestamp-indexed DataFrame to a directory of memory-mappable .npy column files, with a JSON schema
+        describing them. Timestamps are stored as int64 nanoseconds, integer columns as int64, boolean columns as
+        bool, other numeric values as value_dtype, and any other (e.g. string) columns as int32 codes into a list of
+        categories in the schema.
+
+        Args:
+            dataset: Timestamp-indexed DataFrame, e.g. from process_calibration_log_file().
+            directory: Directory to write to. Created if it doesn't exist.
+            value_dtype: Optional. dtype to store non-integer numeric values as. Defaults to float32.
+        Raises:
+            ValueError: if any column has a dtype that can't be exported (e.g. timedelta).
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    column_schemas = [
+        {
+            "name": TIMESTAMP_LABEL,
+            "filename": _get_column_filename(0),
+            "dtype": TIMESTAMP_DTYPE,
+        }
+    ]
+    column_values = [pd.DatetimeIndex(dataset.index).asi8]
+
+    for column_position, column_name in enumerate(dataset.columns, start=1):
+        column = dataset[column_name]
+        column_schema = {
+            "name": column_name,
+            "filename": _get_column_filename(column_position),
+            "dtype": _get_export_dtype(column, value_dtype),
+        }
+
+        if column_schema["dtype"] == CATEGORY_DTYPE:
+            values, category_schema = _get_category_codes_and_schema(column)
+            column_schema.update(category_schema)
+        else:
+            values = column.values.astype(column_schema["dtype"], copy=False)
+
+        column_schemas.append(column_schema)
+        column_values.append(values)
+
+    for column_schema, values in zip(column_schemas, column_values):
+        np.save(
+            os.path.join(directory, column_schema["filename"]),
+            np.ascontiguousarray(values),
+            allow_pickle=False,
+        )
+
+    schema = {
+        "format_version": EXPORT_FORMAT_VERSION,
+        "row_count": len(dataset),
+        "columns": column_schemas,
+    }
+    # Write the schema last, so that a directory with a schema always has all of its column files
+    with open(os.path.join(directory, SCHEMA_FILENAME), "w") as schema_file:
+        json.dump(schema, schema_file, indent=2)
+
+
+def read_export_schema(directory: str) -> Dict:
+    """ Read the schema of an exported dataset directory.
+
+        Args:
+            directory: Directory written by export_processed_dataset().
+        Returns:
+            Dictionary with format_version, row_count and a list of columns, each with a name, filename and dtype.
+        Raises:
+            ValueError: if the directory was exported with an unsupported format version.
+    """
+    with open(os.path.join(directory, SCHEMA_FILENAME)) as schema_file:
+        schema = json.load(schema_file)
+
+    if schema["format_version"] != EXPORT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported export format version {schema['format_version']} in {directory}"
+        )
+
+    return schema
+
+
+def load_processed_dataset_columns(
+    directory: str, columns: List[str] = None
+) -> Dict[str, np.ndarray]:
+    """ Open an exported dataset as read-only, memory-mapped column arrays. No data is copied into memory until it
+        is accessed, and processes that load the same directory share the same pages.
+
+        Args:
+            directory: Directory written by export_processed_dataset().
+            columns: Optional. Names of the columns to open; other column files aren't opened at all.
+                Defaults to all columns. Timestamps are always included.
+        Returns:
+            Dictionary of column name to read-only memory-mapped array, in exported column order. Timestamps are
+            a datetime64[ns] view of the stored int64 nanoseconds, and category columns are pandas Categoricals
+            of their memory-mapped codes.
+    """
+    schema = read_export_schema(directory)
+
+    loaded_columns = {}
+    for column_schema in schema["columns"]:
+        column_name = column_schema["name"]
+        if (
+            columns is not None
+            and column_name != TIMESTAMP_LABEL
+            and column_name not in columns
+        ):
+            continue
+
+        values = np.load(
+            os.path.join(directory, column_schema["filename"]),
+            mmap_mode="r",
+            allow_pickle=False,
+        )
+        if column_name == TIMESTAMP_LABEL:
+            values = values.view("datetime64[ns]")
+        elif column_schema["dtype"] == CATEGORY_DTYPE:
+            values = pd.Categorical.from_codes(values, column_schema["categories"])
+        loaded_columns[column_name] = values
+
+    return loaded_columns
+
+
+def load_processed_dataset(directory: str, columns: List[str] = None) -> pd.DataFrame:
+    """ Load an exported dataset into a timestamp-indexed DataFrame. Unlike load_processed_dataset_columns(),
+        this reads all of the data into memory.
+
+        Args:
+            directory: Directory written by export_processed_dataset().
+            columns: Optional. Names of the columns to load. Defaults to all columns.
+        Returns:
+            Timestamp-indexed DataFrame of the exported columns.
+    """
+    loaded_columns = load_processed_dataset_columns(directory, columns)
+    timestamps = loaded_columns.pop(TIMESTAMP_LABEL)
+
+    return pd.DataFrame(
+        {
+            column_name: values
+            if isinstance(values, pd.Categorical)
+            else np.array(values)
+            for column_name, values in loaded_columns.items()
+        },
+        index=pd.DatetimeIndex(np.array(timestamps), name=TIMESTAMP_LABEL),
+        columns=list(loaded_columns),
+    )
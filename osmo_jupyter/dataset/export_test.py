@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import osmo_jupyter.dataset.export as module
+
+
+@pytest.fixture
+def processed_dataset():
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                ["2019-01-01 00:00:00", "2019-01-01 00:00:01", "2019-01-01 00:00:02"]
+            ),
+            "YSI DO (mg/L)": [4.81, 4.88, 4.95],
+            "setpoint ID": [0, 0, 1],
+        }
+    ).set_index("timestamp")
+
+
+class TestExportProcessedDataset:
+    def test_round_trips_with_fixed_dtypes(self, processed_dataset, tmp_path):
+        module.export_processed_dataset(processed_dataset, str(tmp_path))
+
+        loaded_dataset = module.load_processed_dataset(str(tmp_path))
+
+        expected_dataset = processed_dataset.astype(
+            {"YSI DO (mg/L)": "float32", "setpoint ID": "int64"}
+        )
+        pd.testing.assert_frame_equal(loaded_dataset, expected_dataset)
+
+    def test_writes_schema(self, processed_dataset, tmp_path):
+        module.export_processed_dataset(processed_dataset, str(tmp_path))
+
+        schema = json.loads((tmp_path / module.SCHEMA_FILENAME).read_text())
+
+        assert schema["row_count"] == 3
+        assert [(column["name"], column["dtype"]) for column in schema["columns"]] == [
+            ("timestamp", "int64"),
+            ("YSI DO (mg/L)", "float32"),
+            ("setpoint ID", "int64"),
+        ]
+
+    def test_loads_read_only_memory_maps(self, processed_dataset, tmp_path):
+        module.export_processed_dataset(processed_dataset, str(tmp_path))
+
+        columns = module.load_processed_dataset_columns(str(tmp_path))
+
+        assert isinstance(columns["YSI DO (mg/L)"], np.memmap)
+        assert not columns["YSI DO (mg/L)"].flags.writeable
+        np.testing.assert_array_equal(
+            columns["timestamp"], processed_dataset.index.values
+        )
+
+    def test_round_trips_non_numeric_columns(self, processed_dataset, tmp_path):
+        processed_dataset["equilibration status"] = ["waiting", None, "equilibrated"]
+        processed_dataset["alarm"] = [False, True, False]
+
+        module.export_processed_dataset(
+            processed_dataset, str(tmp_path), value_dtype="float64"
+        )
+        loaded_dataset = module.load_processed_dataset(str(tmp_path))
+
+        expected_dataset = processed_dataset.astype(
+            {"equilibration status": "category"}
+        )
+        pd.testing.assert_frame_equal(loaded_dataset, expected_dataset)
+
+    def test_loads_selected_columns(self, processed_dataset, tmp_path):
+        module.export_processed_dataset(processed_dataset, str(tmp_path))
+
+        columns = module.load_processed_dataset_columns(
+            str(tmp_path), columns=["setpoint ID"]
+        )
+
+        assert list(columns) == ["timestamp", "setpoint ID"]
+
+    def test_rejects_unsupported_dtypes(self, processed_dataset, tmp_path):
+        processed_dataset["duration"] = pd.Timedelta(seconds=1)
+
+        with pytest.raises(ValueError):
+            module.export_processed_dataset(processed_dataset, str(tmp_path))
+
+    def test_rejects_unsupported_format_version(self, processed_dataset, tmp_path):
+        module.export_processed_dataset(processed_dataset, str(tmp_path))
+        schema_path = tmp_path / module.SCHEMA_FILENAME
+        schema = json.loads(schema_path.read_text())
+        schema["format_version"] = module.EXPORT_FORMAT_VERSION + 1
+        schema_path.write_text(json.dumps(schema))
+
+        with pytest.raises(ValueError):
+            module.load_processed_dataset_columns(str(tmp_path))
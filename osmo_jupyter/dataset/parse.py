@@ -1,10 +1,17 @@
 """ Functions to parse and clean source data files in a consistent way.
 """
 import datetime
-from typing import Dict
+import functools
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .cache import cached_parser
+
 
 # Standard column names to align various data formats on
 TIMESTAMP_LABEL = "timestamp"
@@ -19,6 +26,18 @@ FILENAME_TIMESTAMP_LENGTH = len("2018-01-01--12-01-01")
 
 ATMOSPHERIC_OXYGEN_FRACTION = 0.2095  # From calibration-environment YSI driver
 
+# Bump this whenever the output of a cached parse_* or process_* function changes,
+# so that previously cached results are not reused
+PARSER_VERSION = 2
+
+# Compact dtypes used for each kind of column when parsing with compact=True.
+# Timestamps are always parsed as datetime64[ns], which is stored as int64 nanoseconds since the epoch.
+COMPACT_MEASUREMENT_DTYPE = "float32"
+COMPACT_ID_DTYPE = "category"
+
+# Number of raw rows to read at a time when streaming large instrument files
+DEFAULT_CHUNK_SIZE = 100000
+
 DATASET_COLUMNS = [
     TIMESTAMP_LABEL,
     f"YSI {DO_MMHG_LABEL}",
@@ -47,6 +66,129 @@ def datetime_from_filename(filename: str) -> datetime.datetime:
     )
 
 
+_FILENAME_DATETIME_TEMPLATE = "YYYY-MM-DD--hh-mm-ss"
+
+_NANOSECONDS_PER_UNIT = {
+    "h": 60 * 60 * 10 ** 9,
+    "m": 60 * 10 ** 9,
+    "s": 10 ** 9,
+}
+
+# PicoLog timestamps have a UTC offset, e.g. "2019-01-01T00:00:00-07:00", which is ignored
+_PICOLOG_TIMESTAMP_TEMPLATE = "YYYY-MM-DDThh:mm:ss???:??"
+# Calibration log timestamps may have fractional seconds, e.g. "2019-01-01 00:00:00.1",
+# which are truncated by only parsing the whole-second prefix
+_CALIBRATION_LOG_TIMESTAMP_TEMPLATE = "YYYY-MM-DD hh:mm:ss"
+
+_FIELD_LIMITS = {"M": (1, 12), "h": (0, 23), "m": (0, 59), "s": (0, 59)}
+
+
+def _parse_fixed_width_datetimes(strings, template: str) -> np.ndarray:
+    """ Parse an array of strings that start with a fixed-width datetime, all at once.
+
+        Args:
+            strings: array-like of strings.
+            template: Layout of the datetime prefix, with each digit marked by the field it belongs to ("Y" year,
+                "M" month, "D" day, "h" hour, "m" minute, "s" second), "?" for any character that is ignored, and
+                all other characters expected literally. e.g. "YYYY-MM-DD hh:mm:ss"
+        Returns:
+            numpy datetime64[ns] array, with NaT wherever a string doesn't match the template.
+    """
+    # Truncate everything to the prefix and view each character as its unicode code point
+    prefixes = np.asarray(strings, dtype=f"U{len(template)}")
+    code_points = (
+        prefixes.view(np.uint32).reshape(len(prefixes), len(template)).astype(np.int64)
+    )
+    digits = code_points - ord("0")
+
+    is_valid = np.ones(len(prefixes), dtype=bool)
+    field_values = {}
+    for position, template_character in enumerate(template):
+        if template_character in "YMDhms":
+            is_valid &= (digits[:, position] >= 0) & (digits[:, position] <= 9)
+            field_values[template_character] = (
+                field_values.get(template_character, 0) * 10 + digits[:, position]
+            )
+        elif template_character != "?":
+            is_valid &= code_points[:, position] == ord(template_character)
+
+    for field, (minimum, maximum) in _FIELD_LIMITS.items():
+        if field in field_values:
+            is_valid &= (field_values[field] >= minimum) & (
+                field_values[field] <= maximum
+            )
+
+    months_since_epoch = (field_values["Y"] - 1970) * 12 + field_values["M"] - 1
+    # Use a valid placeholder month for invalid rows to avoid overflowing datetime64
+    month_starts = np.where(is_valid, months_since_epoch, 0).astype("datetime64[M]")
+    days_in_month = (month_starts + 1).astype("datetime64[D]") - month_starts.astype(
+        "datetime64[D]"
+    )
+    is_valid &= (field_values["D"] >= 1) & (
+        field_values["D"] <= days_in_month.astype(np.int64)
+    )
+
+    nanoseconds_since_epoch = (
+        month_starts.astype("datetime64[ns]").astype(np.int64)
+        + (field_values["D"] - 1) * 24 * _NANOSECONDS_PER_UNIT["h"]
+    )
+    for field, nanoseconds_per_unit in _NANOSECONDS_PER_UNIT.items():
+        if field in field_values:
+            nanoseconds_since_epoch += field_values[field] * nanoseconds_per_unit
+
+    datetimes = nanoseconds_since_epoch.astype("datetime64[ns]")
+    datetimes[~is_valid] = np.datetime64("NaT")
+    return datetimes
+
+
+def _floor_to_whole_seconds(datetimes: np.ndarray) -> np.ndarray:
+    # Floor on the int64 nanosecond representation, rather than formatting and re-parsing strings
+    nanoseconds_per_second = _NANOSECONDS_PER_UNIT["s"]
+    nanoseconds_since_epoch = datetimes.astype("datetime64[ns]").astype(np.int64)
+    floored = nanoseconds_since_epoch // nanoseconds_per_second * nanoseconds_per_second
+    return np.where(np.isnat(datetimes), datetimes, floored.astype("datetime64[ns]"))
+
+
+def _parse_timestamp_strings(
+    timestamp_strings: pd.Series, template: str, truncate_fractional_seconds: bool
+) -> np.ndarray:
+    """ Parse a column of timestamp strings that are expected to follow a known, fixed-width layout using a fast
+        vectorized path, falling back to generic parsing for any values that don't match the layout.
+        Any timezone information is stripped, keeping the local wall-clock time.
+    """
+    timestamps = _parse_fixed_width_datetimes(timestamp_strings.values, template)
+
+    unmatched = np.isnat(timestamps) & timestamp_strings.notnull().values
+    if unmatched.any():
+        fallback_timestamps = pd.DatetimeIndex(
+            pd.to_datetime(timestamp_strings[unmatched], utc=False)
+        )
+        if fallback_timestamps.tz is not None:
+            fallback_timestamps = fallback_timestamps.tz_localize(None)
+
+        timestamps[unmatched] = (
+            _floor_to_whole_seconds(fallback_timestamps.values)
+            if truncate_fractional_seconds
+            else fallback_timestamps.values
+        )
+
+    return timestamps
+
+
+def datetimes_from_filenames(filenames) -> np.ndarray:
+    """ Recover the datetimes that have been encoded into many filenames at once.
+        A vectorized equivalent of datetime_from_filename().
+
+        Args:
+            filenames: array-like (e.g. list or Series) of filenames to process. Each should start with an
+                ISO-ish datetime as produced by iso_datetime_for_filename()
+        Returns:
+            numpy datetime64[ns] array of the datetimes encoded in each filename,
+            with NaT for any filename that doesn't start with a valid datetime.
+    """
+    return _parse_fixed_width_datetimes(filenames, _FILENAME_DATETIME_TEMPLATE)
+
+
 def _calculate_partial_pressure(do_percent_saturation, barometric_pressure_mmhg):
     do_fraction_saturation = do_percent_saturation * 0.01
     return (
@@ -62,160 +204,690 @@ def _remove_unused_columns(df):
     return df.drop(columns=columns_to_drop)
 
 
-def generate_time_based_setpoint_ids(timestamped_series: pd.Series) -> pd.Series:
+# Equilibration between setpoints takes longer than this, and consecutive image captures at a setpoint are closer
+DEFAULT_SETPOINT_GAP = pd.Timedelta(minutes=5)
+
+
+def _get_setpoint_ids_from_sorted_nanoseconds(
+    timestamps_ns: np.ndarray,
+    max_gap_ns: int,
+    previous_timestamp_ns: int = None,
+    previous_setpoint_id: int = 0,
+) -> np.ndarray:
+    """ Increment a running setpoint ID at every gap between sorted int64 nanosecond timestamps longer than max_gap_ns.
+        previous_timestamp_ns and previous_setpoint_id continue the count from a preceding chunk of timestamps.
+    """
+    setpoint_transitions = np.empty(len(timestamps_ns), dtype=np.int64)
+    if len(timestamps_ns):
+        setpoint_transitions[0] = (
+            previous_timestamp_ns is not None
+            and timestamps_ns[0] - previous_timestamp_ns > max_gap_ns
+        )
+        np.greater(np.diff(timestamps_ns), max_gap_ns, out=setpoint_transitions[1:])
+
+    setpoint_ids = np.cumsum(setpoint_transitions, out=setpoint_transitions)
+    setpoint_ids += previous_setpoint_id
+    return setpoint_ids
+
+
+def generate_time_based_setpoint_ids(
+    timestamped_series: pd.Series, max_gap: pd.Timedelta = DEFAULT_SETPOINT_GAP
+) -> pd.Series:
     """ Generate a series of setpoint IDs based on gaps between timestamps in provided Series.
         Used to identify setpoint change by measuring time gap between image captures.
 
-        This is dependent upon equilibration between setpoints taking >5 mins and the time between
-        consecutive image captures at a setpoint being <5 mins.
+        This is dependent upon equilibration between setpoints taking longer than max_gap and the time between
+        consecutive image captures at a setpoint being shorter than max_gap.
 
         Args:
-            timestamped_series: A datetime-indexed series
+            timestamped_series: A datetime-indexed series. Already-sorted input is used without being copied.
+            max_gap: Optional. Gaps between consecutive timestamps longer than this start a new setpoint.
+                Defaults to 5 minutes.
         Returns:
-            A series mapping a setpoint ID to each index in the input series.
+            A series mapping a setpoint ID to each index in the input series, sorted by timestamp.
     """
+    timestamps_index = timestamped_series.index
+    if not timestamps_index.is_monotonic_increasing:
+        timestamps_index = timestamps_index.sort_values()
 
-    timestamps_sorted = timestamped_series.sort_index()
-
-    setpoint_transitions = timestamps_sorted.index.to_series().diff() > datetime.timedelta(
-        minutes=5
+    setpoint_ids = _get_setpoint_ids_from_sorted_nanoseconds(
+        timestamps_index.asi8, pd.Timedelta(max_gap).value
     )
-    setpoint_ids = setpoint_transitions.astype(int).cumsum()
-    return setpoint_ids
+    return pd.Series(setpoint_ids, index=timestamps_index, name=timestamps_index.name)
+
+
+def iter_time_based_setpoint_ids(
+    timestamped_chunks: Iterable[pd.Series],
+    max_gap: pd.Timedelta = DEFAULT_SETPOINT_GAP,
+) -> Iterator[pd.Series]:
+    """ Generate setpoint IDs for a stream of datetime-indexed chunks, e.g. image timestamps from many attempts,
+        in one pass. The running setpoint ID is carried across chunks, so the concatenated output matches
+        generate_time_based_setpoint_ids() on all of the chunks at once.
+
+        Args:
+            timestamped_chunks: Datetime-indexed series (or DataFrames). Each chunk is sorted if necessary, but chunks
+                must be provided in time order.
+            max_gap: Optional. Gaps between consecutive timestamps longer than this start a new setpoint.
+                Defaults to 5 minutes.
+        Returns:
+            Iterator of series mapping a setpoint ID to each index in the corresponding chunk.
+        Raises:
+            ValueError: if a chunk starts before the end of the chunk before it.
+    """
+    max_gap_ns = pd.Timedelta(max_gap).value
+    previous_timestamp_ns = None
+    previous_setpoint_id = 0
+
+    for timestamped_chunk in timestamped_chunks:
+        timestamps_index = timestamped_chunk.index
+        if not timestamps_index.is_monotonic_increasing:
+            timestamps_index = timestamps_index.sort_values()
+
+        timestamps_ns = timestamps_index.asi8
+        if len(timestamps_ns) == 0:
+            continue
+
+        if (
+            previous_timestamp_ns is not None
+            and timestamps_ns[0] < previous_timestamp_ns
+        ):
+            raise ValueError(
+                f"Chunk starting at {timestamps_index[0]} overlaps the previous chunk. Chunks must be in time order."
+            )
+
+        setpoint_ids = _get_setpoint_ids_from_sorted_nanoseconds(
+            timestamps_ns, max_gap_ns, previous_timestamp_ns, previous_setpoint_id
+        )
+        yield pd.Series(
+            setpoint_ids, index=timestamps_index, name=timestamps_index.name
+        )
+
+        previous_timestamp_ns = timestamps_ns[-1]
+        previous_setpoint_id = setpoint_ids[-1]
+
+
+def _get_read_csv_schema_kwargs(
+    parse_config: Dict, compact: bool, columns: List[str] = None
+) -> Dict:
+    """ Get usecols and dtype keyword arguments for pd.read_csv, so that dropped (or unrequested) columns are
+        never read and compact columns are parsed straight into their compact dtype.
+        Requested columns are given by their parsed (renamed and prefixed) names; the raw timestamp column(s)
+        are always read.
+    """
+    if columns is None:
+        dropped_columns = set(parse_config["drop"])
+
+        def use_column(column_name):
+            return column_name not in dropped_columns
+
+    else:
+        selected_columns = set(columns)
+        timestamp_columns = set(parse_config["timestamp_columns"])
+
+        def use_column(column_name):
+            parsed_column_name = parse_config["prefix"] + parse_config["rename"].get(
+                column_name, column_name
+            )
+            return (
+                column_name in timestamp_columns
+                or parsed_column_name in selected_columns
+            )
+
+    schema_kwargs = {"usecols": use_column}
+    if compact:
+        schema_kwargs["dtype"] = parse_config["compact_dtypes"]
+
+    return schema_kwargs
 
 
 def _apply_parser_configuration(
     dataset: pd.DataFrame, parse_config: Dict
 ) -> pd.DataFrame:
     return (
-        dataset.drop(columns=parse_config["drop"])
-        .rename(columns=parse_config["rename"])
+        dataset.rename(columns=parse_config["rename"])
         .set_index("timestamp")
         .add_prefix(parse_config["prefix"])
     )
 
 
-def parse_ysi_prosolo_file(filepath: str) -> pd.DataFrame:
+_YSI_PROSOLO_PARSE_CONFIG = {
+    "rename": {
+        "DATE_TIME": TIMESTAMP_LABEL,
+        "Barometer (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
+        "ODO (% Sat)": DO_PCT_LABEL,
+        "ODO (mg/L)": DO_MGL_LABEL,
+        "Temp (°C)": TEMPERATURE_C_LABEL,
+    },
+    "drop": ["SITE", "DATA ID", "ODO (% Local)"],
+    "timestamp_columns": ["DATE", "TIME"],
+    "prefix": "YSI ",
+    "compact_dtypes": {
+        "Barometer (mmHg)": COMPACT_MEASUREMENT_DTYPE,
+        "ODO (% Sat)": COMPACT_MEASUREMENT_DTYPE,
+        "ODO (mg/L)": COMPACT_MEASUREMENT_DTYPE,
+        "Temp (°C)": COMPACT_MEASUREMENT_DTYPE,
+    },
+}
+
+_YSI_PROODO_PARSE_CONFIG = {
+    "rename": {
+        "Timestamp": TIMESTAMP_LABEL,
+        "Barometer (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
+        "Dissolved Oxygen (%)": DO_PCT_LABEL,
+        "Temperature (C)": TEMPERATURE_C_LABEL,
+        "Unit ID": "unit ID",
+    },
+    "drop": ["Comment", "Site", "Folder"],
+    "timestamp_columns": ["Timestamp"],
+    "prefix": "YSI ",
+    "compact_dtypes": {
+        "Barometer (mmHg)": COMPACT_MEASUREMENT_DTYPE,
+        "Dissolved Oxygen (%)": COMPACT_MEASUREMENT_DTYPE,
+        "Temperature (C)": COMPACT_MEASUREMENT_DTYPE,
+        "Unit ID": COMPACT_ID_DTYPE,
+    },
+}
+
+_PICOLOG_PARSE_CONFIG = {
+    "rename": {
+        "Unnamed: 0": TIMESTAMP_LABEL,
+        "Temperature Ave. (C)": TEMPERATURE_C_LABEL,
+        "Pressure Ave. (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
+    },
+    "drop": ["Pressure (Voltage) Ave. (nV)"],
+    "timestamp_columns": ["Unnamed: 0"],
+    "prefix": "PicoLog ",
+    "compact_dtypes": {
+        "Temperature Ave. (C)": COMPACT_MEASUREMENT_DTYPE,
+        "Pressure Ave. (mmHg)": COMPACT_MEASUREMENT_DTYPE,
+    },
+}
+
+_CALIBRATION_LOG_PARSE_CONFIG = {
+    "rename": {},
+    "drop": [],
+    "timestamp_columns": [TIMESTAMP_LABEL],
+    "prefix": "",
+    "compact_dtypes": {
+        "N2 gas ID": COMPACT_ID_DTYPE,
+        "O2 source gas gas ID": COMPACT_ID_DTYPE,
+        f"YSI {DO_PCT_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"YSI {DO_MGL_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"YSI {DO_MMHG_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"YSI {BAROMETRIC_PRESSURE_MMHG_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"YSI {TEMPERATURE_C_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        "equilibration status": COMPACT_ID_DTYPE,
+        "gas mixer N2 fraction in mix": COMPACT_MEASUREMENT_DTYPE,
+        "gas mixer O2 source gas fraction in mix": COMPACT_MEASUREMENT_DTYPE,
+        "gas mixer flow rate (SLPM)": COMPACT_MEASUREMENT_DTYPE,
+        "gas mixer mix pressure (mmHg)": COMPACT_MEASUREMENT_DTYPE,
+        "o2 source gas fraction": COMPACT_MEASUREMENT_DTYPE,
+        "setpoint O2 fraction": COMPACT_MEASUREMENT_DTYPE,
+        "setpoint flow rate (SLPM)": COMPACT_MEASUREMENT_DTYPE,
+        "setpoint hold time seconds": COMPACT_MEASUREMENT_DTYPE,
+        f"setpoint {TEMPERATURE_C_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"water bath external sensor {TEMPERATURE_C_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+        f"water bath internal {TEMPERATURE_C_LABEL}": COMPACT_MEASUREMENT_DTYPE,
+    },
+}
+
+
+def _read_ysi_prosolo_csv(filepath, compact, columns=None, **read_csv_kwargs):
+    return pd.read_csv(
+        filepath,
+        skiprows=5,
+        encoding="latin-1",
+        parse_dates=[["DATE", "TIME"]],
+        **_get_read_csv_schema_kwargs(_YSI_PROSOLO_PARSE_CONFIG, compact, columns),
+        **read_csv_kwargs,
+    )
+
+
+def _read_ysi_proodo_csv(filepath, compact, columns=None, **read_csv_kwargs):
+    return pd.read_csv(
+        filepath,
+        parse_dates=["Timestamp"],
+        **_get_read_csv_schema_kwargs(_YSI_PROODO_PARSE_CONFIG, compact, columns),
+        **read_csv_kwargs,
+    )
+
+
+@cached_parser(PARSER_VERSION)
+def parse_ysi_prosolo_file(
+    filepath: str, compact: bool = False, columns: List[str] = None
+) -> pd.DataFrame:
     """ Open and format a YSI KorDSS/ProSolo formatted csv file, with standardized datetime parsing
         and cleaned up columns.
 
         Args:
             filepath: Filepath to a YSI KorDSS csv file.
+            compact: Optional. If True, measurements are parsed as float32 and IDs as categoricals, which uses
+                much less memory. Defaults to False (float64 measurements and string IDs).
+            columns: Optional. Parsed names of the columns to read (e.g. "YSI DO (% sat)"); any other
+                columns are skipped entirely. Defaults to all columns.
         Returns:
             Pandas DataFrame of the data, with DATE and TIME columns parsed together,
             and standardized column names.
     """
-    parse_config = {
-        "rename": {
-            "DATE_TIME": TIMESTAMP_LABEL,
-            "Barometer (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
-            "ODO (% Sat)": DO_PCT_LABEL,
-            "ODO (mg/L)": DO_MGL_LABEL,
-            "Temp (°C)": TEMPERATURE_C_LABEL,
-        },
-        "drop": ["SITE", "DATA ID", "ODO (% Local)"],
-        "prefix": "YSI ",
-    }
-    raw_data = pd.read_csv(
-        filepath, skiprows=5, encoding="latin-1", parse_dates=[["DATE", "TIME"]]
-    )
-    return _apply_parser_configuration(raw_data, parse_config)
+    raw_data = _read_ysi_prosolo_csv(filepath, compact, columns)
+    return _apply_parser_configuration(raw_data, _YSI_PROSOLO_PARSE_CONFIG)
 
 
-def parse_ysi_proodo_file(filepath: str) -> pd.DataFrame:
+@cached_parser(PARSER_VERSION)
+def parse_ysi_proodo_file(
+    filepath: str, compact: bool = False, columns: List[str] = None
+) -> pd.DataFrame:
     """ Open and format a YSI "classic"/ProODO csv file, with standardized datetime parsing
         and cleaned up columns.
 
         Args:
             filepath: Filepath to a YSI csv file.
+            compact: Optional. If True, measurements are parsed as float32 and IDs as categoricals, which uses
+                much less memory. Defaults to False (float64 measurements and string IDs).
+            columns: Optional. Parsed names of the columns to read (e.g. "YSI DO (% sat)"); any other
+                columns are skipped entirely. Defaults to all columns.
         Returns:
             Pandas DataFrame of the data, with Timestamp column parsed as a datetime dtype,
             and standardized column names.
     """
-    parse_config = {
-        "rename": {
-            "Timestamp": TIMESTAMP_LABEL,
-            "Barometer (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
-            "Dissolved Oxygen (%)": DO_PCT_LABEL,
-            "Temperature (C)": TEMPERATURE_C_LABEL,
-            "Unit ID": "unit ID",
-        },
-        "drop": ["Comment", "Site", "Folder"],
-        "prefix": "YSI ",
-    }
+    raw_data = _read_ysi_proodo_csv(filepath, compact, columns)
+    return _apply_parser_configuration(raw_data, _YSI_PROODO_PARSE_CONFIG)
 
-    raw_data = pd.read_csv(filepath, parse_dates=["Timestamp"])
-    return _apply_parser_configuration(raw_data, parse_config)
 
+def iter_ysi_prosolo_file_chunks(
+    filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE, compact: bool = False
+) -> Iterator[pd.DataFrame]:
+    """ Stream a YSI KorDSS/ProSolo formatted csv file as a series of cleaned up DataFrames, so that
+        arbitrarily long logs can be handled without loading the whole file into memory.
 
-def parse_picolog_file(filepath: str) -> pd.DataFrame:
+        Args:
+            filepath: Filepath to a YSI KorDSS csv file.
+            chunk_size: Optional. Maximum number of raw rows in each chunk.
+            compact: Optional. If True, parse with compact dtypes. See parse_ysi_prosolo_file().
+        Returns:
+            Iterator of DataFrames formatted the same as parse_ysi_prosolo_file() output,
+            together covering every row in the file, in file order.
+    """
+    for raw_chunk in _read_ysi_prosolo_csv(filepath, compact, chunksize=chunk_size):
+        yield _apply_parser_configuration(raw_chunk, _YSI_PROSOLO_PARSE_CONFIG)
+
+
+def iter_ysi_proodo_file_chunks(
+    filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE, compact: bool = False
+) -> Iterator[pd.DataFrame]:
+    """ Stream a YSI "classic"/ProODO csv file as a series of cleaned up DataFrames, so that
+        arbitrarily long logs can be handled without loading the whole file into memory.
+
+        Args:
+            filepath: Filepath to a YSI csv file.
+            chunk_size: Optional. Maximum number of raw rows in each chunk.
+            compact: Optional. If True, parse with compact dtypes. See parse_ysi_proodo_file().
+        Returns:
+            Iterator of DataFrames formatted the same as parse_ysi_proodo_file() output,
+            together covering every row in the file, in file order.
+    """
+    for raw_chunk in _read_ysi_proodo_csv(filepath, compact, chunksize=chunk_size):
+        yield _apply_parser_configuration(raw_chunk, _YSI_PROODO_PARSE_CONFIG)
+
+
+@cached_parser(PARSER_VERSION)
+def parse_picolog_file(
+    filepath: str, compact: bool = False, columns: List[str] = None
+) -> pd.DataFrame:
     """ Open and format a PicoLog csv file, with standardized datetime parsing
         and cleaned up columns.
 
         Args:
             filepath: Filepath to a PicoLog csv file.
+            compact: Optional. If True, measurements are parsed as float32 and IDs as categoricals, which uses
+                much less memory. Defaults to False (float64 measurements and string IDs).
+            columns: Optional. Parsed names of the columns to read (e.g. "PicoLog temperature (C)"); any other
+                columns are skipped entirely. Defaults to all columns.
         Returns:
             Pandas DataFrame of the data, with the unlabeled timestamp column parsed
             as a datetime dtype with the timezone stripped, and standardized column names.
     """
-    parse_config = {
-        "rename": {
-            "Unnamed: 0": TIMESTAMP_LABEL,
-            "Temperature Ave. (C)": TEMPERATURE_C_LABEL,
-            "Pressure Ave. (mmHg)": BAROMETRIC_PRESSURE_MMHG_LABEL,
-        },
-        "drop": ["Pressure (Voltage) Ave. (nV)"],
-        "prefix": "PicoLog ",
-    }
     raw_data = pd.read_csv(
-        filepath,
-        parse_dates=[0],
-        date_parser=lambda col: pd.to_datetime(col, utc=False).tz_localize(None),
+        filepath, **_get_read_csv_schema_kwargs(_PICOLOG_PARSE_CONFIG, compact, columns)
+    )
+    timestamp_column = raw_data.columns[0]
+    raw_data[timestamp_column] = _parse_timestamp_strings(
+        raw_data[timestamp_column],
+        _PICOLOG_TIMESTAMP_TEMPLATE,
+        truncate_fractional_seconds=False,
     )
 
-    return _apply_parser_configuration(raw_data, parse_config)
+    return _apply_parser_configuration(raw_data, _PICOLOG_PARSE_CONFIG)
 
 
-def parse_calibration_log_file(filepath: str) -> pd.DataFrame:
+@cached_parser(PARSER_VERSION)
+def parse_calibration_log_file(
+    filepath: str, compact: bool = False, columns: List[str] = None
+) -> pd.DataFrame:
     """ Open and format a calibration log csv file, with standardized datetime parsing.
 
         Args:
-            filepath: Filepath to a PicoLog csv file.
+            filepath: Filepath to a calibration log csv file.
+            compact: Optional. If True, measurements are parsed as float32 and IDs as categoricals, which uses
+                much less memory. Defaults to False (float64 measurements and string IDs).
+            columns: Optional. Names of the columns to read; any other columns are skipped entirely.
+                Defaults to all columns.
         Returns:
             Pandas DataFrame of the raw data, with timestamp column parsed
             as a datetime dtype with fractional seconds truncated.
     """
-    parse_config = {"rename": {}, "drop": [], "prefix": ""}
     raw_data = pd.read_csv(
         filepath,
-        parse_dates=["timestamp"],
-        date_parser=lambda col: pd.to_datetime(col, utc=False).strftime(
-            "%Y-%m-%d %H:%M:%S"
-        ),  # Truncate fractional seconds
+        **_get_read_csv_schema_kwargs(_CALIBRATION_LOG_PARSE_CONFIG, compact, columns),
+    )
+    raw_data[TIMESTAMP_LABEL] = _parse_timestamp_strings(
+        raw_data[TIMESTAMP_LABEL],
+        _CALIBRATION_LOG_TIMESTAMP_TEMPLATE,
+        truncate_fractional_seconds=True,
+    )
+
+    return _apply_parser_configuration(raw_data, _CALIBRATION_LOG_PARSE_CONFIG)
+
+
+SETPOINT_COLUMNS = [
+    f"setpoint {TEMPERATURE_C_LABEL}",
+    "setpoint flow rate (SLPM)",
+    "setpoint O2 fraction",
+    "setpoint hold time seconds",
+]
+
+_SETPOINTS_PARSE_CONFIG = {
+    # Setpoint sequence files have one column per field of a setpoint, which the calibration log records as its
+    # setpoint columns
+    "rename": {
+        "temperature": f"setpoint {TEMPERATURE_C_LABEL}",
+        "flow_rate_slpm": "setpoint flow rate (SLPM)",
+        "o2_fraction": "setpoint O2 fraction",
+        "hold_time": "setpoint hold time seconds",
+    },
+    "drop": [],
+    "compact_dtypes": {
+        "temperature": COMPACT_MEASUREMENT_DTYPE,
+        "flow_rate_slpm": COMPACT_MEASUREMENT_DTYPE,
+        "o2_fraction": COMPACT_MEASUREMENT_DTYPE,
+        "hold_time": COMPACT_MEASUREMENT_DTYPE,
+    },
+}
+
+
+@cached_parser(PARSER_VERSION)
+def parse_setpoints_file(filepath: str, compact: bool = False) -> pd.DataFrame:
+    """ Open and format a setpoints csv file: the sequence of setpoints that the calibration environment was
+        programmed to run through.
+
+        Args:
+            filepath: Filepath to a setpoints csv file.
+            compact: Optional. If True, setpoint values are parsed as float32. Defaults to False (float64).
+        Returns:
+            Pandas DataFrame with one row per setpoint in sequence order, with columns named to match the
+            setpoint columns in the calibration log (SETPOINT_COLUMNS).
+    """
+    raw_data = pd.read_csv(
+        filepath, **_get_read_csv_schema_kwargs(_SETPOINTS_PARSE_CONFIG, compact)
     )
+    return raw_data.rename(columns=_SETPOINTS_PARSE_CONFIG["rename"])
+
+
+def _get_programmed_setpoints(
+    logged_setpoints: pd.DataFrame, programmed_setpoints: pd.DataFrame
+) -> pd.DataFrame:
+    """ Get the programmed setpoint matching each row of logged setpoint values, or NaNs where none match.
+    """
+    setpoint_columns = list(programmed_setpoints.columns)
+    logged_values = logged_setpoints[setpoint_columns].values.astype(float)
+    programmed_values = programmed_setpoints.values.astype(float)
 
-    return _apply_parser_configuration(raw_data, parse_config)
+    # (logged setpoint, programmed setpoint) matrix of whether every value matches
+    is_match = np.isclose(
+        logged_values[:, np.newaxis, :], programmed_values[np.newaxis, :, :]
+    ).all(axis=2)
+    # Add an always-matching column past the last programmed setpoint, so that argmax finds the first match, or
+    # that column where there is none
+    first_match_positions = np.concatenate(
+        [is_match, np.ones((len(logged_values), 1), dtype=bool)], axis=1
+    ).argmax(axis=1)
+    matched_positions = np.where(
+        first_match_positions < len(programmed_values), first_match_positions, -1
+    )
+
+    return programmed_setpoints.reset_index(drop=True).reindex(matched_positions)
+
+
+def _get_changed_row_mask(values: np.ndarray) -> np.ndarray:
+    """ Get a boolean mask of the rows of a 2D array that differ from the row before them, treating NaN as equal to
+        NaN. The first row is always considered changed.
+    """
+    previous_values = values[:-1]
+    next_values = values[1:]
+    is_different = (next_values != previous_values) & ~(
+        pd.isnull(next_values) & pd.isnull(previous_values)
+    )
+    return np.concatenate([[True], is_different.any(axis=1)])
 
 
-def _get_attempt_summary(attempt: pd.Series) -> pd.Series:
-    experiment_names = attempt["S3 Bucket(s)"].split("\n")
-    pond = attempt["Scum Tank"] if "Scum Tank" in attempt.index else "calibration"
-    return pd.Series(
+def get_interval_ids(start_times, end_times, timestamps, inclusive: bool) -> np.ndarray:
+    """ Find the interval that each timestamp is within, with a binary search over the interval start times.
+
+        Args:
+            start_times: Datetime64 array of the start of each interval, in any order.
+            end_times: Datetime64 array of the end of each interval, in the same order as start_times.
+                Intervals must not overlap.
+            timestamps: Array-like of datetimes, in any order.
+            inclusive: If True, timestamps exactly at the start or end of an interval are within it.
+                Otherwise they are not.
+        Returns:
+            Array of interval IDs: the position of each timestamp's interval in start_times,
+            or -1 for timestamps outside every interval.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+    if len(start_times) == 0:
+        return np.full(len(timestamps), -1)
+
+    start_times = np.asarray(start_times, dtype="datetime64[ns]")
+    end_times = np.asarray(end_times, dtype="datetime64[ns]")
+    interval_order = np.argsort(start_times, kind="mergesort")
+
+    # Position (in start time order) of the last interval starting before (or, if inclusive, at) each timestamp
+    sorted_positions = (
+        np.searchsorted(
+            start_times[interval_order],
+            timestamps,
+            side="right" if inclusive else "left",
+        )
+        - 1
+    )
+    # Clip so that timestamps before the first interval can be compared to its end time
+    interval_ids = interval_order[np.clip(sorted_positions, 0, None)]
+
+    is_before_end = (
+        timestamps <= end_times[interval_ids]
+        if inclusive
+        else timestamps < end_times[interval_ids]
+    )
+    return np.where((sorted_positions >= 0) & is_before_end, interval_ids, -1)
+
+
+class SetpointIntervalIndex:
+    """ Sorted, non-overlapping time intervals during which each setpoint was active, for labelling large arrays of
+        timestamps with setpoint IDs and target values in one vectorized search, without relying on time gaps
+        between image captures.
+
+        Args:
+            start_times: Sorted datetime64 array of the first timestamp at which each setpoint was active.
+            end_times: Datetime64 array of the last timestamp at which each setpoint was active.
+            setpoints: DataFrame of target values for each interval, in the same order as start_times.
+    """
+
+    def __init__(self, start_times, end_times, setpoints: pd.DataFrame):
+        self.start_times = np.asarray(start_times, dtype="datetime64[ns]")
+        self.end_times = np.asarray(end_times, dtype="datetime64[ns]")
+        self.setpoints = setpoints.reset_index(drop=True)
+
+    @classmethod
+    def from_calibration_log(
+        cls,
+        calibration_data: pd.DataFrame,
+        setpoint_columns: List[str] = None,
+        setpoints: pd.DataFrame = None,
+    ) -> "SetpointIntervalIndex":
+        """ Build an index from a parsed calibration log, starting a new setpoint interval wherever the setpoint
+            values (or loop count, if present) change.
+
+            Args:
+                calibration_data: Timestamp-indexed DataFrame from parse_calibration_log_file().
+                setpoint_columns: Optional. Columns that identify a setpoint. Defaults to the columns of setpoints,
+                    if provided, otherwise SETPOINT_COLUMNS.
+                setpoints: Optional. The programmed setpoints, e.g. from parse_setpoints_file(). If provided, the
+                    target values of each interval are those of the programmed setpoint that its logged setpoint
+                    values match, or NaN if none match. Defaults to the logged setpoint values.
+            Returns:
+                SetpointIntervalIndex with one interval per contiguous run of calibration log rows at a setpoint.
+        """
+        if setpoint_columns is None:
+            setpoint_columns = (
+                SETPOINT_COLUMNS if setpoints is None else list(setpoints.columns)
+            )
+
+        run_columns = list(setpoint_columns)
+        if "loop count" in calibration_data.columns:
+            run_columns.append("loop count")
+
+        sorted_calibration_data = calibration_data.sort_index()
+        timestamps = sorted_calibration_data.index.values
+
+        if len(timestamps) == 0:
+            start_positions = np.array([], dtype=int)
+        else:
+            start_positions = np.flatnonzero(
+                _get_changed_row_mask(sorted_calibration_data[run_columns].values)
+            )
+        end_positions = (
+            np.append(start_positions[1:], len(timestamps))[: len(start_positions)] - 1
+        )
+
+        interval_setpoints = sorted_calibration_data[list(setpoint_columns)].iloc[
+            start_positions
+        ]
+        if setpoints is not None:
+            interval_setpoints = _get_programmed_setpoints(
+                interval_setpoints, setpoints[list(setpoint_columns)]
+            )
+
+        return cls(
+            start_times=timestamps[start_positions],
+            end_times=timestamps[end_positions],
+            setpoints=interval_setpoints,
+        )
+
+    def __len__(self):
+        return len(self.start_times)
+
+    def get_setpoint_ids(self, timestamps) -> np.ndarray:
+        """ Look up the setpoint interval containing each timestamp.
+
+            Args:
+                timestamps: Array-like of datetimes, in any order.
+            Returns:
+                Array of setpoint IDs (positions in this index), with -1 for timestamps outside every interval.
+        """
+        return get_interval_ids(
+            self.start_times, self.end_times, timestamps, inclusive=True
+        )
+
+    def lookup(self, timestamps) -> pd.DataFrame:
+        """ Label timestamps with the setpoint that was active at each of them.
+
+            Args:
+                timestamps: Array-like of datetimes, in any order.
+            Returns:
+                DataFrame indexed by the provided timestamps with a setpoint ID column and the setpoint's target
+                values. Timestamps outside every interval get a setpoint ID of -1 and NaN target values.
+        """
+        setpoint_ids = self.get_setpoint_ids(timestamps)
+
+        # There is no setpoint at position -1, so reindexing gives those timestamps missing target values
+        labels = self.setpoints.reindex(setpoint_ids).reset_index(drop=True)
+        labels.insert(0, "setpoint ID", setpoint_ids)
+        labels.index = pd.DatetimeIndex(timestamps, name=TIMESTAMP_LABEL)
+        return labels
+
+
+_DATA_COLLECTION_LOG_SHEET_COLUMNS = {
+    "Calibration Environment": [
+        "S3 Bucket(s)",
+        "Drive Directory",
+        "Cosmobot ID",
+        "Cartridge",
+        "Start Date/Time",
+        "End Date/Time",
+    ],
+    "Scum tank": [
+        "S3 Bucket(s)",
+        "Drive Directory",
+        "Scum Tank",
+        "Cosmobot ID",
+        "Cartridge",
+        "Start Date/Time",
+        "End Date/Time",
+    ],
+}
+
+# Number of recently-parsed data collection log versions to keep in memory
+_DATA_COLLECTION_LOG_MEMO_SIZE = 8
+
+
+def _get_attempt_summaries(attempt_log: pd.DataFrame) -> pd.DataFrame:
+    pond = (
+        attempt_log["Scum Tank"].str.lower()
+        if "Scum Tank" in attempt_log.columns
+        else "calibration"
+    )
+    return pd.DataFrame(
         {
-            "experiment_names": experiment_names,
-            "drive_directory": attempt["Drive Directory"],
-            "pond": pond.lower(),
-            "cosmobot_id": attempt["Cosmobot ID"],
-            "cartridge_id": attempt["Cartridge"],
-            "start_date": attempt["Start Date/Time"],
-            "end_date": attempt["End Date/Time"],
-        }
+            "experiment_names": attempt_log["S3 Bucket(s)"].str.split("\n"),
+            "drive_directory": attempt_log["Drive Directory"],
+            "pond": pond,
+            "cosmobot_id": attempt_log["Cosmobot ID"],
+            "cartridge_id": attempt_log["Cartridge"],
+            "start_date": attempt_log["Start Date/Time"],
+            "end_date": attempt_log["End Date/Time"],
+        },
+        index=attempt_log.index,
+    )
+
+
+@functools.lru_cache(maxsize=_DATA_COLLECTION_LOG_MEMO_SIZE)
+def _parse_data_collection_log_version(
+    absolute_filepath: str, modification_time_ns: int
+) -> pd.DataFrame:
+    # modification_time_ns is only used as part of the memoization key, so that edited logs are re-parsed
+    workbook = pd.ExcelFile(absolute_filepath)
+
+    attempt_logs = [
+        workbook.parse(
+            sheet_name,
+            usecols=columns,
+            parse_dates=["Start Date/Time", "End Date/Time"],
+        )
+        for sheet_name, columns in _DATA_COLLECTION_LOG_SHEET_COLUMNS.items()
+    ]
+
+    return (
+        pd.concat([_get_attempt_summaries(attempt_log) for attempt_log in attempt_logs])
+        .sort_values("start_date")
+        .reset_index(drop=True)
     )
 
 
 def parse_data_collection_log(filepath: str) -> pd.DataFrame:
     """ Open and summarize a data collection log .xlsx file containing sheets named
-        "Calibration Environment" and "Scum tank".
+        "Calibration Environment" and "Scum tank". Only the needed columns are read, and the parsed log is kept
+        in memory until the file is modified.
 
         Args:
             filepath: Filepath to a data collection log .xlsx file
@@ -229,84 +901,622 @@ def parse_data_collection_log(filepath: str) -> pd.DataFrame:
                 start_date: Starting timestamp of data collection
                 end_date: Ending timestamp of data collection
     """
-    calibration_log = pd.read_excel(
-        filepath,
-        "Calibration Environment",
-        parse_dates=["Start Date/Time", "End Date/Time"],
-    )
-    scum_log = pd.read_excel(
-        filepath, "Scum tank", parse_dates=["Start Date/Time", "End Date/Time"]
-    )
+    absolute_filepath = os.path.abspath(filepath)
+    modification_time_ns = os.stat(absolute_filepath).st_mtime_ns
 
-    return (
-        pd.concat(
+    # Copy, including the experiment name lists, so that callers can't modify the memoized DataFrame
+    data_collection_log = _parse_data_collection_log_version(
+        absolute_filepath, modification_time_ns
+    ).copy()
+    data_collection_log["experiment_names"] = [
+        list(experiment_names)
+        for experiment_names in data_collection_log["experiment_names"]
+    ]
+    return data_collection_log
+
+
+def resample_contiguous_segments(
+    data: pd.DataFrame, max_gap: pd.Timedelta = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """ Upsample time series data to 1 second increments with linear interpolation, without interpolating
+        across gaps in the data. The data is split into contiguous segments wherever consecutive timestamps are
+        more than max_gap apart, and each segment is resampled separately, so the output size scales with how
+        much time the data actually covers rather than its total time span.
+
+        Args:
+            data: A datetime-indexed DataFrame, sorted by timestamp.
+            max_gap: Optional. Largest time between consecutive timestamps that is interpolated across.
+                Defaults to None, which treats the whole DataFrame as one segment.
+        Returns:
+            Tuple of:
+                the resampled DataFrame
+                DataFrame of segments, with one row per segment and columns start_time and end_time
+    """
+    timestamps = data.index.values
+
+    if max_gap is None or len(timestamps) == 0:
+        segment_start_positions = np.array([0] if len(timestamps) else [], dtype=int)
+    else:
+        is_gap = np.diff(timestamps) > np.timedelta64(pd.Timedelta(max_gap))
+        segment_start_positions = np.concatenate([[0], np.flatnonzero(is_gap) + 1])
+
+    segment_end_positions = np.append(segment_start_positions[1:], len(timestamps))
+
+    if len(segment_start_positions) > 1:
+        resampled_data = pd.concat(
             [
-                calibration_log.apply(_get_attempt_summary, axis=1),
-                scum_log.apply(_get_attempt_summary, axis=1),
+                data.iloc[start:end].resample("s").interpolate(method="slinear")
+                for start, end in zip(segment_start_positions, segment_end_positions)
             ]
         )
-        .sort_values("start_date")
-        .reset_index(drop=True)
+    else:
+        resampled_data = data.resample("s").interpolate(method="slinear")
+
+    segments = pd.DataFrame(
+        {
+            "start_time": data.index[segment_start_positions],
+            "end_time": data.index[segment_end_positions - 1],
+        }
     )
 
+    return resampled_data, segments
+
 
-def _prepare_ysi_data(ysi_data: pd.DataFrame) -> pd.DataFrame:
+def _prepare_ysi_data(
+    ysi_data: pd.DataFrame, max_gap: pd.Timedelta = None
+) -> pd.DataFrame:
     ysi_data[f"YSI {DO_MMHG_LABEL}"] = _calculate_partial_pressure(
         do_percent_saturation=ysi_data[f"YSI {DO_PCT_LABEL}"],
         barometric_pressure_mmhg=ysi_data[f"YSI {BAROMETRIC_PRESSURE_MMHG_LABEL}"],
     )
 
-    ysi_data_resampled = ysi_data.resample("s").interpolate(method="slinear")
-    ysi_data_rounded = ysi_data_resampled.round(6)
+    # Remove unused (possibly non-numeric) columns first so that they aren't resampled
+    trimmed_ysi_data = _remove_unused_columns(ysi_data)
 
-    return _remove_unused_columns(ysi_data_rounded)
+    ysi_data_resampled, _ = resample_contiguous_segments(trimmed_ysi_data, max_gap)
+    return ysi_data_resampled.round(6)
 
 
-def process_ysi_proodo_file(filepath: str) -> pd.DataFrame:
+@cached_parser(PARSER_VERSION)
+def process_ysi_proodo_file(
+    filepath: str, compact: bool = False, max_gap: pd.Timedelta = None
+) -> pd.DataFrame:
     """ Parse a YSI ProODO data csv as a DataFrame with only the columns necessary for deep learning.
         Numerical values are rounded.
 
         Args:
             filepath: Path to the source file.
+            compact: Optional. If True, parse with compact dtypes. See parse_ysi_proodo_file().
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
         Returns:
             DataFrame with timestamp and rounded temperature, DO, and barometric pressure vaules.
     """
-    ysi_proodo_data = parse_ysi_proodo_file(filepath)
-    return _prepare_ysi_data(ysi_proodo_data)
+    ysi_proodo_data = parse_ysi_proodo_file(filepath, compact=compact)
+    return _prepare_ysi_data(ysi_proodo_data, max_gap)
 
 
-def process_ysi_prosolo_file(filepath: str) -> pd.DataFrame:
+@cached_parser(PARSER_VERSION)
+def process_ysi_prosolo_file(
+    filepath: str, compact: bool = False, max_gap: pd.Timedelta = None
+) -> pd.DataFrame:
     """ Parse a YSI ProSolo data csv as a DataFrame with only the columns necessary for deep learning.
         Numerical values are rounded.
 
         Args:
             filepath: Path to the source file.
+            compact: Optional. If True, parse with compact dtypes. See parse_ysi_prosolo_file().
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
         Returns:
             DataFrame with timestamp and rounded temperature, DO, and barometric pressure vaules.
     """
-    ysi_prosolo_data = parse_ysi_prosolo_file(filepath)
-    return _prepare_ysi_data(ysi_prosolo_data)
+    ysi_prosolo_data = parse_ysi_prosolo_file(filepath, compact=compact)
+    return _prepare_ysi_data(ysi_prosolo_data, max_gap)
+
+
+def _prepare_chunk_after_previous_row(
+    chunk: pd.DataFrame,
+    previous_row: pd.DataFrame,
+    prepare_function: Callable,
+    max_gap: pd.Timedelta,
+) -> pd.DataFrame:
+    """ Resample a chunk of time series data together with the final row of the chunk before it (if any), so the
+        interval spanning the chunk boundary is interpolated, but without repeating already-prepared timestamps.
+    """
+    if previous_row is None:
+        return prepare_function(chunk, max_gap)
+
+    prepared_chunk = prepare_function(
+        pd.concat([previous_row, chunk], sort=False), max_gap
+    )
+    # The previous chunk already produced values up to and including its final timestamp
+    return prepared_chunk[prepared_chunk.index > previous_row.index[0]]
 
 
-def process_calibration_log_file(filepath: str) -> pd.DataFrame:
+def process_ysi_chunks(
+    ysi_chunks: Iterable[pd.DataFrame], max_gap: pd.Timedelta = None
+) -> Iterator[pd.DataFrame]:
+    """ Process a stream of parsed YSI data chunks with only the columns necessary for deep learning.
+        Each chunk is resampled and interpolated together with the final row of the chunk before it, so the
+        concatenated output matches processing the whole file at once while only holding one chunk in memory.
+
+        Args:
+            ysi_chunks: Time-ordered DataFrames from iter_ysi_prosolo_file_chunks() or iter_ysi_proodo_file_chunks().
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
+        Returns:
+            Iterator of DataFrames with timestamp and rounded temperature, DO, and barometric pressure values.
+    """
+    previous_row = None
+    for ysi_chunk in ysi_chunks:
+        if ysi_chunk.empty:
+            continue
+
+        yield _prepare_chunk_after_previous_row(
+            ysi_chunk, previous_row, _prepare_ysi_data, max_gap
+        )
+        previous_row = ysi_chunk.iloc[-1:].copy()
+
+
+def _prepare_calibration_data(
+    calibration_data: pd.DataFrame, max_gap: pd.Timedelta = None
+) -> pd.DataFrame:
+    trimmed_calibration_data = _remove_unused_columns(calibration_data)
+
+    calibration_data_resampled, _ = resample_contiguous_segments(
+        trimmed_calibration_data, max_gap
+    )
+
+    return calibration_data_resampled.round(
+        {"setpoint temperature (C)": 3, "setpoint O2 fraction": 6}
+    )
+
+
+@cached_parser(PARSER_VERSION)
+def process_calibration_log_file(
+    filepath: str, compact: bool = False, max_gap: pd.Timedelta = None
+) -> pd.DataFrame:
     """ Parse a calibration log file as a DataFrame with only the columns necessary for deep learning.
         Numerical values are rounded and setpoint IDs are generated based on time.
 
         Args:
             filepath: Path to the source file.
+            compact: Optional. If True, parse with compact dtypes. See parse_calibration_log_file().
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
         Returns:
             DataFrame with timestamp, YSI data, rounded setpoint values, and setpoint IDs.
     """
-    calibration_data = parse_calibration_log_file(filepath)
+    calibration_data = parse_calibration_log_file(
+        filepath, compact=compact, columns=DATASET_COLUMNS
+    )
 
-    trimmed_calibration_data = _remove_unused_columns(calibration_data)
+    return _prepare_calibration_data(calibration_data, max_gap)
+
+
+class CalibrationLogTailReader:
+    """ Incrementally read a calibration log file that is still being written, e.g. during a live calibration run.
+        Each call to read_new_rows() parses only the complete lines appended since the previous call.
+
+        Args:
+            filepath: Path to the calibration log file.
+            compact: Optional. If True, parse with compact dtypes. See parse_calibration_log_file().
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
+    """
+
+    def __init__(
+        self, filepath: str, compact: bool = False, max_gap: pd.Timedelta = None
+    ):
+        self.filepath = filepath
+        self.compact = compact
+        self.max_gap = max_gap
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._header = None
+        self._previous_row = None
+        self._file_id = None
+
+    def _is_previously_read_file(self, log_file) -> bool:
+        """ Check that an open log file is still the file previously read up to the current offset, rather than a
+            truncated, rewritten or replaced one.
+        """
+        file_stat = os.fstat(log_file.fileno())
+        if (file_stat.st_dev, file_stat.st_ino) != self._file_id:
+            return False
+        if file_stat.st_size < self._offset:
+            return False
+
+        if self._header is not None:
+            log_file.seek(0)
+            if log_file.read(len(self._header)) != self._header:
+                return False
+
+        # Reads always stop at the end of a line
+        if self._offset > 0:
+            log_file.seek(self._offset - 1)
+            if log_file.read(1) != b"\n":
+                return False
+
+        return True
+
+    def _read_new_complete_lines(self) -> bytes:
+        with open(self.filepath, "rb") as log_file:
+            if not self._is_previously_read_file(log_file):
+                # Start again from the beginning of the new file
+                self._reset()
+                file_stat = os.fstat(log_file.fileno())
+                self._file_id = (file_stat.st_dev, file_stat.st_ino)
+
+            log_file.seek(self._offset)
+            new_bytes = log_file.read()
+
+        # Leave any partially-written final line for the next read
+        complete_lines = new_bytes[: new_bytes.rfind(b"\n") + 1]
+        self._offset += len(complete_lines)
+
+        if self._header is None:
+            header_length = complete_lines.find(b"\n") + 1
+            self._header = complete_lines[:header_length] or None
+            complete_lines = complete_lines[header_length:]
+
+        return complete_lines
+
+    def read_new_rows(self) -> pd.DataFrame:
+        """ Parse rows appended to the calibration log since the last read.
+
+            Returns:
+                DataFrame of only the new data, resampled, interpolated and rounded in the same way as
+                process_calibration_log_file(). Empty if no complete lines have been appended.
+        """
+        new_lines = self._read_new_complete_lines()
+        if self._header is None:
+            # Not even the header has been written yet
+            return pd.DataFrame()
+
+        calibration_data = parse_calibration_log_file(
+            io.BytesIO(self._header + new_lines),
+            compact=self.compact,
+            columns=DATASET_COLUMNS,
+        )
+
+        if calibration_data.empty:
+            return _remove_unused_columns(calibration_data)
+
+        new_rows = _prepare_chunk_after_previous_row(
+            calibration_data,
+            self._previous_row,
+            _prepare_calibration_data,
+            self.max_gap,
+        )
+        self._previous_row = calibration_data.iloc[-1:].copy()
+
+        return new_rows
+
+
+def _get_sorted_merge_order(sorted_timestamp_arrays: List[np.ndarray]) -> np.ndarray:
+    """ Merge already-sorted timestamp arrays, returning the positions (into the concatenation of all arrays)
+        of each timestamp in merged order. Arrays are merged pairwise, which is a k-way merge in O(n log k).
+        Ties keep the order of the input arrays, so earlier arrays come first.
+    """
+    runs = []
+    offset = 0
+    for timestamps in sorted_timestamp_arrays:
+        runs.append((timestamps, np.arange(offset, offset + len(timestamps))))
+        offset += len(timestamps)
+
+    while len(runs) > 1:
+        merged_runs = []
+        for (
+            (left_timestamps, left_positions),
+            (right_timestamps, right_positions,),
+        ) in zip(runs[::2], runs[1::2]):
+            # Each value's place in the merged run is its place in its own run, plus the number of values from
+            # the other run that come before it
+            left_destinations = np.arange(len(left_timestamps)) + np.searchsorted(
+                right_timestamps, left_timestamps, side="left"
+            )
+            right_destinations = np.arange(len(right_timestamps)) + np.searchsorted(
+                left_timestamps, right_timestamps, side="right"
+            )
+
+            merged_timestamps = np.empty(
+                len(left_timestamps) + len(right_timestamps),
+                dtype=left_timestamps.dtype,
+            )
+            merged_timestamps[left_destinations] = left_timestamps
+            merged_timestamps[right_destinations] = right_timestamps
+
+            merged_positions = np.empty(len(merged_timestamps), dtype=np.int64)
+            merged_positions[left_destinations] = left_positions
+            merged_positions[right_destinations] = right_positions
+
+            merged_runs.append((merged_timestamps, merged_positions))
+
+        if len(runs) % 2:
+            merged_runs.append(runs[-1])
+        runs = merged_runs
+
+    return runs[0][1] if runs else np.array([], dtype=np.int64)
+
+
+def _merge_sorted_dataframes(dataframes: List[pd.DataFrame]) -> pd.DataFrame:
+    """ Merge timestamp-indexed DataFrames into one timestamp-ordered DataFrame, dropping rows with a timestamp
+        that is already present in an earlier DataFrame (e.g. where downloaded data overlaps).
+    """
+    sorted_dataframes = [
+        dataframe if dataframe.index.is_monotonic_increasing else dataframe.sort_index()
+        for dataframe in dataframes
+    ]
 
-    calibration_data_resampled = trimmed_calibration_data.resample("s").interpolate(
-        method="slinear"
+    merge_order = _get_sorted_merge_order(
+        [dataframe.index.values for dataframe in sorted_dataframes]
     )
+    merged = pd.concat(sorted_dataframes, sort=False).iloc[merge_order]
+    merged = merged[~merged.index.duplicated(keep="first")]
 
-    rounded_calibration_data = calibration_data_resampled.round(
-        {"setpoint temperature (C)": 3, "setpoint O2 fraction": 6}
+    # Reordering drops the index frequency. Restore it, as pd.concat keeps it for regularly-spaced inputs
+    if len(merged) >= 3 and all(
+        getattr(dataframe.index, "freq", None) is not None
+        for dataframe in sorted_dataframes
+    ):
+        merged.index = pd.DatetimeIndex(merged.index, freq="infer")
+
+    return merged
+
+
+# Columns of the output of each process_*_file function, for an empty result when there are no files to process
+_PROCESSED_YSI_PROODO_COLUMNS = [
+    f"YSI {BAROMETRIC_PRESSURE_MMHG_LABEL}",
+    f"YSI {DO_PCT_LABEL}",
+    f"YSI {TEMPERATURE_C_LABEL}",
+    f"YSI {DO_MMHG_LABEL}",
+]
+_PROCESSED_YSI_PROSOLO_COLUMNS = [
+    f"YSI {BAROMETRIC_PRESSURE_MMHG_LABEL}",
+    f"YSI {DO_PCT_LABEL}",
+    f"YSI {DO_MGL_LABEL}",
+    f"YSI {TEMPERATURE_C_LABEL}",
+    f"YSI {DO_MMHG_LABEL}",
+]
+_PROCESSED_CALIBRATION_LOG_COLUMNS = [
+    f"YSI {DO_PCT_LABEL}",
+    f"YSI {DO_MGL_LABEL}",
+    f"YSI {DO_MMHG_LABEL}",
+    f"YSI {BAROMETRIC_PRESSURE_MMHG_LABEL}",
+    f"YSI {TEMPERATURE_C_LABEL}",
+    "setpoint O2 fraction",
+    f"setpoint {TEMPERATURE_C_LABEL}",
+]
+
+
+def _process_files_in_parallel(
+    process_function: Callable,
+    filepaths: List[str],
+    max_workers: int,
+    empty_columns: List[str],
+    compact: bool,
+    max_gap: pd.Timedelta,
+) -> pd.DataFrame:
+    if not filepaths:
+        return pd.DataFrame(
+            columns=empty_columns,
+            index=pd.DatetimeIndex([], name=TIMESTAMP_LABEL),
+            dtype=COMPACT_MEASUREMENT_DTYPE if compact else np.float64,
+        )
+
+    process_function = functools.partial(
+        process_function, compact=compact, max_gap=max_gap
     )
 
-    return rounded_calibration_data
+    if max_workers == 1:
+        processed_files = [process_function(filepath) for filepath in filepaths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            processed_files = list(executor.map(process_function, filepaths))
+
+    return _merge_sorted_dataframes(processed_files)
+
+
+def process_ysi_proodo_files(
+    filepaths: List[str],
+    max_workers: int = None,
+    compact: bool = False,
+    max_gap: pd.Timedelta = None,
+) -> pd.DataFrame:
+    """ Parse multiple YSI ProODO data csvs in parallel, as a single DataFrame with only the columns
+        necessary for deep learning. See process_ysi_proodo_file() for details.
+
+        Args:
+            filepaths: Paths to the source files.
+            max_workers: Optional. Number of worker processes to use. Defaults to the number of CPUs.
+                Use 1 to process files one at a time in the current process.
+            compact: Optional. If True, parse with compact dtypes.
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+        Returns:
+            Timestamp-ordered DataFrame of data from all files. Where files overlap, only the first row
+            (in order of filepaths) for each timestamp is kept. Empty if there are no filepaths.
+    """
+    return _process_files_in_parallel(
+        process_ysi_proodo_file,
+        filepaths,
+        max_workers,
+        empty_columns=_PROCESSED_YSI_PROODO_COLUMNS,
+        compact=compact,
+        max_gap=max_gap,
+    )
+
+
+def process_ysi_prosolo_files(
+    filepaths: List[str],
+    max_workers: int = None,
+    compact: bool = False,
+    max_gap: pd.Timedelta = None,
+) -> pd.DataFrame:
+    """ Parse multiple YSI ProSolo data csvs in parallel, as a single DataFrame with only the columns
+        necessary for deep learning. See process_ysi_prosolo_file() for details.
+
+        Args:
+            filepaths: Paths to the source files.
+            max_workers: Optional. Number of worker processes to use. Defaults to the number of CPUs.
+                Use 1 to process files one at a time in the current process.
+            compact: Optional. If True, parse with compact dtypes.
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+        Returns:
+            Timestamp-ordered DataFrame of data from all files. Where files overlap, only the first row
+            (in order of filepaths) for each timestamp is kept. Empty if there are no filepaths.
+    """
+    return _process_files_in_parallel(
+        process_ysi_prosolo_file,
+        filepaths,
+        max_workers,
+        empty_columns=_PROCESSED_YSI_PROSOLO_COLUMNS,
+        compact=compact,
+        max_gap=max_gap,
+    )
+
+
+def process_calibration_log_files(
+    filepaths: List[str],
+    max_workers: int = None,
+    compact: bool = False,
+    max_gap: pd.Timedelta = None,
+) -> pd.DataFrame:
+    """ Parse multiple calibration log files in parallel, as a single DataFrame with only the columns
+        necessary for deep learning. See process_calibration_log_file() for details.
+
+        Args:
+            filepaths: Paths to the source files.
+            max_workers: Optional. Number of worker processes to use. Defaults to the number of CPUs.
+                Use 1 to process files one at a time in the current process.
+            compact: Optional. If True, parse with compact dtypes.
+            max_gap: Optional. Gaps between consecutive data points longer than this are not interpolated across.
+        Returns:
+            Timestamp-ordered DataFrame of data from all files. Where files overlap, only the first row
+            (in order of filepaths) for each timestamp is kept. Empty if there are no filepaths.
+    """
+    return _process_files_in_parallel(
+        process_calibration_log_file,
+        filepaths,
+        max_workers,
+        empty_columns=_PROCESSED_CALIBRATION_LOG_COLUMNS,
+        compact=compact,
+        max_gap=max_gap,
+    )
+
+
+# Number of bytes at the start of each file used to detect its type
+FILE_TYPE_SNIFF_SIZE_BYTES = 4096
+
+# File types, in the order they are checked, mapped to the text markers that must all be present in the start of
+# a file of that type, and the function used to parse it.
+# File type names match the data subfolder names in source_files.FILE_TYPE_SUBFOLDERS.
+_FILE_TYPE_REGISTRY = {}
+
+
+def register_file_type(
+    file_type: str, header_markers: List[str], parse_function: Callable
+) -> None:
+    """ Register a file type so that it can be detected and parsed by parse_files_by_detected_type().
+
+        Args:
+            file_type: Name of the file type, e.g. "calibration_log".
+            header_markers: Strings that all appear in the first FILE_TYPE_SNIFF_SIZE_BYTES of every file of this
+                type (decoded as latin-1), and not all together in files of any other registered type.
+            parse_function: Function that parses a file of this type, given a filepath or open binary file.
+    """
+    _FILE_TYPE_REGISTRY[file_type] = {
+        "header_markers": header_markers,
+        "parse_function": parse_function,
+    }
+
+
+register_file_type(
+    "ysi_prosolo", ["KorDSS MEASUREMENT DATA FILE EXPORT"], parse_ysi_prosolo_file
+)
+register_file_type(
+    "ysi_proodo",
+    ['"Timestamp"', '"Dissolved Oxygen (%)"', '"Unit ID"'],
+    parse_ysi_proodo_file,
+)
+register_file_type(
+    "pico", ["Temperature Ave. (C)", "Pressure Ave. (mmHg)"], parse_picolog_file
+)
+register_file_type(
+    "setpoints",
+    ["temperature", "flow_rate_slpm", "o2_fraction", "hold_time"],
+    parse_setpoints_file,
+)
+register_file_type(
+    "calibration_log",
+    ["equilibration status", "setpoint O2 fraction", "timestamp"],
+    parse_calibration_log_file,
+)
+
+
+def sniff_file_type(file_header: bytes) -> Optional[str]:
+    """ Identify the type of a source data file from the first few KB of its contents.
+
+        Args:
+            file_header: The first FILE_TYPE_SNIFF_SIZE_BYTES (or fewer) bytes of a file.
+        Returns:
+            The name of the first registered file type whose header markers all appear in the header,
+            or None if the file doesn't match any registered type.
+    """
+    # latin-1 can decode any bytes, and is the encoding used by KorDSS files
+    header_text = file_header.decode("latin-1")
+
+    for file_type, registration in _FILE_TYPE_REGISTRY.items():
+        if all(marker in header_text for marker in registration["header_markers"]):
+            return file_type
+
+    return None
+
+
+def _detect_and_parse_file(filepath) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+    # Sniff and parse from the same open file so that each file is only opened once
+    with open(filepath, "rb") as source_file:
+        file_type = sniff_file_type(source_file.read(FILE_TYPE_SNIFF_SIZE_BYTES))
+        if file_type is None:
+            return None, None
+
+        source_file.seek(0)
+        return file_type, _FILE_TYPE_REGISTRY[file_type]["parse_function"](source_file)
+
+
+def parse_files_by_detected_type(filepaths: Iterable) -> pd.Series:
+    """ Parse a collection of source data files of any registered type, detecting each file's type from the start
+        of its contents rather than from its name or location. Files that don't match a registered type are skipped.
+
+        Args:
+            filepaths: Filepaths to parse.
+        Returns:
+            pandas Series, indexed by registered file type and containing lists of parsed DataFrames,
+            in the order of filepaths.
+    """
+    parsed_files_by_type = {file_type: [] for file_type in _FILE_TYPE_REGISTRY}
+
+    for filepath in filepaths:
+        file_type, parsed_file = _detect_and_parse_file(filepath)
+        if file_type is not None:
+            parsed_files_by_type[file_type].append(parsed_file)
+
+    return pd.Series(parsed_files_by_type)
+
+
+def parse_experiment_data_files(files_by_type: pd.Series) -> pd.Series:
+    """ Parse every recognized source data file in an experiment's data directory in one call.
+
+        Args:
+            files_by_type: pandas Series of lists of filepaths, as returned by
+                source_files.get_experiment_data_files_by_type(). The subfolder each file was found in is ignored.
+        Returns:
+            pandas Series, indexed by registered file type and containing lists of parsed DataFrames.
+    """
+    all_filepaths = [
+        filepath for filepaths in files_by_type.values for filepath in filepaths
+    ]
+    return parse_files_by_detected_type(all_filepaths)
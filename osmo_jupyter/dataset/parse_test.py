@@ -1,9 +1,13 @@
+import os
 import pkg_resources
 
+import numpy as np
 import pandas as pd
+import pytest
 from unittest.mock import sentinel
 
 import osmo_jupyter.dataset.parse as module
+from osmo_jupyter.dataset import cache
 
 
 def test_parses_ysi_csv_correctly(tmpdir):
@@ -142,33 +146,86 @@ class TestParseDataCollectionLog:
             actual_data_collection_log, expected_data_collection_log
         )
 
-    def test_get_attempt_summary_gets_multiple_buckets(self):
-        test_attempt_data = pd.Series(
+    def test_get_attempt_summaries_gets_multiple_buckets(self):
+        test_attempt_log = pd.DataFrame(
             {
-                "S3 Bucket(s)": "1\n2\n3",
-                "Drive Directory": "Experiment",
-                "Cosmobot ID": "Z",
-                "Cartridge": "C1",
-                "Start Date/Time": pd.to_datetime("2019"),
-                "End Date/Time": pd.to_datetime("2020"),
+                "S3 Bucket(s)": ["1\n2\n3", "4"],
+                "Drive Directory": ["Experiment", "Experiment 2"],
+                "Cosmobot ID": ["Z", "Y"],
+                "Cartridge": ["C1", "C2"],
+                "Start Date/Time": [pd.to_datetime("2019"), pd.to_datetime("2020")],
+                "End Date/Time": [pd.to_datetime("2020"), pd.to_datetime("2021")],
             }
         )
 
-        actual_attempt_summary = module._get_attempt_summary(test_attempt_data)
+        actual_attempt_summaries = module._get_attempt_summaries(test_attempt_log)
 
-        expected_attempt_summary = pd.Series(
+        expected_attempt_summaries = pd.DataFrame(
             {
-                "experiment_names": ["1", "2", "3"],
-                "drive_directory": "Experiment",
-                "pond": "calibration",
-                "cosmobot_id": "Z",
-                "cartridge_id": "C1",
-                "start_date": pd.to_datetime("2019"),
-                "end_date": pd.to_datetime("2020"),
+                "experiment_names": [["1", "2", "3"], ["4"]],
+                "drive_directory": ["Experiment", "Experiment 2"],
+                "pond": ["calibration", "calibration"],
+                "cosmobot_id": ["Z", "Y"],
+                "cartridge_id": ["C1", "C2"],
+                "start_date": [pd.to_datetime("2019"), pd.to_datetime("2020")],
+                "end_date": [pd.to_datetime("2020"), pd.to_datetime("2021")],
             }
         )
 
-        pd.testing.assert_series_equal(actual_attempt_summary, expected_attempt_summary)
+        pd.testing.assert_frame_equal(
+            actual_attempt_summaries, expected_attempt_summaries
+        )
+
+    def test_get_attempt_summaries_uses_scum_tank_as_pond(self):
+        test_attempt_log = pd.DataFrame(
+            {
+                "S3 Bucket(s)": ["1"],
+                "Drive Directory": ["Experiment"],
+                "Scum Tank": ["Scum Tank 2"],
+                "Cosmobot ID": ["Z"],
+                "Cartridge": ["C1"],
+                "Start Date/Time": [pd.to_datetime("2019")],
+                "End Date/Time": [pd.to_datetime("2020")],
+            }
+        )
+
+        actual_attempt_summaries = module._get_attempt_summaries(test_attempt_log)
+
+        assert list(actual_attempt_summaries["pond"]) == ["scum tank 2"]
+
+    def test_reuses_parsed_log_until_modified(self, tmp_path, mocker):
+        test_log_file_path = tmp_path / "data_collection_log.xlsx"
+        test_log_file_path.write_bytes(
+            open(
+                pkg_resources.resource_filename(
+                    "osmo_jupyter", "test_fixtures/test_data_collection_log.xlsx"
+                ),
+                "rb",
+            ).read()
+        )
+        excel_file_spy = mocker.spy(module.pd, "ExcelFile")
+
+        first_parse = module.parse_data_collection_log(str(test_log_file_path))
+        second_parse = module.parse_data_collection_log(str(test_log_file_path))
+        os.utime(test_log_file_path, ns=(0, 0))
+        module.parse_data_collection_log(str(test_log_file_path))
+
+        assert excel_file_spy.call_count == 2
+        pd.testing.assert_frame_equal(first_parse, second_parse)
+        assert first_parse is not second_parse
+
+    def test_modifying_parsed_log_leaves_memoized_log_unchanged(self):
+        test_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_data_collection_log.xlsx"
+        )
+
+        first_parse = module.parse_data_collection_log(test_log_file_path)
+        first_parse["experiment_names"][0].append("modified")
+        second_parse = module.parse_data_collection_log(test_log_file_path)
+
+        assert second_parse["experiment_names"][0] == [
+            "2019-07-26--19-34-38-Pi2E32-3000_images_attempt_1"
+        ]
 
 
 def test_interpolates_calibration_log_data_correctly(mocker):
@@ -238,6 +295,65 @@ def test_setpoint_ids_assigned_correctly():
     pd.testing.assert_series_equal(setpoint_ids, expected_setpoint_ids)
 
 
+class TestTimeBasedSetpointIds:
+    timestamps = pd.to_datetime(
+        [
+            "2019-01-01 00:00:00",
+            "2019-01-01 00:01:00",
+            "2019-01-01 00:03:00",  # Increment with a 1 minute gap
+            "2019-01-01 00:10:00",  # Increment
+            "2019-01-01 00:10:30",
+        ]
+    ).rename("timestamp")
+
+    def test_uses_configurable_gap(self):
+        image_data = pd.Series(range(5), index=self.timestamps)
+
+        setpoint_ids = module.generate_time_based_setpoint_ids(
+            image_data, max_gap=pd.Timedelta(minutes=1)
+        )
+
+        expected_setpoint_ids = pd.Series(
+            [0, 0, 1, 2, 2], index=self.timestamps, name="timestamp"
+        )
+        pd.testing.assert_series_equal(setpoint_ids, expected_setpoint_ids)
+
+    def test_sorts_unsorted_input(self):
+        image_data = pd.Series(range(5), index=self.timestamps[::-1])
+
+        setpoint_ids = module.generate_time_based_setpoint_ids(image_data)
+
+        expected_setpoint_ids = pd.Series(
+            [0, 0, 0, 1, 1], index=self.timestamps, name="timestamp"
+        )
+        pd.testing.assert_series_equal(setpoint_ids, expected_setpoint_ids)
+
+    def test_streaming_matches_all_at_once(self):
+        image_data = pd.Series(range(5), index=self.timestamps)
+        chunks = [
+            image_data.iloc[:2],
+            image_data.iloc[2:2],
+            image_data.iloc[2:4],
+            image_data.iloc[4:],
+        ]
+
+        streamed_setpoint_ids = pd.concat(
+            module.iter_time_based_setpoint_ids(chunks, max_gap=pd.Timedelta(minutes=1))
+        )
+
+        expected_setpoint_ids = module.generate_time_based_setpoint_ids(
+            image_data, max_gap=pd.Timedelta(minutes=1)
+        )
+        pd.testing.assert_series_equal(streamed_setpoint_ids, expected_setpoint_ids)
+
+    def test_streaming_raises_on_out_of_order_chunks(self):
+        image_data = pd.Series(range(5), index=self.timestamps)
+        chunks = [image_data.iloc[2:], image_data.iloc[:2]]
+
+        with pytest.raises(ValueError):
+            list(module.iter_time_based_setpoint_ids(chunks))
+
+
 def test_prepare_ysi_data():
     # After the parse_* functions that two types of ysi data look mostly the same
     # so just test the common functionality here.
@@ -279,3 +395,763 @@ def test_prepare_ysi_data():
     pd.testing.assert_frame_equal(
         tranformed_ysi_data, expected_ysi_data, check_less_precise=6
     )
+
+
+@pytest.fixture
+def multi_row_ysi_proodo_file_path(tmp_path):
+    ysi_proodo_file_path = tmp_path / "ysi_proodo.csv"
+    ysi_proodo_file_path.write_text(
+        "\n".join(
+            [
+                '"Timestamp","Barometer (mmHg)","Dissolved Oxygen (%)","Temperature (C)",'
+                '"Comment","Site","Folder","Unit ID"',
+                '"1/1/2019 00:00:00","750","19","24.7","","","","unit ID"',
+                '"1/1/2019 00:00:03","752","22","24.1","","","","unit ID"',
+                '"1/1/2019 00:00:04","751","25","24.3","","","","unit ID"',
+                '"1/1/2019 00:00:08","749","21","24.9","","","","unit ID"',
+                '"1/1/2019 00:00:09","750","20","25.0","","","","unit ID"',
+            ]
+        )
+    )
+    return str(ysi_proodo_file_path)
+
+
+class TestYsiChunks:
+    def test_parsed_chunks_match_whole_file(self, multi_row_ysi_proodo_file_path):
+        ysi_chunks = list(
+            module.iter_ysi_proodo_file_chunks(
+                multi_row_ysi_proodo_file_path, chunk_size=2
+            )
+        )
+
+        assert [len(ysi_chunk) for ysi_chunk in ysi_chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(
+            pd.concat(ysi_chunks),
+            module.parse_ysi_proodo_file(multi_row_ysi_proodo_file_path),
+        )
+
+    def test_parses_prosolo_chunks(self):
+        test_ysi_kordss_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_ysi_kordss.csv"
+        )
+
+        ysi_chunks = list(
+            module.iter_ysi_prosolo_file_chunks(test_ysi_kordss_file_path, chunk_size=1)
+        )
+
+        assert len(ysi_chunks) == 1
+        pd.testing.assert_frame_equal(
+            ysi_chunks[0], module.parse_ysi_prosolo_file(test_ysi_kordss_file_path)
+        )
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+    def test_processed_chunks_match_whole_file(
+        self, multi_row_ysi_proodo_file_path, chunk_size
+    ):
+        processed_chunks = module.process_ysi_chunks(
+            module.iter_ysi_proodo_file_chunks(
+                multi_row_ysi_proodo_file_path, chunk_size=chunk_size
+            )
+        )
+
+        pd.testing.assert_frame_equal(
+            pd.concat(processed_chunks),
+            module.process_ysi_proodo_file(multi_row_ysi_proodo_file_path),
+        )
+
+
+def test_parsers_use_parse_cache(tmp_path):
+    test_picolog_file_path = pkg_resources.resource_filename(
+        "osmo_jupyter", "test_fixtures/test_picolog.csv"
+    )
+    cache.enable_parse_cache(str(tmp_path))
+    cache.reset_parse_cache_statistics()
+    try:
+        uncached_picolog_data = module.parse_picolog_file(test_picolog_file_path)
+        cached_picolog_data = module.parse_picolog_file(test_picolog_file_path)
+        cache_statistics = cache.get_parse_cache_statistics()
+    finally:
+        cache.disable_parse_cache()
+        cache.reset_parse_cache_statistics()
+
+    assert cache_statistics == {"hits": 1, "misses": 1}
+    pd.testing.assert_frame_equal(cached_picolog_data, uncached_picolog_data)
+
+
+class TestMergeSortedDataFrames:
+    def test_merges_in_timestamp_order_and_drops_duplicates(self):
+        def _timestamped_dataframe(seconds, values):
+            return pd.DataFrame(
+                {"value": values},
+                index=pd.DatetimeIndex(
+                    [
+                        pd.Timestamp("2019-01-01") + pd.Timedelta(seconds=s)
+                        for s in seconds
+                    ],
+                    name="timestamp",
+                ),
+            )
+
+        merged = module._merge_sorted_dataframes(
+            [
+                _timestamped_dataframe([0, 3, 6], ["a0", "a3", "a6"]),
+                _timestamped_dataframe([1, 3, 4], ["b1", "b3", "b4"]),
+                _timestamped_dataframe([2, 5, 7], ["c2", "c5", "c7"]),
+            ]
+        )
+
+        expected = _timestamped_dataframe(
+            [0, 1, 2, 3, 4, 5, 6, 7], ["a0", "b1", "c2", "a3", "b4", "c5", "a6", "c7"]
+        )
+        pd.testing.assert_frame_equal(merged, expected)
+
+    def test_get_sorted_merge_order_is_stable(self):
+        merge_order = module._get_sorted_merge_order(
+            [np.array([1, 2]), np.array([0, 2]), np.array([2])]
+        )
+
+        np.testing.assert_array_equal(merge_order, [2, 0, 1, 3, 4])
+
+
+class TestProcessFiles:
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_combines_overlapping_files(
+        self, tmp_path, multi_row_ysi_proodo_file_path, max_workers
+    ):
+        # Second file overlaps the end of the first file and extends it
+        overlapping_file_path = tmp_path / "overlapping_ysi_proodo.csv"
+        overlapping_file_path.write_text(
+            "\n".join(
+                [
+                    '"Timestamp","Barometer (mmHg)","Dissolved Oxygen (%)","Temperature (C)",'
+                    '"Comment","Site","Folder","Unit ID"',
+                    '"1/1/2019 00:00:08","749","21","24.9","","","","unit ID"',
+                    '"1/1/2019 00:00:09","750","20","25.0","","","","unit ID"',
+                    '"1/1/2019 00:00:11","752","24","25.2","","","","unit ID"',
+                ]
+            )
+        )
+
+        processed_data = module.process_ysi_proodo_files(
+            [str(overlapping_file_path), multi_row_ysi_proodo_file_path],
+            max_workers=max_workers,
+        )
+
+        expected_data = pd.concat(
+            [
+                module.process_ysi_proodo_file(multi_row_ysi_proodo_file_path),
+                module.process_ysi_proodo_file(str(overlapping_file_path)).iloc[2:],
+            ]
+        )
+        pd.testing.assert_frame_equal(processed_data, expected_data)
+        # Older versions of assert_frame_equal don't compare index frequencies
+        assert processed_data.index.freq == expected_data.index.freq
+
+    @pytest.mark.parametrize(
+        "process_files_function_name, process_file_function_name, fixture_name",
+        [
+            (
+                "process_ysi_proodo_files",
+                "process_ysi_proodo_file",
+                "test_ysi_classic.csv",
+            ),
+            (
+                "process_ysi_prosolo_files",
+                "process_ysi_prosolo_file",
+                "test_ysi_kordss.csv",
+            ),
+            (
+                "process_calibration_log_files",
+                "process_calibration_log_file",
+                "test_calibration_log.csv",
+            ),
+        ],
+    )
+    def test_no_files_is_empty_with_processed_columns(
+        self, process_files_function_name, process_file_function_name, fixture_name
+    ):
+        processed_file = getattr(module, process_file_function_name)(
+            pkg_resources.resource_filename(
+                "osmo_jupyter", f"test_fixtures/{fixture_name}"
+            )
+        )
+
+        processed_data = getattr(module, process_files_function_name)([])
+
+        assert processed_data.empty
+        assert list(processed_data.columns) == list(processed_file.columns)
+        assert isinstance(processed_data.index, pd.DatetimeIndex)
+        assert processed_data.index.name == "timestamp"
+
+
+class TestDatetimesFromFilenames:
+    def test_matches_datetime_from_filename(self):
+        filenames = [
+            "2019-01-01--00-00-00_image.jpeg",
+            "2020-02-29--23-59-59.jpeg",
+            "1999-12-31--12-30-01",
+        ]
+
+        actual = module.datetimes_from_filenames(pd.Series(filenames))
+
+        expected = np.array(
+            [module.datetime_from_filename(filename) for filename in filenames],
+            dtype="datetime64[ns]",
+        )
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_returns_nat_for_malformed_filenames(self):
+        actual = module.datetimes_from_filenames(
+            [
+                "2019-01-01--00-00-00.jpeg",
+                "experiment.log",
+                "2019-01-01 00:00:00.jpeg",  # Wrong separators
+                "2019-02-29--00-00-00.jpeg",  # Not a leap year
+                "2019-13-01--00-00-00.jpeg",
+                "2019-01-01--24-00-00.jpeg",
+                "2019-01-01--00-0",
+                "",
+            ]
+        )
+
+        assert actual.dtype == np.dtype("datetime64[ns]")
+        assert not np.isnat(actual[0])
+        assert np.isnat(actual[1:]).all()
+
+    def test_handles_empty_input(self):
+        actual = module.datetimes_from_filenames([])
+
+        assert actual.dtype == np.dtype("datetime64[ns]")
+        assert len(actual) == 0
+
+
+class TestCompactParsing:
+    def test_parses_ysi_csv_with_compact_dtypes(self):
+        test_ysi_classic_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_ysi_classic.csv"
+        )
+
+        formatted_ysi_data = module.parse_ysi_proodo_file(
+            test_ysi_classic_file_path, compact=True
+        )
+
+        expected_dtypes = pd.Series(
+            {
+                "YSI barometric pressure (mmHg)": np.dtype("float32"),
+                "YSI DO (% sat)": np.dtype("float32"),
+                "YSI temperature (C)": np.dtype("float32"),
+                "YSI unit ID": pd.CategoricalDtype(["unit ID"]),
+            }
+        )
+        pd.testing.assert_series_equal(formatted_ysi_data.dtypes, expected_dtypes)
+        assert formatted_ysi_data.index.dtype == np.dtype("datetime64[ns]")
+
+    def test_parses_picolog_csv_with_compact_dtypes(self):
+        test_picolog_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_picolog.csv"
+        )
+
+        formatted_picolog_data = module.parse_picolog_file(
+            test_picolog_file_path, compact=True
+        )
+
+        assert list(formatted_picolog_data.dtypes) == [np.dtype("float32")] * 2
+
+    def test_compact_calibration_log_uses_less_memory(self, tmp_path):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+        # Repeat the fixture's rows so that per-row memory dominates fixed overhead
+        header, *rows = open(test_calibration_log_file_path).read().splitlines()
+        long_calibration_log_file_path = tmp_path / "calibration_log.csv"
+        long_calibration_log_file_path.write_text("\n".join([header] + rows * 250))
+
+        default_data = module.parse_calibration_log_file(long_calibration_log_file_path)
+        compact_data = module.parse_calibration_log_file(
+            long_calibration_log_file_path, compact=True
+        )
+
+        assert compact_data["setpoint O2 fraction"].dtype == np.dtype("float32")
+        assert compact_data["equilibration status"].dtype.name == "category"
+        assert (
+            compact_data.memory_usage(deep=True).sum()
+            < default_data.memory_usage(deep=True).sum() / 2
+        )
+
+    def test_compact_calibration_log_matches_default(self):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+
+        default_data = module.parse_calibration_log_file(test_calibration_log_file_path)
+        compact_data = module.parse_calibration_log_file(
+            test_calibration_log_file_path, compact=True
+        )
+
+        pd.testing.assert_frame_equal(
+            compact_data.astype(default_data.dtypes),
+            default_data,
+            check_less_precise=True,
+        )
+
+    def test_only_reads_requested_calibration_log_columns(self):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+
+        formatted_calibration_log_data = module.parse_calibration_log_file(
+            test_calibration_log_file_path,
+            columns=["setpoint O2 fraction", "column that isn't present"],
+        )
+
+        assert list(formatted_calibration_log_data.columns) == ["setpoint O2 fraction"]
+
+    @pytest.mark.parametrize(
+        "parse_function_name, fixture_name, column",
+        [
+            ("parse_ysi_proodo_file", "test_ysi_classic.csv", "YSI DO (% sat)"),
+            ("parse_ysi_prosolo_file", "test_ysi_kordss.csv", "YSI DO (% sat)"),
+            ("parse_picolog_file", "test_picolog.csv", "PicoLog temperature (C)"),
+        ],
+    )
+    def test_only_reads_requested_columns_by_parsed_name(
+        self, parse_function_name, fixture_name, column
+    ):
+        test_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", f"test_fixtures/{fixture_name}"
+        )
+        parse_function = getattr(module, parse_function_name)
+
+        selected_data = parse_function(test_file_path, columns=[column])
+
+        assert list(selected_data.columns) == [column]
+        pd.testing.assert_series_equal(
+            selected_data[column], parse_function(test_file_path)[column]
+        )
+
+    def test_processes_calibration_log_with_compact_dtypes(self):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+
+        compact_data = module.process_calibration_log_file(
+            test_calibration_log_file_path, compact=True
+        )
+        default_data = module.process_calibration_log_file(
+            test_calibration_log_file_path
+        )
+
+        pd.testing.assert_frame_equal(
+            compact_data, default_data, check_dtype=False, check_less_precise=3
+        )
+
+
+class TestResampleContiguousSegments:
+    @pytest.fixture
+    def data_with_gap(self):
+        return pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:00",
+                        "2019-01-01 00:00:02",
+                        # Overnight gap
+                        "2019-01-02 00:00:00",
+                        "2019-01-02 00:00:02",
+                    ]
+                ),
+                "value": [0.0, 2.0, 10.0, 12.0],
+            }
+        ).set_index("timestamp")
+
+    def test_does_not_interpolate_across_gaps(self, data_with_gap):
+        resampled_data, segments = module.resample_contiguous_segments(
+            data_with_gap, max_gap=pd.Timedelta(minutes=5)
+        )
+
+        expected_resampled_data = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:00",
+                        "2019-01-01 00:00:01",
+                        "2019-01-01 00:00:02",
+                        "2019-01-02 00:00:00",
+                        "2019-01-02 00:00:01",
+                        "2019-01-02 00:00:02",
+                    ]
+                ),
+                "value": [0.0, 1.0, 2.0, 10.0, 11.0, 12.0],
+            }
+        ).set_index("timestamp")
+        expected_segments = pd.DataFrame(
+            {
+                "start_time": pd.to_datetime(
+                    ["2019-01-01 00:00:00", "2019-01-02 00:00:00"]
+                ),
+                "end_time": pd.to_datetime(
+                    ["2019-01-01 00:00:02", "2019-01-02 00:00:02"]
+                ),
+            }
+        )
+
+        pd.testing.assert_frame_equal(resampled_data, expected_resampled_data)
+        pd.testing.assert_frame_equal(segments, expected_segments)
+
+    def test_no_max_gap_resamples_whole_span(self, data_with_gap):
+        resampled_data, segments = module.resample_contiguous_segments(data_with_gap)
+
+        pd.testing.assert_frame_equal(
+            resampled_data, data_with_gap.resample("s").interpolate(method="slinear")
+        )
+        assert len(segments) == 1
+
+    def test_processed_chunks_respect_max_gap(self, multi_row_ysi_proodo_file_path):
+        max_gap = pd.Timedelta(seconds=3)
+
+        processed_chunks = module.process_ysi_chunks(
+            module.iter_ysi_proodo_file_chunks(
+                multi_row_ysi_proodo_file_path, chunk_size=3
+            ),
+            max_gap=max_gap,
+        )
+        processed_data = module.process_ysi_proodo_file(
+            multi_row_ysi_proodo_file_path, max_gap=max_gap
+        )
+
+        # The 4-second gap between 00:00:04 and 00:00:08 is not interpolated
+        assert len(processed_data) == 7
+        pd.testing.assert_frame_equal(pd.concat(processed_chunks), processed_data)
+
+
+class TestCalibrationLogTailReader:
+    def test_reads_only_new_complete_rows(self, tmp_path):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+        # Skip the blank lines produced by the fixture's "\r\r\n" line endings
+        header, *rows = [
+            line
+            for line in open(test_calibration_log_file_path).read().splitlines()
+            if line
+        ]
+        live_calibration_log_file_path = tmp_path / "calibration_log.csv"
+        live_calibration_log_file_path.write_text("")
+
+        tail_reader = module.CalibrationLogTailReader(
+            str(live_calibration_log_file_path)
+        )
+        assert tail_reader.read_new_rows().empty
+
+        def _append(text):
+            with open(live_calibration_log_file_path, "a") as log_file:
+                log_file.write(text)
+
+        _append(header + "\n" + rows[0] + "\n" + rows[1] + "\n")
+        first_read = tail_reader.read_new_rows()
+
+        # A partially-written line is left for the next read
+        _append(rows[2][:10])
+        second_read = tail_reader.read_new_rows()
+
+        _append(rows[2][10:] + "\n" + rows[3] + "\n")
+        third_read = tail_reader.read_new_rows()
+
+        assert len(first_read) == 2
+        assert second_read.empty
+        pd.testing.assert_frame_equal(
+            pd.concat([first_read, third_read]),
+            module.process_calibration_log_file(test_calibration_log_file_path),
+        )
+
+    @pytest.mark.parametrize("replace_file", [True, False])
+    def test_rereads_replaced_log_of_any_length(self, tmp_path, replace_file):
+        test_calibration_log_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_calibration_log.csv"
+        )
+        header, *rows = [
+            line
+            for line in open(test_calibration_log_file_path).read().splitlines()
+            if line
+        ]
+        live_calibration_log_file_path = tmp_path / "calibration_log.csv"
+        live_calibration_log_file_path.write_text(header + "\n" + rows[0] + "\n")
+
+        tail_reader = module.CalibrationLogTailReader(
+            str(live_calibration_log_file_path)
+        )
+        tail_reader.read_new_rows()
+
+        # A new log that is longer than what has been read so far, and not a continuation of it
+        new_log = "\n".join(["extra column," + header] + ["0," + row for row in rows])
+        if replace_file:
+            new_calibration_log_file_path = tmp_path / "new_calibration_log.csv"
+            new_calibration_log_file_path.write_text(new_log + "\n")
+            os.replace(
+                str(new_calibration_log_file_path), str(live_calibration_log_file_path)
+            )
+        else:
+            live_calibration_log_file_path.write_text(new_log + "\n")
+
+        pd.testing.assert_frame_equal(
+            tail_reader.read_new_rows(),
+            module.process_calibration_log_file(test_calibration_log_file_path),
+        )
+
+
+class TestFileTypeDetection:
+    @pytest.mark.parametrize(
+        "fixture_name, expected_file_type",
+        [
+            ("test_ysi_kordss.csv", "ysi_prosolo"),
+            ("test_ysi_classic.csv", "ysi_proodo"),
+            ("test_picolog.csv", "pico"),
+            ("test_calibration_log.csv", "calibration_log"),
+            ("test_setpoints.csv", "setpoints"),
+            ("test_process_experiment_result.csv", None),
+            ("mock_spectrometer_data.txt", None),
+        ],
+    )
+    def test_sniffs_file_type(self, fixture_name, expected_file_type):
+        fixture_path = pkg_resources.resource_filename(
+            "osmo_jupyter", f"test_fixtures/{fixture_name}"
+        )
+        with open(fixture_path, "rb") as fixture_file:
+            file_header = fixture_file.read(module.FILE_TYPE_SNIFF_SIZE_BYTES)
+
+        assert module.sniff_file_type(file_header) == expected_file_type
+
+    def test_parses_experiment_data_files_by_detected_type(self, tmp_path):
+        def _fixture_path(fixture_name):
+            return pkg_resources.resource_filename(
+                "osmo_jupyter", f"test_fixtures/{fixture_name}"
+            )
+
+        misfiled_picolog_file_path = tmp_path / "misfiled_picolog.csv"
+        misfiled_picolog_file_path.write_bytes(
+            open(_fixture_path("test_picolog.csv"), "rb").read()
+        )
+        files_by_type = pd.Series(
+            {
+                "calibration_log": [_fixture_path("test_calibration_log.csv")],
+                "pico": [],
+                "process_experiment": [
+                    _fixture_path("test_process_experiment_result.csv")
+                ],
+                "setpoints": [_fixture_path("test_setpoints.csv")],
+                "ysi_proodo": [_fixture_path("test_ysi_classic.csv")],
+                "ysi_prosolo": [
+                    _fixture_path("test_ysi_kordss.csv"),
+                    misfiled_picolog_file_path,
+                ],
+            }
+        )
+
+        parsed_files = module.parse_experiment_data_files(files_by_type)
+
+        assert list(parsed_files.index) == [
+            "ysi_prosolo",
+            "ysi_proodo",
+            "pico",
+            "setpoints",
+            "calibration_log",
+        ]
+        pd.testing.assert_frame_equal(
+            parsed_files["ysi_prosolo"][0],
+            module.parse_ysi_prosolo_file(_fixture_path("test_ysi_kordss.csv")),
+        )
+        pd.testing.assert_frame_equal(
+            parsed_files["ysi_proodo"][0],
+            module.parse_ysi_proodo_file(_fixture_path("test_ysi_classic.csv")),
+        )
+        pd.testing.assert_frame_equal(
+            parsed_files["pico"][0],
+            module.parse_picolog_file(_fixture_path("test_picolog.csv")),
+        )
+        pd.testing.assert_frame_equal(
+            parsed_files["calibration_log"][0],
+            module.parse_calibration_log_file(
+                _fixture_path("test_calibration_log.csv")
+            ),
+        )
+
+
+class TestParseTimestampStrings:
+    def test_truncates_fractional_seconds(self):
+        timestamps = module._parse_timestamp_strings(
+            pd.Series(
+                [
+                    "2019-01-01 00:00:00.9",
+                    "2019-01-01 00:00:01",
+                    # Doesn't match the fast path layout
+                    "2019/01/01 00:00:02.5",
+                    None,
+                ]
+            ),
+            module._CALIBRATION_LOG_TIMESTAMP_TEMPLATE,
+            truncate_fractional_seconds=True,
+        )
+
+        expected_timestamps = np.array(
+            [
+                "2019-01-01T00:00:00",
+                "2019-01-01T00:00:01",
+                "2019-01-01T00:00:02",
+                "NaT",
+            ],
+            dtype="datetime64[ns]",
+        )
+        np.testing.assert_array_equal(timestamps, expected_timestamps)
+
+    def test_strips_utc_offsets(self):
+        timestamps = module._parse_timestamp_strings(
+            pd.Series(
+                [
+                    "2019-01-01T00:00:00-07:00",
+                    "2019-01-01T00:00:01+01:00",
+                    # Fractional seconds don't match the fast path layout, and aren't truncated
+                    "2019-01-01T00:00:02.5-07:00",
+                ]
+            ),
+            module._PICOLOG_TIMESTAMP_TEMPLATE,
+            truncate_fractional_seconds=False,
+        )
+
+        expected_timestamps = np.array(
+            ["2019-01-01T00:00:00", "2019-01-01T00:00:01", "2019-01-01T00:00:02.5"],
+            dtype="datetime64[ns]",
+        )
+        np.testing.assert_array_equal(timestamps, expected_timestamps)
+
+
+class TestGetIntervalIds:
+    # Unsorted, non-overlapping intervals
+    start_times = pd.to_datetime(["2019-01-01 00:00:10", "2019-01-01 00:00:00"]).values
+    end_times = pd.to_datetime(["2019-01-01 00:00:20", "2019-01-01 00:00:05"]).values
+    timestamps = pd.to_datetime(
+        [
+            "2019-01-01 00:00:15",
+            "2019-01-01 00:00:00",  # Start of an interval
+            "2019-01-01 00:00:05",  # End of an interval
+            "2019-01-01 00:00:07",  # Between intervals
+            "2018-12-31 23:59:59",  # Before every interval
+            "2019-01-01 00:00:21",  # After every interval
+        ]
+    )
+
+    @pytest.mark.parametrize(
+        "inclusive, expected_interval_ids",
+        [(True, [0, 1, 1, -1, -1, -1]), (False, [0, -1, -1, -1, -1, -1])],
+    )
+    def test_gets_interval_ids(self, inclusive, expected_interval_ids):
+        interval_ids = module.get_interval_ids(
+            self.start_times, self.end_times, self.timestamps, inclusive=inclusive
+        )
+
+        np.testing.assert_array_equal(interval_ids, expected_interval_ids)
+
+    def test_no_intervals(self):
+        interval_ids = module.get_interval_ids([], [], self.timestamps, inclusive=True)
+
+        np.testing.assert_array_equal(interval_ids, [-1] * len(self.timestamps))
+
+
+class TestSetpointIntervalIndex:
+    def test_parse_setpoints_file_renames_to_calibration_log_columns(self):
+        test_setpoints_file_path = pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_setpoints.csv"
+        )
+
+        setpoints = module.parse_setpoints_file(test_setpoints_file_path)
+
+        expected_setpoints = pd.DataFrame(
+            {
+                "setpoint temperature (C)": [15, 15, 25],
+                "setpoint flow rate (SLPM)": [2.5, 2.5, 2.5],
+                "setpoint O2 fraction": [0.0, 0.1, 0.1],
+                "setpoint hold time seconds": [360, 360, 600],
+            }
+        )
+        pd.testing.assert_frame_equal(setpoints, expected_setpoints)
+
+    def test_interval_index_uses_programmed_setpoints(self):
+        setpoints = pd.DataFrame(
+            {"setpoint O2 fraction": [0.1, 0.2], "setpoint hold time seconds": [60, 90]}
+        )
+        calibration_data = pd.DataFrame(
+            {
+                "setpoint O2 fraction": [0.1, 0.2, 0.3],
+                "setpoint hold time seconds": [60, 90, 60],
+            },
+            index=pd.to_datetime(
+                ["2019-01-01 00:00:00", "2019-01-01 00:00:05", "2019-01-01 00:00:10"]
+            ).rename("timestamp"),
+        )
+
+        setpoint_index = module.SetpointIntervalIndex.from_calibration_log(
+            calibration_data, setpoints=setpoints
+        )
+
+        # The last logged setpoint wasn't programmed
+        pd.testing.assert_frame_equal(
+            setpoint_index.setpoints,
+            pd.DataFrame(
+                {
+                    "setpoint O2 fraction": [0.1, 0.2, np.nan],
+                    "setpoint hold time seconds": [60, 90, np.nan],
+                }
+            ),
+        )
+
+    def test_interval_index_labels_timestamps(self):
+        calibration_data = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(
+                    [
+                        "2019-01-01 00:00:00",
+                        "2019-01-01 00:00:01",
+                        "2019-01-01 00:00:05",  # New setpoint
+                        "2019-01-01 00:00:06",
+                        "2019-01-01 00:00:07",  # Same setpoint, next loop
+                    ]
+                ),
+                "setpoint O2 fraction": [0.1, 0.1, 0.2, 0.2, 0.2],
+                "loop count": [0, 0, 0, 0, 1],
+            }
+        ).set_index("timestamp")
+
+        setpoint_index = module.SetpointIntervalIndex.from_calibration_log(
+            calibration_data, setpoint_columns=["setpoint O2 fraction"]
+        )
+        labels = setpoint_index.lookup(
+            pd.to_datetime(
+                [
+                    "2019-01-01 00:00:06",
+                    "2019-01-01 00:00:00.5",
+                    "2019-01-01 00:00:03",  # Between setpoints
+                    "2018-12-31 23:59:59",  # Before the first setpoint
+                    "2019-01-01 00:00:07",
+                    "2019-01-01 00:00:08",  # After the last setpoint
+                ]
+            )
+        )
+
+        assert len(setpoint_index) == 3
+        np.testing.assert_array_equal(labels["setpoint ID"], [1, 0, -1, -1, 2, -1])
+        np.testing.assert_array_equal(
+            labels["setpoint O2 fraction"], [0.2, 0.1, np.nan, np.nan, 0.2, np.nan]
+        )
+
+    def test_empty_interval_index_labels_nothing(self):
+        calibration_data = pd.DataFrame(
+            {"setpoint O2 fraction": []}, index=pd.DatetimeIndex([], name="timestamp"),
+        )
+
+        setpoint_index = module.SetpointIntervalIndex.from_calibration_log(
+            calibration_data, setpoint_columns=["setpoint O2 fraction"]
+        )
+        labels = setpoint_index.lookup(pd.to_datetime(["2019-01-01 00:00:00"]))
+
+        assert len(setpoint_index) == 0
+        np.testing.assert_array_equal(labels["setpoint ID"], [-1])
+        np.testing.assert_array_equal(labels["setpoint O2 fraction"], [np.nan])
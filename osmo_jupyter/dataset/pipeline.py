@@ -0,0 +1,486 @@
+""" Declarative pipelines of dataset-building stages, run as a DAG with independent stages in parallel.
+
+    When the parse cache has been turned on with osmo_jupyter.dataset.cache.enable_parse_cache(), each stage's
+    output is stored on disk, keyed by the stage, the pipeline parameters it uses and the keys of its inputs.
+    Changing one parameter then only reruns the stages that depend on it, directly or through their inputs.
+"""
+import hashlib
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from . import cache
+from .combine import (
+    PROCESS_EXPERIMENT_RESULTS_VERSION,
+    AttemptImageIndex,
+    get_equilibration_boundaries,
+    label_equilibrated_images,
+    open_and_combine_process_experiment_results,
+)
+from .parse import (
+    PARSER_VERSION,
+    TIMESTAMP_LABEL,
+    parse_calibration_log_file,
+    parse_data_collection_log,
+    process_calibration_log_files,
+)
+from .source_files import get_experiment_data_files_by_type
+
+
+class Stage:
+    """ One step of a Pipeline.
+
+        Args:
+            name: Unique name of the stage, used to refer to its output.
+            function: Function that computes the stage's output. It is called with keyword arguments: the outputs
+                of the input stages and the values of the pipeline parameters, each under its name.
+            inputs: Optional. Names of the stages whose outputs are passed to function.
+            parameters: Optional. Names of the pipeline parameters passed to function.
+            version: Optional. Change this whenever function's output changes, to invalidate memoized outputs.
+            memoize: Optional. If False, the stage is run every time, and stages that use its output are keyed by
+                a fingerprint of that output. Use this for quick stages that reflect the current state of the
+                filesystem, e.g. listing data files. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        inputs: List[str] = (),
+        parameters: List[str] = (),
+        version=1,
+        memoize: bool = True,
+    ):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.parameters = list(parameters)
+        self.version = version
+        self.memoize = memoize
+
+    def run(self, outputs: Dict, parameters: Dict):
+        return self.function(
+            **{input_name: outputs[input_name] for input_name in self.inputs},
+            **{
+                parameter_name: parameters[parameter_name]
+                for parameter_name in self.parameters
+            },
+        )
+
+
+def _fingerprint(value):
+    """ Get a value that can stand in for value in a cache key: files are identified by their path, size and
+        modification time (like the parse cache), and pandas and numpy objects by a hash of their contents.
+    """
+    if isinstance(value, (str, os.PathLike)):
+        if os.path.isfile(value):
+            file_stat = os.stat(value)
+            return (os.path.abspath(value), file_stat.st_size, file_stat.st_mtime_ns)
+        return str(value)
+
+    if isinstance(value, (list, tuple)):
+        return [_fingerprint(item) for item in value]
+
+    if isinstance(value, dict):
+        return sorted((key, _fingerprint(item)) for key, item in value.items())
+
+    # e.g. files_by_type: a Series of lists of filepaths
+    if isinstance(value, pd.Series) and value.dtype == object:
+        return [(label, _fingerprint(item)) for label, item in value.items()]
+
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return hashlib.sha1(pickle.dumps(value)).hexdigest()
+
+    return value
+
+
+def _sort_stages(stages: List[Stage]) -> List[Stage]:
+    """ Order stages so that every stage comes after its inputs, raising ValueError for unknown inputs or cycles.
+    """
+    stages_by_name = {stage.name: stage for stage in stages}
+    if len(stages_by_name) != len(stages):
+        raise ValueError("Stage names must be unique")
+
+    sorted_stages = []
+    visiting = set()
+    visited = set()
+
+    def visit(stage):
+        if stage.name in visited:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage {stage.name} depends on itself")
+
+        visiting.add(stage.name)
+        for input_name in stage.inputs:
+            if input_name not in stages_by_name:
+                raise ValueError(
+                    f"Unknown input {input_name} of stage {stage.name}. "
+                    f"Expected one of: {list(stages_by_name)}"
+                )
+            visit(stages_by_name[input_name])
+        visiting.remove(stage.name)
+
+        visited.add(stage.name)
+        sorted_stages.append(stage)
+
+    for stage in stages:
+        visit(stage)
+
+    return sorted_stages
+
+
+class Pipeline:
+    """ A DAG of stages, each computed from the outputs of other stages and pipeline parameters.
+
+        Args:
+            stages: Stages of the pipeline, in any order.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = _sort_stages(stages)
+        self._stages_by_name = {stage.name: stage for stage in self.stages}
+
+    def get_parameter_names(self) -> List[str]:
+        """ Get the names of all parameters used by the pipeline's stages.
+        """
+        return sorted(
+            {
+                parameter_name
+                for stage in self.stages
+                for parameter_name in stage.parameters
+            }
+        )
+
+    def _get_final_stage_names(self) -> List[str]:
+        input_names = {
+            input_name for stage in self.stages for input_name in stage.inputs
+        }
+        return [stage.name for stage in self.stages if stage.name not in input_names]
+
+    def _get_stage_key(self, stage: Stage, parameters: Dict, input_keys: Dict) -> str:
+        return cache.get_cache_key(
+            f"{stage.function.__module__}.{stage.function.__qualname__}",
+            stage.name,
+            stage.version,
+            [
+                (parameter_name, _fingerprint(parameters[parameter_name]))
+                for parameter_name in stage.parameters
+            ],
+            [input_keys[input_name] for input_name in stage.inputs],
+        )
+
+    def _load_or_run_stage(self, stage: Stage, keys: Dict, outputs: Dict, parameters):
+        """ Get a stage's output, and any of its inputs that are needed, one stage at a time.
+        """
+        if stage.name in outputs:
+            return
+
+        try:
+            outputs[stage.name] = cache.load_cached_value(keys[stage.name])
+            return
+        except KeyError:
+            pass
+
+        for input_name in stage.inputs:
+            self._load_or_run_stage(
+                self._stages_by_name[input_name], keys, outputs, parameters
+            )
+        outputs[stage.name] = stage.run(outputs, parameters)
+        cache.store_cached_value(keys[stage.name], outputs[stage.name])
+
+    def _get_stages_to_run(self, stage_names: List[str], keys: Dict, outputs: Dict):
+        """ Load the memoized outputs of the given stages, and find every stage that must be run to compute the
+            rest. Inputs of stages with memoized outputs are never loaded.
+        """
+        stages_to_run = set()
+
+        def require(stage_name):
+            if stage_name in outputs or stage_name in stages_to_run:
+                return
+            try:
+                outputs[stage_name] = cache.load_cached_value(keys[stage_name])
+            except KeyError:
+                stages_to_run.add(stage_name)
+                for input_name in self._stages_by_name[stage_name].inputs:
+                    require(input_name)
+
+        for stage_name in stage_names:
+            require(stage_name)
+
+        return [stage for stage in self.stages if stage.name in stages_to_run]
+
+    def run(
+        self, parameters: Dict, targets: List[str] = None, max_workers: int = None
+    ) -> Dict:
+        """ Compute the outputs of some stages, running only the stages whose outputs aren't already memoized, and
+            running independent stages in parallel.
+
+            Args:
+                parameters: Dictionary of values for every parameter used by the pipeline's stages.
+                targets: Optional. Names of the stages to get the outputs of. Defaults to the stages that aren't
+                    inputs to any other stage.
+                max_workers: Optional. Number of stages to run at once. Defaults to the ThreadPoolExecutor default.
+            Returns:
+                Dictionary of the output of each target stage, by name.
+            Raises:
+                ValueError: if a parameter is missing or a target isn't a stage in the pipeline.
+        """
+        missing_parameters = set(self.get_parameter_names()) - set(parameters)
+        if missing_parameters:
+            raise ValueError(f"Missing parameters: {sorted(missing_parameters)}")
+
+        if targets is None:
+            targets = self._get_final_stage_names()
+        unknown_targets = set(targets) - set(self._stages_by_name)
+        if unknown_targets:
+            raise ValueError(f"Unknown targets: {sorted(unknown_targets)}")
+
+        # Stages that aren't memoized are run now, so that their outputs can be fingerprinted for the keys of the
+        # stages that use them
+        keys = {}
+        outputs = {}
+        for stage in self.stages:
+            keys[stage.name] = self._get_stage_key(stage, parameters, keys)
+            if not stage.memoize:
+                for input_name in stage.inputs:
+                    self._load_or_run_stage(
+                        self._stages_by_name[input_name], keys, outputs, parameters
+                    )
+                outputs[stage.name] = stage.run(outputs, parameters)
+                keys[stage.name] = cache.get_cache_key(
+                    keys[stage.name], _fingerprint(outputs[stage.name])
+                )
+
+        pending_stages = self._get_stages_to_run(targets, keys, outputs)
+        running_stages = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending_stages or running_stages:
+                ready_stages = [
+                    stage
+                    for stage in pending_stages
+                    if all(input_name in outputs for input_name in stage.inputs)
+                ]
+                for stage in ready_stages:
+                    pending_stages.remove(stage)
+                    running_stages[
+                        executor.submit(stage.run, dict(outputs), parameters)
+                    ] = stage
+
+                finished_futures, _ = wait(running_stages, return_when=FIRST_COMPLETED)
+                for future in finished_futures:
+                    stage = running_stages.pop(future)
+                    outputs[stage.name] = future.result()
+                    cache.store_cached_value(keys[stage.name], outputs[stage.name])
+
+        return {target: outputs[target] for target in targets}
+
+
+# Stages of ATTEMPT_PIPELINE
+
+_REQUIRED_ATTEMPT_FILE_TYPES = ["calibration_log", "process_experiment"]
+
+
+def _parse_data_collection_log(data_collection_log_filepath: str) -> pd.DataFrame:
+    return parse_data_collection_log(data_collection_log_filepath)
+
+
+def _get_attempt_metadata(data_collection_log: pd.DataFrame, attempt) -> pd.Series:
+    return data_collection_log.loc[attempt]
+
+
+def _get_attempt_files_by_type(
+    attempt_metadata: pd.Series, experiments_directory: str, attempt
+) -> pd.Series:
+    attempt_directory = os.path.join(
+        experiments_directory, attempt_metadata["drive_directory"]
+    )
+    files_by_type = get_experiment_data_files_by_type(attempt_directory)
+
+    # Fail before any stage runs, rather than with a pandas error from deep within one of them
+    for file_type in _REQUIRED_ATTEMPT_FILE_TYPES:
+        if not files_by_type[file_type]:
+            raise ValueError(
+                f"Attempt {attempt} has no {file_type} files in {attempt_directory}"
+            )
+
+    return files_by_type
+
+
+def _process_attempt_calibration_logs(
+    files_by_type: pd.Series, max_gap: pd.Timedelta
+) -> pd.DataFrame:
+    # Only calibration logs are processed: they include the YSI readings, and images can only be labelled as
+    # equilibrated where there is calibration log data
+    # Stages already run in parallel, so each one processes its files in the current process
+    return process_calibration_log_files(
+        files_by_type["calibration_log"], max_workers=1, max_gap=max_gap
+    )
+
+
+def _get_attempt_equilibration_boundaries(files_by_type: pd.Series) -> pd.DataFrame:
+    equilibration_status = pd.concat(
+        [
+            parse_calibration_log_file(filepath, columns=["equilibration status"])
+            for filepath in files_by_type["calibration_log"]
+        ]
+    )["equilibration status"]
+
+    return get_equilibration_boundaries(equilibration_status.sort_index())
+
+
+def _combine_attempt_process_experiment_results(
+    files_by_type: pd.Series, ROI_names: List[str], pivot_column_names: List[str]
+) -> pd.DataFrame:
+    return open_and_combine_process_experiment_results(
+        files_by_type["process_experiment"], ROI_names, pivot_column_names
+    )
+
+
+def _get_attempt_images(data_collection_log: pd.DataFrame, attempt) -> pd.DataFrame:
+    return AttemptImageIndex.from_data_collection_log(
+        data_collection_log.loc[[attempt]]
+    ).get_attempt(attempt)
+
+
+def _join_attempt_dataset(
+    calibration_data: pd.DataFrame,
+    equilibration_boundaries: pd.DataFrame,
+    image_data: pd.DataFrame,
+    attempt_images: pd.DataFrame,
+) -> pd.DataFrame:
+    equilibrated_image_data = label_equilibrated_images(
+        equilibration_boundaries, image_data
+    )
+
+    # Calibration data is resampled to every second, and image timestamps are whole seconds, so every image
+    # timestamp has an exact match
+    image_environment_data = equilibrated_image_data.join(calibration_data, how="inner")
+
+    # Images are matched to the image index by filename as well as timestamp, so that images taken at the same
+    # timestamp (e.g. by different experiments in the attempt) each match only their own row
+    return (
+        image_environment_data.reset_index()
+        .merge(
+            attempt_images.reset_index().rename(columns={"image_filename": "image"}),
+            on=[TIMESTAMP_LABEL, "image"],
+            how="inner",
+        )
+        .set_index(TIMESTAMP_LABEL)
+    )
+
+
+# Stages that use a parser are versioned with it, so that memoized outputs are recomputed whenever the parser's
+# output changes
+ATTEMPT_PIPELINE = Pipeline(
+    [
+        Stage(
+            "data_collection_log",
+            _parse_data_collection_log,
+            parameters=["data_collection_log_filepath"],
+            # parse_data_collection_log() already keeps the parsed log in memory until the file is modified
+            memoize=False,
+        ),
+        Stage(
+            "attempt_metadata",
+            _get_attempt_metadata,
+            inputs=["data_collection_log"],
+            parameters=["attempt"],
+            memoize=False,
+        ),
+        Stage(
+            "files_by_type",
+            _get_attempt_files_by_type,
+            inputs=["attempt_metadata"],
+            parameters=["experiments_directory", "attempt"],
+            memoize=False,
+        ),
+        Stage(
+            "calibration_data",
+            _process_attempt_calibration_logs,
+            inputs=["files_by_type"],
+            parameters=["max_gap"],
+            version=PARSER_VERSION,
+        ),
+        Stage(
+            "equilibration_boundaries",
+            _get_attempt_equilibration_boundaries,
+            inputs=["files_by_type"],
+            version=PARSER_VERSION,
+        ),
+        Stage(
+            "image_data",
+            _combine_attempt_process_experiment_results,
+            inputs=["files_by_type"],
+            parameters=["ROI_names", "pivot_column_names"],
+            version=PROCESS_EXPERIMENT_RESULTS_VERSION,
+        ),
+        Stage(
+            "attempt_images",
+            _get_attempt_images,
+            inputs=["data_collection_log"],
+            parameters=["attempt"],
+        ),
+        Stage(
+            "dataset",
+            _join_attempt_dataset,
+            inputs=[
+                "calibration_data",
+                "equilibration_boundaries",
+                "image_data",
+                "attempt_images",
+            ],
+        ),
+    ]
+)
+
+
+def assemble_attempt_dataset(
+    data_collection_log_filepath: str,
+    experiments_directory: str,
+    attempt,
+    ROI_names: List[str] = None,
+    pivot_column_names: List[str] = None,
+    max_gap: pd.Timedelta = None,
+    max_workers: int = None,
+) -> pd.DataFrame:
+    """ Build one training-ready table for a data collection attempt with ATTEMPT_PIPELINE: equilibrated images
+        with their ROI summary statistics, calibration environment data and attempt metadata.
+        Turn on the parse cache with osmo_jupyter.dataset.cache.enable_parse_cache() to memoize each stage.
+
+        Environment data comes only from the attempt's calibration logs, which also record the YSI readings and
+        equilibration status. Standalone YSI (ProODO or ProSolo) and PicoLog files in the attempt directory are not
+        read; use osmo_jupyter.dataset.combine.AttemptDataset to join those sources.
+
+        Args:
+            data_collection_log_filepath: Filepath to a data collection log .xlsx file.
+            experiments_directory: Local directory containing the Google Drive experiment directory of each attempt.
+            attempt: Index label of the attempt in the parsed data collection log.
+            ROI_names: Optional. A list of ROI names to select. Defaults to all ROIs present.
+            pivot_column_names: Optional. A list of column names to select for each ROI.
+                Defaults to all RGB channel MSORMs.
+            max_gap: Optional. Gaps in calibration log data longer than this are not interpolated across.
+                Defaults to None, which interpolates across any gap.
+            max_workers: Optional. Number of stages to run at once.
+        Returns:
+            Timestamp-indexed DataFrame with one row per equilibrated image, with its ROI summary statistics,
+            equilibration range ID, calibration log data, experiment name and attempt metadata.
+        Raises:
+            ValueError: if the attempt directory has no calibration_log or no process_experiment files.
+    """
+    return ATTEMPT_PIPELINE.run(
+        {
+            "data_collection_log_filepath": data_collection_log_filepath,
+            "experiments_directory": experiments_directory,
+            "attempt": attempt,
+            "ROI_names": ROI_names,
+            "pivot_column_names": pivot_column_names,
+            "max_gap": max_gap,
+        },
+        targets=["dataset"],
+        max_workers=max_workers,
+    )["dataset"]
@@ -0,0 +1,280 @@
+import shutil
+import threading
+from unittest.mock import Mock
+
+import pkg_resources
+import pandas as pd
+import pytest
+
+from osmo_jupyter.dataset import cache
+import osmo_jupyter.dataset.combine as combine
+import osmo_jupyter.dataset.parse as parse
+import osmo_jupyter.dataset.pipeline as module
+
+
+@pytest.fixture
+def cache_directory(tmp_path):
+    cache_directory = tmp_path / "cache"
+    cache.enable_parse_cache(str(cache_directory))
+    yield cache_directory
+    cache.disable_parse_cache()
+    cache.reset_parse_cache_statistics()
+
+
+def _mock_function(name, side_effect):
+    mock_function = Mock(side_effect=side_effect)
+    mock_function.__name__ = name
+    mock_function.__qualname__ = name
+    return mock_function
+
+
+@pytest.fixture
+def mock_functions():
+    return {
+        "load": _mock_function("load", lambda path: f"loaded {path}"),
+        "left": _mock_function("left", lambda load, scale: f"{load} x{scale}"),
+        "right": _mock_function("right", lambda load: f"{load} reversed"),
+        "join": _mock_function("join", lambda left, right: f"{left} + {right}"),
+    }
+
+
+@pytest.fixture
+def pipeline(mock_functions):
+    return module.Pipeline(
+        [
+            module.Stage("join", mock_functions["join"], inputs=["left", "right"]),
+            module.Stage(
+                "left", mock_functions["left"], inputs=["load"], parameters=["scale"]
+            ),
+            module.Stage("right", mock_functions["right"], inputs=["load"]),
+            module.Stage("load", mock_functions["load"], parameters=["path"]),
+        ]
+    )
+
+
+class TestPipeline:
+    def test_runs_stages_after_their_inputs(self, pipeline):
+        outputs = pipeline.run({"path": "a.csv", "scale": 2})
+
+        assert outputs == {
+            "join": "loaded a.csv x2 + loaded a.csv reversed",
+        }
+
+    def test_runs_only_stages_needed_for_targets(self, pipeline, mock_functions):
+        outputs = pipeline.run({"path": "a.csv", "scale": 2}, targets=["right"])
+
+        assert outputs == {"right": "loaded a.csv reversed"}
+        mock_functions["left"].assert_not_called()
+
+    def test_memoized_run_reruns_only_affected_stages(
+        self, pipeline, mock_functions, cache_directory
+    ):
+        pipeline.run({"path": "a.csv", "scale": 2})
+        for mock_function in mock_functions.values():
+            mock_function.reset_mock()
+
+        pipeline.run({"path": "a.csv", "scale": 2})
+        outputs = pipeline.run({"path": "a.csv", "scale": 3})
+
+        assert outputs == {"join": "loaded a.csv x3 + loaded a.csv reversed"}
+        assert {
+            name: mock_function.call_count
+            for name, mock_function in mock_functions.items()
+        } == {"load": 0, "left": 1, "right": 0, "join": 1}
+
+    def test_memoized_run_reruns_stages_using_modified_files(
+        self, pipeline, mock_functions, cache_directory, tmp_path
+    ):
+        source_file_path = tmp_path / "source.csv"
+        source_file_path.write_text("a,b\n")
+        pipeline.run({"path": str(source_file_path), "scale": 2})
+
+        source_file_path.write_text("a,b\n1,2\n")
+        pipeline.run({"path": str(source_file_path), "scale": 2})
+
+        assert mock_functions["load"].call_count == 2
+
+    def test_unmemoized_stage_runs_every_time(self, cache_directory):
+        list_files = _mock_function("list_files", lambda: ["a.csv"])
+        count_files = _mock_function("count_files", lambda files: len(files))
+        pipeline = module.Pipeline(
+            [
+                module.Stage("files", list_files, memoize=False),
+                module.Stage("file_count", count_files, inputs=["files"]),
+            ]
+        )
+
+        pipeline.run({})
+        list_files.return_value = ["a.csv", "b.csv"]
+        list_files.side_effect = None
+        outputs = pipeline.run({})
+
+        assert outputs == {"file_count": 2}
+        assert list_files.call_count == 2
+        assert count_files.call_count == 2
+
+    def test_runs_independent_stages_in_parallel(self):
+        # Each stage waits for the other to start, so this only completes if they run at the same time
+        barrier = threading.Barrier(2, timeout=10)
+        pipeline = module.Pipeline(
+            [
+                module.Stage("left", _mock_function("left", barrier.wait)),
+                module.Stage("right", _mock_function("right", barrier.wait)),
+            ]
+        )
+
+        outputs = pipeline.run({}, max_workers=2)
+
+        assert sorted(outputs.values()) == [0, 1]
+
+    def test_raises_on_missing_parameters(self, pipeline):
+        with pytest.raises(ValueError):
+            pipeline.run({"path": "a.csv"})
+
+    def test_raises_on_cycles(self, mock_functions):
+        with pytest.raises(ValueError):
+            module.Pipeline(
+                [
+                    module.Stage("left", mock_functions["left"], inputs=["right"]),
+                    module.Stage("right", mock_functions["right"], inputs=["left"]),
+                ]
+            )
+
+    def test_raises_on_unknown_inputs(self, mock_functions):
+        with pytest.raises(ValueError):
+            module.Pipeline(
+                [module.Stage("right", mock_functions["right"], inputs=["load"])]
+            )
+
+
+def test_assemble_attempt_dataset(tmp_path, mocker):
+    attempt_data_directory = (
+        tmp_path / "2019-07-26 Collect 3000 images (attempt 1)" / "data"
+    )
+    for file_type, fixture_filename in [
+        ("calibration_log", "test_calibration_log.csv"),
+        ("process_experiment", "test_process_experiment_result.csv"),
+    ]:
+        (attempt_data_directory / file_type).mkdir(parents=True)
+        shutil.copy(
+            pkg_resources.resource_filename(
+                "osmo_jupyter", f"test_fixtures/{fixture_filename}"
+            ),
+            str(attempt_data_directory / file_type / fixture_filename),
+        )
+    # Process experiment results name each image by its filename
+    process_experiment_file_path = (
+        attempt_data_directory
+        / "process_experiment"
+        / "test_process_experiment_result.csv"
+    )
+    process_experiment_file_path.write_text(
+        process_experiment_file_path.read_text().replace(
+            ",image-1.jpeg,", ",2019-01-01--00-00-02_image-1.jpeg,"
+        )
+    )
+    mocker.patch.object(
+        combine,
+        "get_all_experiment_image_filenames",
+        return_value=pd.DataFrame(
+            {
+                "experiment_name": "2019-07-26--19-34-38-Pi2E32-3000_images_attempt_1",
+                "image_filename": ["2019-01-01--00-00-02_image-1.jpeg"],
+            }
+        ),
+    )
+
+    dataset = module.assemble_attempt_dataset(
+        data_collection_log_filepath=pkg_resources.resource_filename(
+            "osmo_jupyter", "test_fixtures/test_data_collection_log.xlsx"
+        ),
+        experiments_directory=str(tmp_path),
+        attempt=0,
+        pivot_column_names=["r_msorm"],
+    )
+
+    # Only the image taken within the equilibrated range is kept
+    assert list(dataset.index) == [pd.to_datetime("2019-01-01 00:00:02")]
+    row = dataset.iloc[0]
+    assert row["image"] == "2019-01-01--00-00-02_image-1.jpeg"
+    assert row["ROI 0 r_msorm"] == 0.3
+    assert row[combine.EQUILIBRATION_RANGE_ID_LABEL] == 0
+    assert row["cartridge_id"] == "C00003"
+    assert row["attempt"] == 0
+    assert "YSI DO (% sat)" in dataset.columns
+
+
+@pytest.mark.parametrize(
+    "file_type, fixture_filename, missing_file_type",
+    [
+        ("calibration_log", "test_calibration_log.csv", "process_experiment"),
+        ("process_experiment", "test_process_experiment_result.csv", "calibration_log"),
+    ],
+)
+def test_assemble_attempt_dataset_raises_on_missing_file_type(
+    tmp_path, file_type, fixture_filename, missing_file_type
+):
+    file_type_directory = (
+        tmp_path / "2019-07-26 Collect 3000 images (attempt 1)" / "data" / file_type
+    )
+    file_type_directory.mkdir(parents=True)
+    shutil.copy(
+        pkg_resources.resource_filename(
+            "osmo_jupyter", f"test_fixtures/{fixture_filename}"
+        ),
+        str(file_type_directory / fixture_filename),
+    )
+
+    with pytest.raises(ValueError, match=f"Attempt 0 has no {missing_file_type} files"):
+        module.assemble_attempt_dataset(
+            data_collection_log_filepath=pkg_resources.resource_filename(
+                "osmo_jupyter", "test_fixtures/test_data_collection_log.xlsx"
+            ),
+            experiments_directory=str(tmp_path),
+            attempt=0,
+        )
+
+
+def test_join_attempt_dataset_matches_images_sharing_a_timestamp():
+    timestamp = pd.to_datetime("2019-01-01 00:00:02")
+    image_filenames = [
+        "2019-01-01--00-00-02_camera-a.jpeg",
+        "2019-01-01--00-00-02_camera-b.jpeg",
+    ]
+    calibration_data = pd.DataFrame(
+        {"YSI DO (% sat)": [50.0]},
+        index=pd.DatetimeIndex([timestamp], name="timestamp"),
+    )
+    equilibration_boundaries = pd.DataFrame(
+        {
+            "start_time": [pd.to_datetime("2019-01-01 00:00:00")],
+            "end_time": [pd.to_datetime("2019-01-01 00:00:04")],
+        }
+    )
+    image_data = pd.DataFrame(
+        {"image": image_filenames, "ROI 0 r_msorm": [0.1, 0.2]},
+        index=pd.DatetimeIndex([timestamp] * 2, name="timestamp"),
+    )
+    attempt_images = pd.DataFrame(
+        {"image_filename": image_filenames, "experiment_name": ["a", "b"]},
+        index=pd.DatetimeIndex([timestamp] * 2, name="timestamp"),
+    )
+
+    dataset = module._join_attempt_dataset(
+        calibration_data, equilibration_boundaries, image_data, attempt_images
+    )
+
+    assert list(dataset["image"]) == image_filenames
+    assert list(dataset["ROI 0 r_msorm"]) == [0.1, 0.2]
+    assert list(dataset["experiment_name"]) == ["a", "b"]
+    assert list(dataset.index) == [timestamp] * 2
+
+
+def test_attempt_pipeline_stages_are_versioned_with_their_parsers():
+    stage_versions = {
+        stage.name: stage.version for stage in module.ATTEMPT_PIPELINE.stages
+    }
+
+    assert stage_versions["calibration_data"] == parse.PARSER_VERSION
+    assert stage_versions["equilibration_boundaries"] == parse.PARSER_VERSION
+    assert stage_versions["image_data"] == combine.PROCESS_EXPERIMENT_RESULTS_VERSION
@@ -1,3 +1,4 @@
+import re
 from pathlib import Path
 from typing import List
 
@@ -47,6 +48,13 @@ FILE_TYPE_SUBFOLDERS = [
 SOURCE_DATA_FILETYPES = [".csv", ".mp4", ".gif"]
 
 
+# process_experiment output filenames end with when they were generated, e.g.
+# "2019-08-23--13-10-40-[...] - summary statistics (generated 2019-08-27--10-34-46).csv"
+_GENERATED_SUFFIX_PATTERN = re.compile(
+    r"^(?P<run_prefix>.*) \(generated (?P<generated_at>\d{4}-\d{2}-\d{2}--\d{2}-\d{2}-\d{2})\)$"
+)
+
+
 def _is_data_filepath(filepath):
     return filepath.is_file() and filepath.suffix in SOURCE_DATA_FILETYPES
 
@@ -87,6 +95,42 @@ def get_experiment_data_files_by_type(project_directory):
     )
 
 
+def select_latest_generation_filepaths(filepaths: List) -> List:
+    """ Pick the most recently generated of each set of files that differ only in their "(generated ...)" suffix,
+        e.g. process_experiment summary statistics files from re-runs of the same experiment. Only the filenames are
+        used, so no files are opened.
+
+        Args:
+            filepaths: A list of filepaths, as strings or Path objects.
+        Returns:
+            The filepaths, in their original order, leaving out every file with a newer generation in the same
+            directory. Files without a "(generated ...)" suffix are all kept.
+    """
+    selected_positions = set()
+    latest_generations = {}
+    for position, filepath in enumerate(filepaths):
+        path = Path(filepath)
+        match = _GENERATED_SUFFIX_PATTERN.match(path.stem)
+        if match is None:
+            selected_positions.add(position)
+            continue
+
+        # The zero-padded timestamp format sorts chronologically as a string
+        run_key = (path.parent, match.group("run_prefix"), path.suffix)
+        generation = (match.group("generated_at"), position)
+        latest_generations[run_key] = max(
+            latest_generations.get(run_key, generation), generation
+        )
+
+    selected_positions.update(position for _, position in latest_generations.values())
+
+    return [
+        filepath
+        for position, filepath in enumerate(filepaths)
+        if position in selected_positions
+    ]
+
+
 def get_all_experiment_image_filenames(experiment_names: List[str]) -> pd.DataFrame:
     """
         Get a DataFrame of all image files across multiple experiment data directories.
@@ -144,3 +144,34 @@ class TestGetAllExperimentImages:
             experiment_images,
             pd.DataFrame(columns=["experiment_name", "image_filename"], dtype="object"),
         )
+
+
+class TestSelectLatestGenerationFilepaths:
+    def test_keeps_latest_generation_of_each_run(self):
+        filepaths = [
+            "process_experiment/run-a - summary statistics (generated 2019-08-27--10-34-46).csv",
+            "process_experiment/run-b - summary statistics (generated 2019-08-28--09-00-00).csv",
+            "process_experiment/run-a - summary statistics (generated 2019-08-28--08-00-00).csv",
+            "process_experiment/run-a - summary statistics (generated 2019-08-26--23-59-59).csv",
+        ]
+
+        assert module.select_latest_generation_filepaths(filepaths) == [
+            "process_experiment/run-b - summary statistics (generated 2019-08-28--09-00-00).csv",
+            "process_experiment/run-a - summary statistics (generated 2019-08-28--08-00-00).csv",
+        ]
+
+    def test_keeps_files_without_generated_suffix(self):
+        filepaths = [
+            Path("process_experiment/summary statistics.csv"),
+            Path("process_experiment/summary statistics.csv"),
+        ]
+
+        assert module.select_latest_generation_filepaths(filepaths) == filepaths
+
+    def test_treats_runs_in_different_directories_separately(self):
+        filepaths = [
+            "attempt-1/run - summary statistics (generated 2019-08-27--10-34-46).csv",
+            "attempt-2/run - summary statistics (generated 2019-08-28--10-34-46).csv",
+        ]
+
+        assert module.select_latest_generation_filepaths(filepaths) == filepaths
@@ -0,0 +1,177 @@
+""" A local, append-only store of parsed instrument data (e.g. from the parse_* and process_* functions in
+    osmo_jupyter.dataset.parse), partitioned by day so that reading a short time range only opens the data it needs.
+
+    Each instrument has its own directory, containing one subdirectory per appended day of data (in the format written
+    by osmo_jupyter.dataset.export) and an index of the timestamp range covered by each of those partitions.
+"""
+import json
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from . import export
+from .parse import TIMESTAMP_LABEL
+
+INDEX_FILENAME = "index.json"
+
+# Raw instrument data is stored at full precision
+STORE_VALUE_DTYPE = "float64"
+
+_NANOSECONDS_PER_DAY = 24 * 60 * 60 * 10 ** 9
+
+_PARTITION_INDEX_COLUMNS = ["partition", "start_time", "end_time", "row_count"]
+
+
+class TimeSeriesStore:
+    """ Day-partitioned store of timestamp-indexed instrument data.
+
+        Args:
+            directory: Directory to keep the store in. Created if it doesn't exist.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_instrument_directory(self, instrument: str) -> str:
+        return os.path.join(self.directory, instrument)
+
+    def _read_index_entries(self, instrument: str) -> List[dict]:
+        index_path = os.path.join(
+            self._get_instrument_directory(instrument), INDEX_FILENAME
+        )
+        try:
+            with open(index_path) as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return []
+
+    def _write_index_entries(self, instrument: str, index_entries: List[dict]):
+        instrument_directory = self._get_instrument_directory(instrument)
+
+        # Replace the index atomically so that readers never see a partially-written index
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=instrument_directory, suffix=".tmp"
+        )
+        with os.fdopen(file_descriptor, "w") as index_file:
+            json.dump(index_entries, index_file, indent=2)
+        os.replace(temporary_path, os.path.join(instrument_directory, INDEX_FILENAME))
+
+    def get_instruments(self) -> List[str]:
+        """ Get the names of all instruments with data in the store.
+        """
+        return sorted(
+            instrument
+            for instrument in os.listdir(self.directory)
+            if os.path.isfile(
+                os.path.join(self._get_instrument_directory(instrument), INDEX_FILENAME)
+            )
+        )
+
+    def get_partitions(self, instrument: str) -> pd.DataFrame:
+        """ Get the index of partitions stored for an instrument.
+
+            Args:
+                instrument: Name of the instrument, e.g. "ysi_prosolo".
+            Returns:
+                DataFrame with one row per partition, in the order they were appended, and columns partition
+                (directory name), start_time, end_time and row_count.
+        """
+        partitions = pd.DataFrame(
+            self._read_index_entries(instrument), columns=_PARTITION_INDEX_COLUMNS
+        )
+        partitions["start_time"] = pd.to_datetime(partitions["start_time"])
+        partitions["end_time"] = pd.to_datetime(partitions["end_time"])
+        return partitions
+
+    def append(self, instrument: str, data: pd.DataFrame) -> None:
+        """ Add timestamp-indexed data for an instrument to the store, as one new partition per day that the data
+            covers. Existing partitions are never modified.
+
+            Args:
+                instrument: Name of the instrument, e.g. "ysi_prosolo".
+                data: Timestamp-indexed DataFrame, e.g. from parse_ysi_prosolo_file().
+        """
+        if data.empty:
+            return
+
+        instrument_directory = self._get_instrument_directory(instrument)
+        os.makedirs(instrument_directory, exist_ok=True)
+
+        sorted_data = data.sort_index(kind="mergesort")
+        timestamps_ns = pd.DatetimeIndex(sorted_data.index).asi8
+        days = timestamps_ns // _NANOSECONDS_PER_DAY
+        day_start_positions = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+        day_end_positions = np.append(day_start_positions[1:], len(days))
+
+        index_entries = self._read_index_entries(instrument)
+        for start, end in zip(day_start_positions, day_end_positions):
+            day_data = sorted_data.iloc[start:end]
+            day = day_data.index[0].strftime("%Y-%m-%d")
+            partition = f"{day}--{len(index_entries):06d}"
+
+            export.export_processed_dataset(
+                day_data,
+                os.path.join(instrument_directory, partition),
+                value_dtype=STORE_VALUE_DTYPE,
+            )
+            index_entries.append(
+                {
+                    "partition": partition,
+                    "start_time": day_data.index[0].isoformat(),
+                    "end_time": day_data.index[-1].isoformat(),
+                    "row_count": len(day_data),
+                }
+            )
+
+        # The index is only updated after every new partition has been written
+        self._write_index_entries(instrument, index_entries)
+
+    def read(
+        self,
+        instrument: str,
+        start: pd.Timestamp = None,
+        end: pd.Timestamp = None,
+        columns: List[str] = None,
+    ) -> pd.DataFrame:
+        """ Read an instrument's data within a time range, opening only the partitions that overlap the range and
+            only the requested columns.
+
+            Args:
+                instrument: Name of the instrument, e.g. "ysi_prosolo".
+                start: Optional. Earliest timestamp to include. Defaults to the start of the data.
+                end: Optional. Latest timestamp to include. Defaults to the end of the data.
+                columns: Optional. Names of the columns to read. Defaults to all columns.
+            Returns:
+                Timestamp-indexed DataFrame of the data from start to end (inclusive), sorted by timestamp.
+        """
+        partitions = self.get_partitions(instrument)
+
+        overlaps_range = np.ones(len(partitions), dtype=bool)
+        if start is not None:
+            overlaps_range &= (partitions["end_time"] >= pd.Timestamp(start)).values
+        if end is not None:
+            overlaps_range &= (partitions["start_time"] <= pd.Timestamp(end)).values
+
+        instrument_directory = self._get_instrument_directory(instrument)
+        partition_data = [
+            export.load_processed_dataset(
+                os.path.join(instrument_directory, partition), columns
+            )
+            for partition in partitions["partition"][overlaps_range]
+        ]
+
+        if not partition_data:
+            return pd.DataFrame(
+                columns=columns, index=pd.DatetimeIndex([], name=TIMESTAMP_LABEL)
+            )
+
+        data = pd.concat(partition_data, sort=False)
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index(kind="mergesort")
+
+        # Slicing a sorted index by label is a binary search
+        return data.loc[start:end]
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+import osmo_jupyter.dataset.store as module
+
+
+@pytest.fixture
+def ysi_data():
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                [
+                    "2019-01-01 23:59:58",
+                    "2019-01-01 23:59:59",
+                    "2019-01-02 00:00:00",
+                    "2019-01-02 00:00:01",
+                ]
+            ),
+            "YSI DO (% sat)": [50.0, 51.0, 52.0, 53.0],
+            "YSI unit ID": ["unit ID", "unit ID", "unit ID", "unit ID"],
+        }
+    ).set_index("timestamp")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return module.TimeSeriesStore(str(tmp_path / "store"))
+
+
+class TestTimeSeriesStore:
+    def test_partitions_by_day(self, store, ysi_data):
+        store.append("ysi_proodo", ysi_data)
+
+        partitions = store.get_partitions("ysi_proodo")
+
+        assert list(partitions["partition"]) == [
+            "2019-01-01--000000",
+            "2019-01-02--000001",
+        ]
+        assert list(partitions["start_time"]) == [
+            pd.Timestamp("2019-01-01 23:59:58"),
+            pd.Timestamp("2019-01-02 00:00:00"),
+        ]
+        assert list(partitions["row_count"]) == [2, 2]
+        assert store.get_instruments() == ["ysi_proodo"]
+
+    def test_reads_everything(self, store, ysi_data):
+        store.append("ysi_proodo", ysi_data)
+
+        pd.testing.assert_frame_equal(
+            store.read("ysi_proodo"), ysi_data.astype({"YSI unit ID": "category"}),
+        )
+
+    def test_reads_range_and_columns_from_overlapping_partitions_only(
+        self, store, ysi_data, mocker
+    ):
+        store.append("ysi_proodo", ysi_data)
+        load_spy = mocker.spy(module.export, "load_processed_dataset")
+
+        data = store.read(
+            "ysi_proodo",
+            start=pd.Timestamp("2019-01-02 00:00:01"),
+            end=pd.Timestamp("2019-01-03"),
+            columns=["YSI DO (% sat)"],
+        )
+
+        pd.testing.assert_frame_equal(data, ysi_data.iloc[3:][["YSI DO (% sat)"]])
+        assert load_spy.call_count == 1
+
+    def test_appends_new_partitions_for_the_same_day(self, store, ysi_data):
+        store.append("ysi_proodo", ysi_data.iloc[2:])
+        store.append("ysi_proodo", ysi_data.iloc[:2])
+        store.append("ysi_proodo", ysi_data.iloc[:0])
+
+        assert len(store.get_partitions("ysi_proodo")) == 2
+        pd.testing.assert_frame_equal(
+            store.read("ysi_proodo", columns=["YSI DO (% sat)"]),
+            ysi_data[["YSI DO (% sat)"]],
+        )
+
+    def test_reads_empty_range(self, store, ysi_data):
+        store.append("ysi_proodo", ysi_data)
+
+        data = store.read("ysi_proodo", start=pd.Timestamp("2019-02-01"))
+
+        assert data.empty
@@ -0,0 +1,332 @@
+""" Write synthetic instrument files of any length, in the same formats (headers, encodings, quoting and line endings)
+    as the real files that osmo_jupyter.dataset.parse and osmo_jupyter.spectrometer parse. Used for benchmarking
+    and for testing parsers on more than a handful of rows.
+"""
+import csv
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_START_TIME = pd.Timestamp("2019-01-01 00:00:00")
+DEFAULT_INTERVAL = pd.Timedelta(seconds=1)
+DEFAULT_WAVELENGTH_COUNT = 64
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _get_timestamps(row_count, start_time, interval) -> pd.DatetimeIndex:
+    return pd.date_range(start=start_time, periods=row_count, freq=interval)
+
+
+def _random_walk(random_state, row_count, start, step, low, high) -> np.ndarray:
+    steps = random_state.normal(scale=step, size=row_count)
+    return np.clip(start + np.cumsum(steps), low, high).round(2)
+
+
+def _format_with_lookup(keys, format_key) -> np.ndarray:
+    """ Format each row by formatting its unique key once, which is much faster than strftime() on every row
+        when there are far fewer unique keys (e.g. days or seconds of the day) than rows.
+    """
+    codes, unique_keys = pd.factorize(keys)
+    return np.array([format_key(key) for key in unique_keys], dtype=object)[codes]
+
+
+def write_ysi_prosolo_file(
+    filepath: str,
+    row_count: int,
+    start_time: pd.Timestamp = DEFAULT_START_TIME,
+    interval: pd.Timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+) -> None:
+    """ Write a synthetic YSI KorDSS/ProSolo csv file: latin-1 encoded, with CRLF line endings, a 5 line preamble,
+        and separate 12-hour DATE and TIME columns.
+
+        Args:
+            filepath: Filepath to write to.
+            row_count: Number of data rows.
+            start_time: Optional. Timestamp of the first row. Defaults to 2019-01-01 00:00:00.
+            interval: Optional. Time between rows. Defaults to 1 second.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+    """
+    random_state = np.random.RandomState(seed)
+    timestamps = _get_timestamps(row_count, start_time, interval)
+    do_percent_saturation = _random_walk(random_state, row_count, 60, 0.1, 0, 200)
+
+    seconds_of_day = (timestamps.asi8 // 10 ** 9) % SECONDS_PER_DAY
+    data = pd.DataFrame(
+        {
+            "DATE": _format_with_lookup(
+                timestamps.normalize(), lambda day: day.strftime("%m/%d/%Y")
+            ),
+            "TIME": _format_with_lookup(
+                seconds_of_day,
+                lambda second: (
+                    pd.Timestamp(0) + pd.Timedelta(seconds=second)
+                ).strftime("%I:%M:%S %p"),
+            ),
+            "SITE": "<None>",
+            "DATA ID": "",
+            "Barometer (mmHg)": _random_walk(
+                random_state, row_count, 750, 0.1, 700, 800
+            ),
+            "ODO (% Sat)": do_percent_saturation,
+            "ODO (mg/L)": (do_percent_saturation / 10).round(2),
+            "ODO (% Local)": do_percent_saturation,
+            "Temp (°C)": _random_walk(random_state, row_count, 25, 0.05, 0, 50),
+        }
+    )
+
+    with open(filepath, "w", encoding="latin-1", newline="") as ysi_file:
+        ysi_file.write("KorDSS MEASUREMENT DATA FILE EXPORT\r\n\r\n")
+        ysi_file.write(
+            f"FILE CREATED:,{start_time.strftime('%m/%d/%Y %I:%M:%S %p')}\r\n\r\n\r\n"
+        )
+        data.to_csv(ysi_file, index=False, line_terminator="\r\n")
+
+
+def write_ysi_proodo_file(
+    filepath: str,
+    row_count: int,
+    start_time: pd.Timestamp = DEFAULT_START_TIME,
+    interval: pd.Timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+) -> None:
+    """ Write a synthetic YSI "classic"/ProODO csv file: every value quoted, with CRLF line endings.
+
+        Args:
+            filepath: Filepath to write to.
+            row_count: Number of data rows.
+            start_time: Optional. Timestamp of the first row. Defaults to 2019-01-01 00:00:00.
+            interval: Optional. Time between rows. Defaults to 1 second.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+    """
+    random_state = np.random.RandomState(seed)
+    data = pd.DataFrame(
+        {
+            "Timestamp": _get_timestamps(row_count, start_time, interval),
+            "Barometer (mmHg)": _random_walk(
+                random_state, row_count, 750, 0.1, 700, 800
+            ),
+            "Dissolved Oxygen (%)": _random_walk(
+                random_state, row_count, 20, 0.1, 0, 200
+            ),
+            "Temperature (C)": _random_walk(random_state, row_count, 25, 0.05, 0, 50),
+            "Comment": "",
+            "Site": "",
+            "Folder": "",
+            "Unit ID": "unit ID",
+        }
+    )
+
+    data.to_csv(
+        filepath,
+        index=False,
+        quoting=csv.QUOTE_ALL,
+        date_format="%m/%d/%Y %H:%M:%S",
+        line_terminator="\r\n",
+    )
+
+
+def write_picolog_file(
+    filepath: str,
+    row_count: int,
+    start_time: pd.Timestamp = DEFAULT_START_TIME,
+    interval: pd.Timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+) -> None:
+    """ Write a synthetic PicoLog csv file: every value quoted, with CRLF line endings, an unnamed timestamp column
+        and timestamps with a UTC offset.
+
+        Args:
+            filepath: Filepath to write to.
+            row_count: Number of data rows.
+            start_time: Optional. Local timestamp of the first row. Defaults to 2019-01-01 00:00:00.
+            interval: Optional. Time between rows. Defaults to 1 second.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+    """
+    random_state = np.random.RandomState(seed)
+    data = pd.DataFrame(
+        {
+            "Temperature Ave. (C)": _random_walk(
+                random_state, row_count, 40, 0.05, 0, 50
+            ),
+            "Pressure Ave. (mmHg)": _random_walk(
+                random_state, row_count, 750, 0.1, 700, 800
+            ),
+            "Pressure (Voltage) Ave. (nV)": 10,
+        },
+        index=_get_timestamps(row_count, start_time, interval).rename(""),
+    )
+
+    data.to_csv(
+        filepath,
+        quoting=csv.QUOTE_ALL,
+        date_format="%Y-%m-%dT%H:%M:%S-07:00",
+        line_terminator="\r\n",
+    )
+
+
+def write_calibration_log_file(
+    filepath: str,
+    row_count: int,
+    start_time: pd.Timestamp = DEFAULT_START_TIME,
+    interval: pd.Timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+    rows_per_setpoint: int = 600,
+) -> None:
+    """ Write a synthetic calibration log csv file, with fractional-second timestamps and the doubled carriage
+        returns (CR CR LF) that the calibration environment writes on Windows.
+
+        Args:
+            filepath: Filepath to write to.
+            row_count: Number of data rows.
+            start_time: Optional. Timestamp of the first row. Defaults to 2019-01-01 00:00:00.
+            interval: Optional. Time between rows. Defaults to 1 second.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+            rows_per_setpoint: Optional. Number of rows logged at each setpoint. Defaults to 600.
+    """
+    random_state = np.random.RandomState(seed)
+    setpoint_ids = np.arange(row_count) // rows_per_setpoint
+    setpoint_o2_fractions = np.array([0.0, 0.05, 0.1, 0.15, 0.2])[setpoint_ids % 5]
+    setpoint_temperatures = np.array([15, 25, 35])[(setpoint_ids // 5) % 3]
+    equilibration_statuses = np.where(
+        np.arange(row_count) % rows_per_setpoint < rows_per_setpoint // 2,
+        "waiting",
+        "equilibrated",
+    )
+
+    do_mmhg = _random_walk(random_state, row_count, 80, 0.1, 0, 800)
+    data = pd.DataFrame(
+        {
+            "N2 gas ID": 8,
+            "O2 source gas gas ID": 11,
+            "YSI DO (% sat)": (do_mmhg / 1.6).round(2),
+            "YSI DO (mg/L)": (do_mmhg / 17).round(2),
+            "YSI DO (mmHg)": do_mmhg,
+            "YSI barometric pressure (mmHg)": _random_walk(
+                random_state, row_count, 760, 0.1, 700, 800
+            ),
+            "YSI temperature (C)": _random_walk(
+                random_state, row_count, 20, 0.05, 0, 50
+            ),
+            "equilibration status": equilibration_statuses,
+            "gas mixer N2 fraction in mix": (1 - setpoint_o2_fractions).round(2),
+            "gas mixer O2 source gas fraction in mix": setpoint_o2_fractions,
+            "gas mixer flow rate (SLPM)": 2.5,
+            "gas mixer low feed pressure alarm": False,
+            "gas mixer low feed pressure alarm - N2": False,
+            "gas mixer low feed pressure alarm - O2 source gas": False,
+            "gas mixer mix pressure (mmHg)": 20.0,
+            "loop count": 0,
+            "o2 source gas fraction": 1.0,
+            "setpoint O2 fraction": setpoint_o2_fractions,
+            "setpoint flow rate (SLPM)": 2.5,
+            "setpoint hold time seconds": 360.0,
+            "setpoint temperature (C)": setpoint_temperatures,
+            "timestamp": _get_timestamps(
+                row_count, start_time + pd.Timedelta("100ms"), interval
+            ),
+            "water bath external sensor temperature (C)": 320.0,
+            "water bath internal temperature (C)": _random_walk(
+                random_state, row_count, 18, 0.05, 0, 50
+            ),
+        }
+    )
+
+    data.to_csv(
+        filepath,
+        index=False,
+        date_format="%Y-%m-%d %H:%M:%S.%f",
+        line_terminator="\r\r\n",
+    )
+
+
+def write_spectrometer_file(
+    filepath: str,
+    row_count: int,
+    start_time: pd.Timestamp = DEFAULT_START_TIME,
+    interval: pd.Timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+    wavelength_count: int = DEFAULT_WAVELENGTH_COUNT,
+) -> None:
+    """ Write a synthetic OceanView "Time Series (column data)" spectrometer text file: a metadata preamble with
+        mixed line endings, then tab-delimited rows of local timestamp, epoch milliseconds and one intensity per
+        wavelength.
+
+        Args:
+            filepath: Filepath to write to.
+            row_count: Number of data rows.
+            start_time: Optional. Local timestamp of the first row. Defaults to 2019-01-01 00:00:00.
+            interval: Optional. Time between rows. Defaults to 1 second.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+            wavelength_count: Optional. Number of wavelength columns. Real files have 3648; defaults to 64.
+    """
+    random_state = np.random.RandomState(seed)
+    timestamps = _get_timestamps(row_count, start_time, interval)
+    wavelengths = np.linspace(344.05, 1032.175, wavelength_count).round(3)
+
+    data = pd.DataFrame(
+        random_state.normal(scale=500, size=(row_count, wavelength_count)).round(2),
+        index=timestamps,
+    )
+    # Timestamps are in local time (PST) and epoch times are in UTC
+    data.insert(0, "epoch_time", (timestamps.asi8 // 10 ** 6) + 8 * 60 * 60 * 1000)
+
+    with open(filepath, "w", newline="") as spectrometer_file:
+        spectrometer_file.write(
+            f"Data from synthetic_spectrometer_data.txt Node\n"
+            f"\rDate: {start_time.strftime('%a %b %d %H:%M:%S')} PST {start_time.year}\n"
+            "User: AwesomeOsmoOperator\n"
+            "Spectrometer: FLMT02819\n"
+            "Trigger mode: 0\n"
+            "Integration Time (sec): 5.000000E-1\n"
+            "Scans to average: 1\n"
+            "Electric dark correction enabled: true\n"
+            "Nonlinearity correction enabled: false\n"
+            "Boxcar width: 0\n"
+            "XAxis mode: Wavelengths\n"
+            f"Number of Pixels in Spectrum: {wavelength_count}\n"
+            ">>>>>Begin Spectral Data<<<<<\n"
+            "\t\t" + "\t".join(str(wavelength) for wavelength in wavelengths) + "\r\n"
+        )
+        data.to_csv(
+            spectrometer_file,
+            sep="\t",
+            header=False,
+            date_format="%Y-%m-%d %H:%M:%S.%f",
+            line_terminator="\r\n",
+        )
+
+
+SYNTHETIC_FILE_WRITERS = {
+    "ysi_prosolo": (write_ysi_prosolo_file, "ysi_prosolo.csv"),
+    "ysi_proodo": (write_ysi_proodo_file, "ysi_proodo.csv"),
+    "pico": (write_picolog_file, "pico.csv"),
+    "calibration_log": (write_calibration_log_file, "calibration_log.csv"),
+    "spectrometer": (write_spectrometer_file, "spectrometer.txt"),
+}
+
+
+def write_synthetic_files(
+    directory: str, row_count: int, seed: int = 0
+) -> Dict[str, str]:
+    """ Write one synthetic file of every type into a directory.
+
+        Args:
+            directory: Directory to write to. Created if it doesn't exist.
+            row_count: Number of data rows in each file.
+            seed: Optional. Random seed for the generated values. Defaults to 0.
+        Returns:
+            Dictionary of file type to the filepath of the synthetic file of that type.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    filepaths = {}
+    for file_type, (write_function, filename) in SYNTHETIC_FILE_WRITERS.items():
+        filepath = os.path.join(directory, filename)
+        write_function(filepath, row_count, seed=seed)
+        filepaths[file_type] = filepath
+
+    return filepaths
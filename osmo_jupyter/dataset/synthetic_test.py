@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from osmo_jupyter import spectrometer
+from osmo_jupyter.dataset import parse
+import osmo_jupyter.dataset.synthetic as module
+
+
+@pytest.mark.parametrize(
+    "file_type, parse_function",
+    [
+        ("ysi_prosolo", parse.parse_ysi_prosolo_file),
+        ("ysi_proodo", parse.parse_ysi_proodo_file),
+        ("pico", parse.parse_picolog_file),
+        ("calibration_log", parse.parse_calibration_log_file),
+    ],
+)
+def test_synthetic_files_are_parsed_and_detected(file_type, parse_function, tmp_path):
+    filepaths = module.write_synthetic_files(str(tmp_path), row_count=100)
+
+    parsed_data = parse_function(filepaths[file_type])
+
+    assert len(parsed_data) == 100
+    assert parsed_data.index.is_monotonic_increasing
+    assert not parsed_data.isnull().any().any()
+    with open(filepaths[file_type], "rb") as synthetic_file:
+        file_header = synthetic_file.read(parse.FILE_TYPE_SNIFF_SIZE_BYTES)
+    assert parse.sniff_file_type(file_header) == file_type
+
+
+def test_synthetic_spectrometer_file_is_parsed(tmp_path):
+    filepath = os.path.join(str(tmp_path), "spectrometer.txt")
+    module.write_spectrometer_file(filepath, row_count=10, wavelength_count=5)
+
+    spectrometer_data = spectrometer.import_and_format_spectrometer_data(filepath)
+
+    assert len(spectrometer_data) == 10 * 5
+    assert spectrometer_data["wavelength"].nunique() == 5